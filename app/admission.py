@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from app.settings import Settings
+
+
+"""
+Admission control in front of the fee calculation. At most max_concurrency
+requests are priced at once; a request that cannot get a slot within the
+queue timeout, counted from its arrival, is not queued any longer but answered
+immediately, from the quote cache in degraded mode or with a 503 and a
+Retry-After header. Failing fast keeps latency bounded when traffic spikes
+instead of letting the queue grow until every request times out.
+
+Requests wait for their slot on the event loop, before they are handed to the
+threadpool that runs the synchronous endpoint, so the wait is bounded and
+measured here instead of happening unseen in the threadpool's queue. Keep
+max_concurrency below the threadpool size (40 by default) so an admitted
+request never queues again.
+"""
+
+
+class ArrivalTimeMiddleware:
+    """Stamps every request with its arrival time in request.state.arrived,
+    before the body is read, so admission control counts the whole wait.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            scope.setdefault("state", {})["arrived"] = time.monotonic()
+        await self.app(scope, receive, send)
+
+
+class _Waiter:
+    """A request waiting for a slot, woken on the event loop it waits on."""
+
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+        self.granted: bool = False
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded queueing time.
+
+    Args:
+        max_concurrency (int): Number of requests priced at the same time.
+        queue_timeout (float): Seconds a request may wait for a free slot.
+        retry_after (int): Seconds clients are asked to wait after a rejection.
+        degraded (bool): Whether saturated requests may be served from the quote cache.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        queue_timeout: float,
+        retry_after: int = 1,
+        degraded: bool = False,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.degraded = degraded
+        self._lock = threading.Lock()
+        self._in_use: int = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._stats_lock = threading.Lock()
+        self._stats: dict[str, float] = {
+            "in_flight": 0,
+            "admitted": 0,
+            "saturated": 0,
+            "served_degraded": 0,
+            "rejected": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionController | None":
+        """Return a controller configured from settings, or None if it is disabled."""
+        if settings.admission_max_concurrency <= 0:
+            return None
+        return cls(
+            settings.admission_max_concurrency,
+            settings.admission_queue_timeout,
+            retry_after=settings.admission_retry_after,
+            degraded=settings.admission_degraded,
+        )
+
+    async def acquire(self, arrived: float | None = None) -> bool:
+        """Wait for a slot until the queue timeout has passed since the request arrived.
+
+        Args:
+            arrived (float | None): time.monotonic() when the request arrived, now by default.
+
+        Returns:
+            bool: Whether the request was admitted. An admitted request must call release.
+
+        Slots are handed to waiting requests in arrival order.
+        """
+        if arrived is None:
+            arrived = time.monotonic()
+        waiter: _Waiter | None = None
+        with self._lock:
+            if self._in_use < self.max_concurrency and not self._waiters:
+                self._in_use += 1
+            else:
+                waiter = _Waiter(asyncio.get_running_loop())
+                self._waiters.append(waiter)
+
+        if waiter is not None:
+            try:
+                remaining: float = self.queue_timeout - (time.monotonic() - arrived)
+                if remaining > 0:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), remaining)
+            except asyncio.TimeoutError:
+                pass
+            except BaseException:
+                self._abandon(waiter)
+                raise
+            self._abandon(waiter)
+
+        admitted: bool = waiter is None or waiter.granted
+        self._record_wait(time.monotonic() - arrived, admitted)
+        return admitted
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Stop waiting. A slot granted in the meantime stays with the caller."""
+        with self._lock:
+            if not waiter.granted:
+                self._waiters.remove(waiter)
+
+    def _record_wait(self, waited: float, admitted: bool) -> None:
+        with self._stats_lock:
+            self._stats["queue_wait_seconds_total"] += waited
+            if waited > self._stats["queue_wait_seconds_max"]:
+                self._stats["queue_wait_seconds_max"] = waited
+            if admitted:
+                self._stats["admitted"] += 1
+                self._stats["in_flight"] += 1
+            else:
+                self._stats["saturated"] += 1
+
+    def release(self) -> None:
+        """Give back the slot of an admitted request, handing it to the oldest waiter."""
+        with self._stats_lock:
+            self._stats["in_flight"] -= 1
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._in_use -= 1
+                return
+            waiter: _Waiter = self._waiters.popleft()
+            waiter.granted = True
+        try:
+            waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+        except RuntimeError:
+            # The waiter's event loop is closed, pass the slot on instead.
+            self._release_slot()
+
+    def record_degraded(self) -> None:
+        """Count a saturated request that was served from the quote cache."""
+        with self._stats_lock:
+            self._stats["served_degraded"] += 1
+
+    def record_rejected(self) -> None:
+        """Count a saturated request that was answered with a 503."""
+        with self._stats_lock:
+            self._stats["rejected"] += 1
+
+    def snapshot(self) -> dict:
+        """Return the configuration and counters."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["max_concurrency"] = self.max_concurrency
+        stats["queue_timeout"] = self.queue_timeout
+        return stats
@@ -0,0 +1,311 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import IO, Iterator
+from app.models import Order
+from app.delivery_fee import calculate_delivery_fee
+from app.settings import Settings
+
+
+"""
+Append-only audit log of every quoted fee. The request path only appends a
+tuple to a bounded in-memory buffer; a background thread serializes the
+buffered records in batches, writes each batch as one gzip member to the
+current file and fsyncs on a schedule. Files are rotated by size and never
+rewritten, so a file is always a valid multi-member gzip stream of JSON lines.
+
+Overflow policy: when the buffer is full the oldest pending record is dropped.
+The number of dropped records is written to the log as a
+{"dropped": n} record, so gaps are visible to anyone reading it.
+
+Write failures: a batch that could not be written is kept and retried first
+with the next flush, after the current file is abandoned in favour of a new one.
+"""
+
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    """Bounded, non-blocking audit sink with a batched background writer.
+
+    Args:
+        directory (str): Directory the audit files are written to.
+        buffer_size (int): Records held in memory before the oldest ones are dropped.
+        batch_size (int): Records compressed and written together.
+        flush_interval (float): Seconds between flushes of a partial batch.
+        fsync_interval (float): Seconds between fsync calls on the current file.
+        max_file_bytes (int): Size in bytes after which a new file is started.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        buffer_size: int = 65536,
+        batch_size: int = 1024,
+        flush_interval: float = 1.0,
+        fsync_interval: float = 5.0,
+        max_file_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_file_bytes = max_file_bytes
+
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._buffer_lock = threading.Lock()
+        self._pending_drops: int = 0
+        self._failed_batch: list | None = None
+        self.written: int = 0
+        self.dropped: int = 0
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._file: IO[bytes] | None = None
+        self._file_sequence: int = 0
+        self._file_bytes: int = 0
+        self._last_fsync: float = 0.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AuditLog | None":
+        """Return an AuditLog configured from settings, or None if it is disabled."""
+        if settings.audit_log_dir is None:
+            return None
+        return cls(
+            settings.audit_log_dir,
+            buffer_size=settings.audit_buffer_size,
+            batch_size=settings.audit_batch_size,
+            flush_interval=settings.audit_flush_interval,
+            fsync_interval=settings.audit_fsync_interval,
+            max_file_bytes=settings.audit_max_file_bytes,
+        )
+
+    def record(
+        self,
+        order_data: Order,
+        fee: int,
+        rules_version: str,
+        surge: float = 1.0,
+        calendar: float | None = None,
+    ) -> None:
+        """Enqueue a quote for auditing. Never waits on I/O and never raises on overflow.
+
+        The surge and the calendar multiplier are recorded when they applied,
+        so the fee can be reproduced from the record's inputs and rule version.
+
+        The lock only guards the append and the drop counter, it is never held
+        while records are serialized or written.
+        """
+        entry = (time.time(), order_data, fee, rules_version, surge, calendar)
+        with self._buffer_lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._pending_drops += 1
+            self._buffer.append(entry)
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="audit-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush every pending record, fsync and close the current file."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self._close_file()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._try_flush()
+        self._try_flush()
+
+    def _try_flush(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            logger.exception(
+                "Writing the audit log failed, retrying with the next flush"
+            )
+            self._abandon_file()
+
+    def flush(self) -> None:
+        """Write out everything currently buffered, one gzip member per batch.
+
+        Raises:
+            OSError: If a batch could not be written. It is kept and written
+                first by the next call.
+        """
+        while True:
+            if self._failed_batch is not None:
+                batch, self._failed_batch = self._failed_batch, None
+            else:
+                with self._buffer_lock:
+                    count: int = min(self.batch_size, len(self._buffer))
+                    batch = [self._buffer.popleft() for _ in range(count)]
+            if not batch:
+                break
+            try:
+                self._write_batch(batch)
+            except BaseException:
+                self._failed_batch = batch
+                raise
+
+        with self._buffer_lock:
+            dropped: int = self._pending_drops
+            self._pending_drops = 0
+        if dropped > 0:
+            try:
+                self._write_lines([json.dumps({"ts": time.time(), "dropped": dropped})])
+            except BaseException:
+                with self._buffer_lock:
+                    self._pending_drops += dropped
+                raise
+            self.dropped += dropped
+
+        if self._file is not None:
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._fsync()
+
+    def _write_batch(self, batch: list) -> None:
+        lines = []
+        for ts, order_data, fee, rules_version, surge, calendar in batch:
+            record = {
+                "ts": ts,
+                "order": order_data.model_dump(exclude_none=True),
+                "delivery_fee": fee,
+                "rules_version": rules_version,
+            }
+            if surge != 1.0:
+                record["surge"] = surge
+            if calendar is not None:
+                record["calendar"] = calendar
+            lines.append(json.dumps(record))
+        self._write_lines(lines)
+        self.written += len(batch)
+
+    def _write_lines(self, lines: list[str]) -> None:
+        if self._file is None or self._file_bytes >= self.max_file_bytes:
+            self._open_next_file()
+        payload: bytes = gzip.compress(("\n".join(lines) + "\n").encode())
+        self._file.write(payload)
+        self._file.flush()
+        self._file_bytes += len(payload)
+
+    def _open_next_file(self) -> None:
+        self._close_file()
+        stamp: str = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self._file_sequence += 1
+        name: str = f"audit-{stamp}-{os.getpid()}-{self._file_sequence:04d}.jsonl.gz"
+        self._file = open(os.path.join(self.directory, name), "ab")
+        self._file_bytes = 0
+
+    def _fsync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+
+    def _abandon_file(self) -> None:
+        """Close the current file after a failed write without syncing it."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._fsync()
+            self._file.close()
+            self._file = None
+
+
+def read_records(paths: list[str]) -> Iterator[dict]:
+    """Yield the audit records of the given files, in file order.
+
+    A directory is expanded to the audit files it contains, oldest first.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(n for n in os.listdir(path) if n.startswith("audit-"))
+            yield from read_records([os.path.join(path, n) for n in names])
+            continue
+        with gzip.open(path, "rt") as audit_file:
+            for line in audit_file:
+                yield json.loads(line)
+
+
+def benchmark(directory: str, quotes: int) -> dict[str, float]:
+    """Measure what auditing adds to the request path, in nanoseconds per quote."""
+    order_data = Order(
+        cart_value=790,
+        delivery_distance=2235,
+        number_of_items=4,
+        time="2024-01-15T13:00:00Z",
+    )
+    audit_log = AuditLog(directory, buffer_size=quotes)
+
+    start: float = time.perf_counter()
+    for _ in range(quotes):
+        calculate_delivery_fee(order_data)
+    fee_ns: float = (time.perf_counter() - start) / quotes * 1e9
+
+    audit_log.start()
+    start = time.perf_counter()
+    for _ in range(quotes):
+        audit_log.record(order_data, 710, "bench")
+    record_ns: float = (time.perf_counter() - start) / quotes * 1e9
+    audit_log.stop()
+
+    return {"calculate_delivery_fee_ns": fee_ns, "audit_record_ns": record_ns}
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line interface: python -m app.audit {read,bench} ..."""
+    parser = argparse.ArgumentParser(prog="python -m app.audit")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    read = commands.add_parser("read", help="print audit records as JSON lines")
+    read.add_argument("paths", nargs="+", help="audit files or directories")
+    read.add_argument("--since", help="only records at or after this ISO time")
+
+    bench = commands.add_parser("bench", help="measure the request path cost")
+    bench.add_argument("directory", help="scratch directory for the audit files")
+    bench.add_argument("--quotes", type=int, default=100000)
+
+    args = parser.parse_args(argv)
+    if args.command == "read":
+        since: float = (
+            datetime.fromisoformat(args.since).timestamp() if args.since else 0
+        )
+        for record in read_records(args.paths):
+            if record["ts"] >= since:
+                sys.stdout.write(json.dumps(record) + "\n")
+    else:
+        for name, value in benchmark(args.directory, args.quotes).items():
+            print(f"{name}: {value:.0f}")
+
+
+if __name__ == "__main__":
+    main()
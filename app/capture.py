@@ -0,0 +1,171 @@
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Callable
+from app.settings import Settings
+
+
+"""
+Traffic capture for replay tests. A sampled share of the POST /delivery_fee
+requests is recorded as JSON lines with the request body, the response and the
+time the app took to answer:
+
+    {"ts": 1706720400.12, "body": {...}, "status": 200, "response": {"delivery_fee": 710}, "latency_ms": 0.41}
+
+The middleware only copies the body chunks it passes through and offers the
+record to a bounded queue; a background thread writes the file. Records are
+dropped instead of queued when the writer falls behind. Replay a capture with
+python -m app.replay, see app/replay.py.
+"""
+
+
+logger = logging.getLogger(__name__)
+
+"""Path of the captured requests."""
+CAPTURED_PATH: str = "/delivery_fee"
+"""Larger request or response bodies are not captured."""
+MAX_BODY_BYTES: int = 64 * 1024
+
+
+def _decode(body: bytes):
+    """Return the JSON value of a body, or the text itself if it is not JSON."""
+    text: str = body.decode(errors="replace")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+class TrafficCapture:
+    """Samples requests and writes them to a JSONL file from a background thread.
+
+    Args:
+        path (str): The file the records are appended to.
+        sample_rate (float): Share of the requests captured, between 0 and 1.
+        queue_size (int): Records waiting to be written before new ones are dropped.
+    """
+
+    def __init__(self, path: str, sample_rate: float = 0.01, queue_size: int = 10000):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.captured: int = 0
+        self.dropped: int = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "TrafficCapture | None":
+        """Return a capture configured from settings, or None if it is disabled."""
+        if settings.capture_path is None:
+            return None
+        return cls(settings.capture_path, sample_rate=settings.capture_sample_rate)
+
+    def sampled(self) -> bool:
+        """Decide whether to capture the next request."""
+        return random.random() < self.sample_rate
+
+    def submit(self, record: dict) -> None:
+        """Offer a record for writing, dropping it if the queue is full."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="traffic-capture", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write the records still queued and stop the writer."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        with open(self.path, "a") as capture_file:
+            while True:
+                records = [self._queue.get()]
+                while True:
+                    try:
+                        records.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stopping: bool = records[-1] is None
+                if stopping:
+                    records.pop()
+                try:
+                    capture_file.writelines(json.dumps(r) + "\n" for r in records)
+                    capture_file.flush()
+                    self.captured += len(records)
+                except (OSError, ValueError):
+                    logger.exception("Writing captured traffic failed")
+                if stopping:
+                    return
+
+
+class CaptureMiddleware:
+    """ASGI middleware handing sampled /delivery_fee exchanges to a TrafficCapture.
+
+    Args:
+        app: The wrapped ASGI app.
+        capture (Callable[[], TrafficCapture | None]): Returns the current capture,
+            looked up per request. Requests pass through untouched while it returns None.
+    """
+
+    def __init__(self, app, capture: Callable[[], "TrafficCapture | None"]):
+        self.app = app
+        self.capture = capture
+
+    async def __call__(self, scope, receive, send) -> None:
+        capture: TrafficCapture | None = self.capture()
+        if (
+            capture is None
+            or scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] != CAPTURED_PATH
+            or not capture.sampled()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started: float = time.perf_counter()
+        request_body = bytearray()
+        response_body = bytearray()
+        response_status: list[int] = [0]
+
+        async def capturing_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.extend(message.get("body", b""))
+            return message
+
+        async def capturing_send(message) -> None:
+            if message["type"] == "http.response.start":
+                response_status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                response_body.extend(message.get("body", b""))
+                if not message.get("more_body", False):
+                    latency_ms: float = (time.perf_counter() - started) * 1000
+                    if max(len(request_body), len(response_body)) <= MAX_BODY_BYTES:
+                        capture.submit(
+                            {
+                                "ts": time.time(),
+                                "body": _decode(request_body),
+                                "status": response_status[0],
+                                "response": _decode(response_body),
+                                "latency_ms": round(latency_ms, 3),
+                            }
+                        )
+            await send(message)
+
+        await self.app(scope, capturing_receive, capturing_send)
@@ -1,12 +1,15 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True)
 class OrderConstants:
     """Dataclass containing constants that make up the rules for calculating
-    the delivery fee.
+    the delivery fee. The class attributes are the production rules, instances
+    with some fields replaced describe alternative rule sets.
     """
 
+    """Identifies this rule set in audit records, bump it whenever a rule changes."""
+    RULES_VERSION: str = "2024.3"
     """The delivery fee can never exceed this."""
     MAX_DELIVERY_FEE: int = 1500
     """Free delivery is granted when the chart value reaches this."""
@@ -27,6 +30,21 @@ class OrderConstants:
     MAX_ITEMS_NO_BULK_FEE: int = 12
     ITEMS_BULK_FEE: int = 120
 
+    """Constants related to the weight and volume surcharges of orders with an item list"""
+    MAX_WEIGHT_NO_SURCHARGE: int = 10000
+    WEIGHT_STEP: int = 5000
+    WEIGHT_STEP_FEE: int = 100
+    LARGE_ITEM_FEE: int = 50
+    EXTRA_LARGE_ITEM_FEE: int = 200
+
+    """Constants related to the currency and the rounding of the fee. Every
+    amount above is in minor units of CURRENCY. ROUNDING_MODE is one of
+    half_even, half_up, up or down, and ROUNDING_STEP the cash-rounding step in
+    minor units the final fee is rounded to, e.g. 5 for 0.05 steps."""
+    CURRENCY: str = "EUR"
+    ROUNDING_MODE: str = "half_even"
+    ROUNDING_STEP: int = 1
+
     """Rush hour day is 4, Friday (count starts from 0)"""
     RUSH_HOUR_DAY: int = 4
     """The starting hour: 15:00:00"""
@@ -41,3 +59,97 @@ class ErrorMessages:
 
     INVALID_TIME_FORMAT: str = "Invalid time format: "
     INVALID_UTC_OFFSET: str = "Time string does not include timezone offset or 'Z'"
+    INVALID_STREAM_MESSAGE: str = (
+        "Stream messages must be JSON objects with an 'order' field"
+    )
+    SHADOW_PRICING_DISABLED: str = "Shadow pricing is not enabled"
+    SURGE_PRICING_DISABLED: str = "Surge pricing is not enabled"
+    VENUE_WITHOUT_LOCATION: str = (
+        "A venue needs a delivery_distance or latitude and longitude"
+    )
+    EMPTY_ITEM_LIST: str = "The item list must not be empty"
+    TOO_MANY_ITEM_LINES: str = "The item list has too many lines"
+    INVALID_ITEM_LINE: str = "Invalid item line "
+    ITEM_COUNT_MISMATCH: str = (
+        "number_of_items does not match the quantities of the items"
+    )
+    MISSING_NUMBER_OF_ITEMS: str = "number_of_items or items is required"
+    CUSTOMER_WITHOUT_LOCATION: str = (
+        "latitude and longitude are required for venues given by coordinates"
+    )
+    SERVICE_SATURATED: str = "Too many concurrent requests, retry later"
+    QUOTE_FAILED: str = "Internal Server Error"
+    ADMIN_DISABLED: str = "Admin endpoints are not enabled"
+    INVALID_ADMIN_TOKEN: str = "Invalid admin token"
+    PROFILER_BUSY: str = "A profile is already being taken"
+    RATE_LIMITED: str = "Rate limit exceeded, retry later"
+    RATE_LIMITING_DISABLED: str = "Rate limiting is not enabled"
+
+
+@dataclass
+class HeaderNames:
+    """Names of the custom request and response headers."""
+
+    """Response header naming the pricing experiment arm the order was priced in."""
+    EXPERIMENT_ARM: str = "X-Experiment-Arm"
+    """Response header set when a saturated service answered from a fallback."""
+    DEGRADED: str = "X-Degraded"
+    """Request header turning on tracing spans for one request, see app/tracing.py."""
+    TRACE: str = "X-Trace"
+    """Response header carrying the spans of a traced request."""
+    SERVER_TIMING: str = "Server-Timing"
+    """Request header authenticating the admin endpoints."""
+    ADMIN_TOKEN: str = "X-Admin-Token"
+    """Response header naming the currency of a fee priced with a pricing profile."""
+    CURRENCY: str = "X-Currency"
+    """Request header identifying the client for rate limiting."""
+    API_KEY: str = "X-API-Key"
+
+
+@dataclass
+class StreamConstants:
+    """Constants for the persistent streaming quote channel."""
+
+    """Maximum number of quotes a single connection may have in flight. Once
+    reached, the server stops reading from the socket until a reply is sent."""
+    MAX_IN_FLIGHT: int = 64
+
+
+@dataclass
+class RateLimitConstants:
+    """Constants of the per-client rate limiting."""
+
+    """Requests to paths starting with this prefix are rate limited."""
+    LIMITED_PATH_PREFIX: str = "/delivery_fee"
+    """API keys are truncated to this many characters, bounding the table's memory."""
+    MAX_KEY_LENGTH: int = 128
+
+
+@dataclass
+class ProfilerConstants:
+    """Limits of the on-demand sampling profiler."""
+
+    """Longest profile that can be requested, in seconds."""
+    MAX_SECONDS: float = 60.0
+    """Shortest interval between two samples, in milliseconds."""
+    MIN_INTERVAL_MS: float = 1.0
+
+
+@dataclass
+class CartConstants:
+    """Constants of the optional item list of an order."""
+
+    """Maximum number of lines in one item list."""
+    MAX_LINES: int = 10000
+    """Volume categories of an item line, the first one is the default."""
+    VOLUME_CATEGORIES: tuple[str, ...] = ("small", "medium", "large", "extra_large")
+
+
+@dataclass
+class RankingConstants:
+    """Constants for the cheapest venue ranking."""
+
+    """Maximum number of candidate venues in one ranking request."""
+    MAX_VENUES: int = 5000
+    """Mean radius of the earth in meters, for distances between coordinates."""
+    EARTH_RADIUS: int = 6371000
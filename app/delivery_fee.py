@@ -1,15 +1,39 @@
 from datetime import datetime, timezone
+from fractions import Fraction
+from functools import lru_cache
+from typing import Callable, Sequence
 from dateutil import parser
 import math
-from app.models import Order
+from app.models import CartSummary, Order
 from app.constants import OrderConstants
+from app.tracing import traced
 
 
-def calculate_delivery_fee(order_data: Order) -> int:
+"""The production rule set."""
+DEFAULT_RULES: OrderConstants = OrderConstants()
+"""Supported values of OrderConstants.ROUNDING_MODE."""
+ROUNDING_MODES: tuple[str, ...] = ("half_even", "half_up", "up", "down")
+"""Largest denominator a multiplier is turned into, 4 decimal places are exact."""
+MAX_MULTIPLIER_DENOMINATOR: int = 10000
+
+
+@traced("calculate_delivery_fee")
+def calculate_delivery_fee(
+    order_data: Order,
+    rules: OrderConstants = DEFAULT_RULES,
+    surge: float = 1.0,
+    surge_replaces_rush_hour: bool = False,
+    calendar_multiplier: float | None = None,
+) -> int:
     """Calculate the full delivery fee of the order.
 
     Args:
         order_data (Order): The order details including cart value, delivery distance, number of items, and order time.
+        rules (OrderConstants): The rule set to price the order with, production rules by default.
+        surge (float): Demand-driven multiplier, stacked on top of the rush hour multiplier.
+        surge_replaces_rush_hour (bool): Apply only the surge, ignoring the rush hour window.
+        calendar_multiplier (float | None): Multiplier of the holiday or event the
+            order falls in, replacing the rush hour multiplier. See app/pricing_calendar.py.
 
     Returns:
         float: The total delivery fee in cents.
@@ -18,41 +42,245 @@ def calculate_delivery_fee(order_data: Order) -> int:
     - If the cart value meets or exceeds the free delivery threshold, the fee is 0.
     - If the cart value is below a certain threshold, a minimum fee is applied.
     - The delivery fee includes surcharges based on the delivery distance and number of items.
+    - Orders with an item list also pay weight and volume surcharges.
     - A rush hour multiplier may apply if the order was placed during rush hours.
+    - A holiday or event multiplier applies instead of it during calendar entries.
+    - A surge multiplier may apply when demand is high.
     - The delivery fee is capped at a maximum value.
     """
-    fee: int = 0
+    if order_data.cart_value >= rules.FREE_DELIVERY_CART_VALUE:
+        return 0
 
-    if order_data.cart_value >= OrderConstants.FREE_DELIVERY_CART_VALUE:
+    rush_hour: bool = False
+    if surge_replaces_rush_hour:
+        calendar_multiplier = None
+    elif calendar_multiplier is None:
+        rush_hour = is_rush_hour(order_data.time, rules)
+
+    return order_fee(
+        order_data.cart_value,
+        order_data.delivery_distance,
+        order_data.number_of_items,
+        rush_hour,
+        rules,
+        surge,
+        calendar_multiplier,
+        order_data.cart,
+    )
+
+
+def calculate_delivery_fees(
+    orders: Sequence[Order],
+    rules: OrderConstants = DEFAULT_RULES,
+    order_times: Sequence[datetime | None] | None = None,
+    surges: Sequence[float] | None = None,
+    calendar_multipliers: Sequence[float | None] | None = None,
+) -> list[int]:
+    """Calculate the delivery fees of a batch of orders with one rule set.
+
+    Args:
+        orders (Sequence[Order]): The orders to price.
+        rules (OrderConstants): The rule set to price the orders with.
+        order_times (Sequence[datetime | None]): The orders' times as returned by
+            parse_order_time. Pass them in when pricing the same batch with several
+            rule sets, so every time string is only parsed once.
+        surges (Sequence[float]): The surge multiplier of each order, none by default.
+        calendar_multipliers (Sequence[float | None]): The calendar multiplier of
+            each order, replacing its rush hour multiplier where it is not None.
+
+    Returns:
+        list[int]: The delivery fees in cents, in the order of the input.
+
+    Orders sharing a multiplier share one fee_finalizer, which rounds exactly
+    like finalize_fee does for a single order.
+    """
+    if order_times is None:
+        order_times = [parse_order_time(order_data.time) for order_data in orders]
+    if surges is None:
+        surges = [1.0] * len(orders)
+    if calendar_multipliers is None:
+        calendar_multipliers = [None] * len(orders)
+
+    finalizers: dict[float, Callable[[int], int]] = {}
+    fees: list[int] = []
+    for order_data, order_time, surge, calendar_multiplier in zip(
+        orders, order_times, surges, calendar_multipliers
+    ):
+        if order_data.cart_value >= rules.FREE_DELIVERY_CART_VALUE:
+            fees.append(0)
+            continue
+        multiplier: float = surge * rush_hour_multiplier(
+            calendar_multiplier is None and in_rush_hour(order_time, rules),
+            rules,
+            calendar_multiplier,
+        )
+        finalize = finalizers.get(multiplier)
+        if finalize is None:
+            finalize = finalizers[multiplier] = fee_finalizer(multiplier, rules)
+        fees.append(
+            finalize(
+                order_surcharges(
+                    order_data.cart_value,
+                    order_data.delivery_distance,
+                    order_data.number_of_items,
+                    rules,
+                    order_data.cart,
+                )
+            )
+        )
+    return fees
+
+
+def order_fee(
+    cart_value: int,
+    distance: int,
+    items: int,
+    rush_hour: bool,
+    rules: OrderConstants = DEFAULT_RULES,
+    surge: float = 1.0,
+    calendar_multiplier: float | None = None,
+    cart: CartSummary | None = None,
+) -> int:
+    """Calculate the delivery fee from the order's values once it is known whether
+    the order falls in rush hour or a calendar entry. See calculate_delivery_fee
+    for the rules.
+    """
+    if cart_value >= rules.FREE_DELIVERY_CART_VALUE:
         return 0
 
-    fee += cart_value_surcharge(order_data.cart_value)
-    fee += distance_surcharge(order_data.delivery_distance)
-    fee += items_surcharge(order_data.number_of_items)
+    fee: int = order_surcharges(cart_value, distance, items, rules, cart)
+    multiplier: float = rush_hour_multiplier(rush_hour, rules, calendar_multiplier)
+    return finalize_fee(fee, multiplier * surge, rules)
 
-    if is_rush_hour(order_data.time):
-        multiplied_fee: float = fee * OrderConstants.RUSH_HOUR_MULTIPLIER
-        fee = round(multiplied_fee)
 
-    if fee > OrderConstants.MAX_DELIVERY_FEE:
-        return OrderConstants.MAX_DELIVERY_FEE
+def order_surcharges(
+    cart_value: int,
+    distance: int,
+    items: int,
+    rules: OrderConstants = DEFAULT_RULES,
+    cart: CartSummary | None = None,
+) -> int:
+    """Sum the surcharges of an order before any multiplier, rounding or cap."""
+    fee: int = 0
+    fee += cart_value_surcharge(cart_value, rules)
+    fee += distance_surcharge(distance, rules)
+    fee += items_surcharge(items, rules)
+    if cart is not None:
+        fee += weight_surcharge(cart.weight, rules)
+        fee += volume_surcharge(cart.large, cart.extra_large, rules)
+    return fee
+
+
+def rush_hour_multiplier(
+    rush_hour: bool,
+    rules: OrderConstants = DEFAULT_RULES,
+    calendar_multiplier: float | None = None,
+) -> float:
+    """Return the time-based multiplier: the calendar entry's if the order falls
+    in one, otherwise the rules' rush hour multiplier during rush hour.
+    """
+    if calendar_multiplier is not None:
+        return calendar_multiplier
+    return rules.RUSH_HOUR_MULTIPLIER if rush_hour else 1.0
+
+
+@lru_cache(maxsize=1024)
+def multiplier_ratio(multiplier: float) -> tuple[int, int]:
+    """Return a multiplier as the integer fraction it was meant to be, e.g. 1.2
+    as 6/5 and the product 1.2 * 1.3 (1.5599999999999998) as 39/25.
+    """
+    ratio: Fraction = Fraction(multiplier).limit_denominator(MAX_MULTIPLIER_DENOMINATOR)
+    return ratio.numerator, ratio.denominator
+
+
+def round_amount(amount: int, divisor: int, step: int, mode: str) -> int:
+    """Divide a non-negative amount by divisor and round the result to a multiple
+    of step with the rounding mode, in integer arithmetic only.
+    """
+    unit: int = divisor * step
+    quotient, remainder = divmod(amount, unit)
+    if remainder and (
+        mode == "up"
+        or (mode == "half_up" and 2 * remainder >= unit)
+        or (
+            mode == "half_even"
+            and (2 * remainder > unit or (2 * remainder == unit and quotient % 2 == 1))
+        )
+    ):
+        quotient += 1
+    return quotient * step
+
+
+def finalize_fee(
+    fee: int, multiplier: float, rules: OrderConstants = DEFAULT_RULES
+) -> int:
+    """Apply the rush hour and surge multiplier to the summed surcharges, round
+    the result with the rules' rounding mode and step and cap it at the maximum
+    delivery fee.
+
+    The multiplier is applied as an integer fraction, so ties are rounded
+    exactly instead of depending on floating point error.
+    """
+    if multiplier != 1.0 or rules.ROUNDING_STEP != 1:
+        numerator, denominator = multiplier_ratio(multiplier)
+        fee = round_amount(
+            fee * numerator, denominator, rules.ROUNDING_STEP, rules.ROUNDING_MODE
+        )
+
+    if fee > rules.MAX_DELIVERY_FEE:
+        return rules.MAX_DELIVERY_FEE
 
     return fee
 
 
-def cart_value_surcharge(chart_value: int) -> int:
+def fee_finalizer(
+    multiplier: float, rules: OrderConstants = DEFAULT_RULES
+) -> Callable[[int], int]:
+    """Compile finalize_fee for one multiplier and rule set, for batches of fees
+    sharing them.
+
+    The fraction, rounding unit and cap are resolved once and the rounding mode
+    is picked once, so each fee costs a divmod and a comparison.
+    """
+    numerator, denominator = multiplier_ratio(multiplier)
+    step: int = rules.ROUNDING_STEP
+    unit: int = denominator * step
+    cap: int = rules.MAX_DELIVERY_FEE
+
+    if numerator == unit == 1:
+        return lambda fee: min(fee, cap)
+    if rules.ROUNDING_MODE == "down":
+        return lambda fee: min(fee * numerator // unit * step, cap)
+    if rules.ROUNDING_MODE == "up":
+        return lambda fee: min(-(-fee * numerator // unit) * step, cap)
+    if rules.ROUNDING_MODE == "half_up":
+        return lambda fee: min((2 * fee * numerator + unit) // (2 * unit) * step, cap)
+
+    def half_even(fee: int) -> int:
+        quotient, remainder = divmod(fee * numerator, unit)
+        if 2 * remainder > unit or (2 * remainder == unit and quotient % 2 == 1):
+            quotient += 1
+        return min(quotient * step, cap)
+
+    return half_even
+
+
+def cart_value_surcharge(
+    chart_value: int, rules: OrderConstants = DEFAULT_RULES
+) -> int:
     """Return 0 if the chart_value is higher or equal to 1000 (10€),
     otherwise return the difference so they add up to 1000.
     """
-    min_chart_value: int = OrderConstants.MIN_CART_VALUE_NO_SURCHARGE
+    min_chart_value: int = rules.MIN_CART_VALUE_NO_SURCHARGE
     return max(0, min_chart_value - chart_value)
 
 
-def distance_surcharge(distance: int) -> int:
+def distance_surcharge(distance: int, rules: OrderConstants = DEFAULT_RULES) -> int:
     """Calculate the delivery surcharge based on the given distance (in meters).
 
     Args:
         distance (int): The delivery distance in meters.
+        rules (OrderConstants): The rule set to apply.
 
     Returns:
         int: The surcharge amount in cents.
@@ -60,9 +288,9 @@ def distance_surcharge(distance: int) -> int:
     The surcharge starts at 200 cents for the first 1000 meters.
     For every additional 500 meters started beyond the first 1000 meters, 100 cents are added.
     """
-    starting_distance: int = OrderConstants.STARTING_DISTANCE
-    starting_fee: int = OrderConstants.DISTANCE_STARTING_FEE
-    half_km_fee: int = OrderConstants.DISTANCE_HALF_KM_FEE
+    starting_distance: int = rules.STARTING_DISTANCE
+    starting_fee: int = rules.DISTANCE_STARTING_FEE
+    half_km_fee: int = rules.DISTANCE_HALF_KM_FEE
 
     if distance <= starting_distance:
         return starting_fee
@@ -74,11 +302,34 @@ def distance_surcharge(distance: int) -> int:
     return starting_fee + additional_surcharge
 
 
-def items_surcharge(items: int) -> int:
+def distance_surcharges(
+    distances: Sequence[int], rules: OrderConstants = DEFAULT_RULES
+) -> list[int]:
+    """Calculate the distance surcharge of many distances at once.
+
+    Same rule as distance_surcharge, with the started half kilometres counted in
+    integer arithmetic and the constants looked up once for the whole sequence.
+    """
+    starting_distance: int = rules.STARTING_DISTANCE
+    starting_fee: int = rules.DISTANCE_STARTING_FEE
+    half_km_fee: int = rules.DISTANCE_HALF_KM_FEE
+
+    return [
+        (
+            starting_fee
+            if distance <= starting_distance
+            else starting_fee - (starting_distance - distance) // 500 * half_km_fee
+        )
+        for distance in distances
+    ]
+
+
+def items_surcharge(items: int, rules: OrderConstants = DEFAULT_RULES) -> int:
     """Calculate the surcharge and bulk fee based on the number of items.
 
     Args:
         items (int): The number of items in the order.
+        rules (OrderConstants): The rule set to apply.
 
     Returns:
         int: The total surcharge and bulk fee amount in cents.
@@ -88,20 +339,70 @@ def items_surcharge(items: int) -> int:
     - Additional 120 cents bulk fee for orders with more than 12 items.
     """
     fee: int = 0
-    if items > OrderConstants.MAX_ITEMS_NO_SURCHARGE:
-        additional_items: int = items - OrderConstants.MAX_ITEMS_NO_SURCHARGE
-        fee = additional_items * OrderConstants.ADDITIONAL_FEE_PER_ITEM
+    if items > rules.MAX_ITEMS_NO_SURCHARGE:
+        additional_items: int = items - rules.MAX_ITEMS_NO_SURCHARGE
+        fee = additional_items * rules.ADDITIONAL_FEE_PER_ITEM
 
-    if items > OrderConstants.MAX_ITEMS_NO_BULK_FEE:
-        fee += OrderConstants.ITEMS_BULK_FEE
+    if items > rules.MAX_ITEMS_NO_BULK_FEE:
+        fee += rules.ITEMS_BULK_FEE
     return fee
 
 
-def is_rush_hour(time: str) -> bool:
+def weight_surcharge(weight: int, rules: OrderConstants = DEFAULT_RULES) -> int:
+    """Calculate the surcharge of an order's total weight in grams.
+
+    No surcharge up to 10 kg, then 100 cents for every started 5 kg above it.
+    """
+    if weight <= rules.MAX_WEIGHT_NO_SURCHARGE:
+        return 0
+    steps_started: int = -(
+        (rules.MAX_WEIGHT_NO_SURCHARGE - weight) // rules.WEIGHT_STEP
+    )
+    return steps_started * rules.WEIGHT_STEP_FEE
+
+
+def volume_surcharge(
+    large: int, extra_large: int, rules: OrderConstants = DEFAULT_RULES
+) -> int:
+    """Calculate the surcharge of an order's bulky items: 50 cents per large and
+    200 cents per extra large item. Small and medium items are free.
+    """
+    return large * rules.LARGE_ITEM_FEE + extra_large * rules.EXTRA_LARGE_ITEM_FEE
+
+
+def parse_order_time(time: str) -> datetime | None:
+    """Parse an ISO 8601 order time and convert it to UTC.
+
+    Returns None instead of raising if the string cannot be parsed, callers
+    treat such an order as placed outside rush hour.
+    """
+    try:
+        order_time: datetime = parser.isoparse(time)
+        return order_time.astimezone(timezone.utc)
+    except Exception:
+        return None
+
+
+def in_rush_hour(
+    order_time_utc: datetime | None, rules: OrderConstants = DEFAULT_RULES
+) -> bool:
+    """Determines whether an already parsed UTC order time falls in rush hour."""
+    if order_time_utc is None:
+        return False
+
+    is_friday = order_time_utc.weekday() == rules.RUSH_HOUR_DAY
+    is_rush_hour = rules.RUSH_HOUR_START <= order_time_utc.hour < rules.RUSH_HOUR_END
+
+    return is_friday and is_rush_hour
+
+
+@traced("is_rush_hour")
+def is_rush_hour(time: str, rules: OrderConstants = DEFAULT_RULES) -> bool:
     """Determines whether an order was placed during rush hour (Friday 3-7 PM UTC).
 
     Args:
         time (str): The ISO 8601 formatted time string representing the order placement time.
+        rules (OrderConstants): The rule set defining the rush hour window.
 
     Returns:
         bool: True if the order was placed during rush hour, False otherwise.
@@ -112,17 +413,4 @@ def is_rush_hour(time: str) -> bool:
         No exceptions should be raised during the execution, as the input is assumed to be validated.
         If any unexpected error occurs, the function returns False to avoid applying a rush hour fee incorrectly.
     """
-    rush_day: int = OrderConstants.RUSH_HOUR_DAY
-    rush_start: int = OrderConstants.RUSH_HOUR_START
-    rush_end: int = OrderConstants.RUSH_HOUR_END
-
-    try:
-        order_time: datetime = parser.isoparse(time)
-        order_time_utc = order_time.astimezone(timezone.utc)
-
-        is_friday = order_time_utc.weekday() == rush_day
-        is_rush_hour = rush_start <= order_time_utc.hour < rush_end
-
-        return is_friday and is_rush_hour
-    except Exception:
-        return False
+    return in_rush_hour(parse_order_time(time), rules)
@@ -0,0 +1,91 @@
+import bisect
+import dataclasses
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any
+from app.constants import OrderConstants
+from app.rules import rules_fingerprint, rules_from_overrides
+
+
+"""
+Deterministic A/B pricing experiments. Customers are bucketed by hashing their
+id with the experiment's salt, so an assignment is sticky for as long as the
+salt and the arm weights stay the same. Example configuration:
+
+    {
+        "name": "distance-step-2024-02",
+        "salt": "f3a1",
+        "arms": [
+            {"name": "control", "weight": 80, "rules": {}},
+            {"name": "cheap_distance", "weight": 20, "rules": {"DISTANCE_HALF_KM_FEE": 80}}
+        ]
+    }
+"""
+
+
+@dataclass(frozen=True)
+class ExperimentArm:
+    """An experiment arm and the rule set its customers are priced with."""
+
+    name: str
+    rules: OrderConstants
+
+
+class Experiment:
+    """A compiled experiment: arm rule sets are built once and the weights are
+    turned into cumulative bucket boundaries.
+
+    Args:
+        name (str): The experiment name, part of every arm's rules version
+            together with the arm name and a fingerprint of the arm's rules, so
+            the version changes when the rules of an arm are edited.
+        salt (str): Mixed into the hash, change it to reshuffle the customers.
+        arms (list[dict]): Arm definitions with a name, integer weight and rule overrides.
+
+    Raises:
+        ValueError: If there are no arms, a weight is not a positive integer or a rule is invalid.
+    """
+
+    def __init__(self, name: str, salt: str, arms: list[dict[str, Any]]):
+        if not arms:
+            raise ValueError("An experiment needs at least one arm")
+        self.name = name
+        self._salt: bytes = salt.encode() + b":"
+        self.arms: list[ExperimentArm] = []
+        self._boundaries: list[int] = []
+
+        total_weight: int = 0
+        for arm in arms:
+            weight = arm.get("weight", 1)
+            if type(weight) is not int or weight <= 0:
+                raise ValueError(
+                    f"Arm {arm.get('name')} needs a positive integer weight"
+                )
+            rules: OrderConstants = rules_from_overrides(arm.get("rules", {}))
+            rules = dataclasses.replace(
+                rules,
+                RULES_VERSION=(
+                    f"{rules.RULES_VERSION}+{name}:{arm['name']}"
+                    f":{rules_fingerprint(rules)}"
+                ),
+            )
+            total_weight += weight
+            self.arms.append(ExperimentArm(arm["name"], rules))
+            self._boundaries.append(total_weight)
+        self._total_weight: int = total_weight
+
+    def assign(self, customer_id: str) -> ExperimentArm:
+        """Return the arm of a customer, computed from a single hash of its id."""
+        digest: bytes = hashlib.blake2b(
+            self._salt + customer_id.encode(), digest_size=8
+        ).digest()
+        bucket: int = int.from_bytes(digest, "big") % self._total_weight
+        return self.arms[bisect.bisect_right(self._boundaries, bucket)]
+
+
+def load_experiment(path: str) -> Experiment:
+    """Load and compile an experiment from a JSON file."""
+    with open(path) as experiment_file:
+        config: dict[str, Any] = json.load(experiment_file)
+    return Experiment(config["name"], config.get("salt", ""), config["arms"])
@@ -0,0 +1,220 @@
+from functools import lru_cache
+from typing import Iterator, Literal
+from app.constants import OrderConstants
+from app.delivery_fee import DEFAULT_RULES, is_rush_hour, order_fee
+from app.models import CartSummary, FeeInsights, FeeSegment, Order
+
+
+"""
+Answers to inverse questions about the fee ("how much more for free delivery?")
+in closed form from the rules, and piecewise constant fee curves over one input
+with the other inputs fixed. A curve is built by evaluating the fee only at the
+points where a rule can change it and merging equal neighbours.
+"""
+
+
+CurveInput = Literal["cart_value", "delivery_distance", "number_of_items"]
+
+
+def next_distance_step(distance: int, rules: OrderConstants = DEFAULT_RULES) -> int:
+    """Return the smallest distance above the given one with a higher distance surcharge."""
+    if distance <= rules.STARTING_DISTANCE:
+        return rules.STARTING_DISTANCE + 1
+    half_kms_started: int = -((rules.STARTING_DISTANCE - distance) // 500)
+    return rules.STARTING_DISTANCE + half_kms_started * 500 + 1
+
+
+def _breakpoints(vary: CurveInput, fee_at, rules: OrderConstants) -> Iterator[int]:
+    """Yield the values of the varied input where the fee can change, in order."""
+    if vary == "cart_value":
+        yield from range(0, rules.MIN_CART_VALUE_NO_SURCHARGE + 1)
+        yield rules.FREE_DELIVERY_CART_VALUE
+    elif vary == "delivery_distance":
+        yield 0
+        distance: int = rules.STARTING_DISTANCE + 1
+        while rules.DISTANCE_HALF_KM_FEE > 0:
+            yield distance
+            if fee_at(distance) >= rules.MAX_DELIVERY_FEE:
+                return
+            distance += 500
+        yield distance
+    else:
+        yield 1
+        last_rule: int = (
+            max(rules.MAX_ITEMS_NO_SURCHARGE, rules.MAX_ITEMS_NO_BULK_FEE) + 1
+        )
+        items: int = rules.MAX_ITEMS_NO_SURCHARGE + 1
+        while True:
+            yield items
+            if items >= last_rule and (
+                rules.ADDITIONAL_FEE_PER_ITEM <= 0
+                or fee_at(items) >= rules.MAX_DELIVERY_FEE
+            ):
+                return
+            items += 1
+
+
+@lru_cache(maxsize=4096)
+def fee_curve(
+    vary: CurveInput,
+    cart_value: int,
+    distance: int,
+    items: int,
+    rush_hour: bool,
+    rules: OrderConstants = DEFAULT_RULES,
+    calendar_multiplier: float | None = None,
+    cart: CartSummary | None = None,
+    surge: float = 1.0,
+) -> tuple[FeeSegment, ...]:
+    """Return the fee as maximal constant segments of the varied input.
+
+    Args:
+        vary (CurveInput): The input the curve runs over, its own value in the
+            arguments is ignored.
+        cart_value (int), distance (int), items (int): The fixed order values.
+        rush_hour (bool): Whether the order falls in rush hour.
+        rules (OrderConstants): The rule set to price with.
+        calendar_multiplier (float | None): Multiplier of the calendar entry the
+            order falls in, replacing the rush hour multiplier.
+        cart (CartSummary | None): The totals of the order's item list, if any.
+        surge (float): The region's demand-driven multiplier.
+
+    Returns:
+        tuple[FeeSegment, ...]: Segments covering the whole input range, the last one open ended.
+
+    Curves are cached, so the many orders sharing their fixed values reuse one curve.
+    """
+
+    def fee_at(value: int) -> int:
+        values: dict[str, int] = {
+            "cart_value": cart_value,
+            "delivery_distance": distance,
+            "number_of_items": items,
+            vary: value,
+        }
+        return order_fee(
+            values["cart_value"],
+            values["delivery_distance"],
+            values["number_of_items"],
+            rush_hour,
+            rules,
+            surge,
+            calendar_multiplier,
+            cart,
+        )
+
+    if vary != "cart_value" and cart_value >= rules.FREE_DELIVERY_CART_VALUE:
+        # Free at every distance and item count; _breakpoints would never reach the cap.
+        first: int = 0 if vary == "delivery_distance" else 1
+        return (FeeSegment(start=first, end=None, delivery_fee=0),)
+
+    segments: list[FeeSegment] = []
+    for start in _breakpoints(vary, fee_at, rules):
+        fee: int = fee_at(start)
+        if segments and segments[-1].delivery_fee == fee:
+            continue
+        if segments:
+            segments[-1].end = start - 1
+        segments.append(FeeSegment(start=start, end=None, delivery_fee=fee))
+    return tuple(segments)
+
+
+def fee_insights(
+    order_data: Order,
+    vary: list[CurveInput],
+    rules: OrderConstants = DEFAULT_RULES,
+    calendar_multiplier: float | None = None,
+    surge: float = 1.0,
+    surge_replaces_rush_hour: bool = False,
+) -> FeeInsights:
+    """Answer the inverse questions about an order's fee.
+
+    Args:
+        order_data (Order): The validated order.
+        vary (list[CurveInput]): The inputs to return fee curves for.
+        rules (OrderConstants): The rule set to price with.
+        calendar_multiplier (float | None): Multiplier of the calendar entry the
+            order falls in, replacing the rush hour multiplier.
+        surge (float): The region's demand-driven multiplier.
+        surge_replaces_rush_hour (bool): Apply only the surge, ignoring the rush hour window.
+
+    Returns:
+        FeeInsights: The current fee, the thresholds of the next cheaper or more
+        expensive fee and the requested curves.
+    """
+    cart_value: int = order_data.cart_value
+    distance: int = order_data.delivery_distance
+    items: int = order_data.number_of_items
+    rush_hour: bool = (
+        not surge_replaces_rush_hour
+        and calendar_multiplier is None
+        and is_rush_hour(order_data.time, rules)
+    )
+    step: int = next_distance_step(distance, rules)
+    bulk_fee_from: int = rules.MAX_ITEMS_NO_BULK_FEE + 1
+
+    return FeeInsights(
+        delivery_fee=order_fee(
+            cart_value,
+            distance,
+            items,
+            rush_hour,
+            rules,
+            surge,
+            calendar_multiplier,
+            order_data.cart,
+        ),
+        add_for_free_delivery=max(0, rules.FREE_DELIVERY_CART_VALUE - cart_value),
+        add_for_no_cart_surcharge=max(
+            0, rules.MIN_CART_VALUE_NO_SURCHARGE - cart_value
+        ),
+        items_with_bulk_fee=bulk_fee_from,
+        items_until_bulk_fee=max(0, rules.MAX_ITEMS_NO_BULK_FEE - items),
+        next_distance_step=step,
+        fee_at_next_distance_step=order_fee(
+            cart_value,
+            step,
+            items,
+            rush_hour,
+            rules,
+            surge,
+            calendar_multiplier,
+            order_data.cart,
+        ),
+        curves={
+            name: curve(name, order_data, rush_hour, rules, calendar_multiplier, surge)
+            for name in vary
+        },
+    )
+
+
+def curve(
+    vary: CurveInput,
+    order_data: Order,
+    rush_hour: bool,
+    rules: OrderConstants,
+    calendar_multiplier: float | None = None,
+    surge: float = 1.0,
+) -> list[FeeSegment]:
+    """Return the cached fee curve of an order, with the varied value zeroed so
+    orders differing only in that value share the cache entry.
+    """
+    values: dict[str, int] = {
+        "cart_value": order_data.cart_value,
+        "delivery_distance": order_data.delivery_distance,
+        "number_of_items": order_data.number_of_items,
+        vary: 0,
+    }
+    return list(
+        fee_curve(
+            vary,
+            values["cart_value"],
+            values["delivery_distance"],
+            values["number_of_items"],
+            rush_hour,
+            rules,
+            calendar_multiplier,
+            order_data.cart,
+            surge,
+        )
+    )
@@ -1,17 +1,360 @@
-from fastapi import FastAPI
-from app.models import Order, DeliveryFeeResponse
-from app.delivery_fee import calculate_delivery_fee
+import hmac
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from fastapi import (
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    status,
+)
+from fastapi.responses import PlainTextResponse
+from app.models import (
+    Order,
+    DeliveryFeeResponse,
+    FeeInsights,
+    Quote,
+    RankingRequest,
+    RankingResponse,
+)
+from app.delivery_fee import DEFAULT_RULES, calculate_delivery_fee, parse_order_time
+from app.constants import (
+    OrderConstants,
+    ErrorMessages,
+    HeaderNames,
+    ProfilerConstants,
+)
+from app.admission import AdmissionController, ArrivalTimeMiddleware
+from app.audit import AuditLog
+from app.capture import CaptureMiddleware, TrafficCapture
+from app.profiler import Profiler
+from app.experiments import Experiment, load_experiment
+from app.insights import CurveInput, fee_insights
+from app.pricing_calendar import PricingCalendar, load_calendar
+from app.pricing_profiles import PricingProfiles, load_profiles
+from app.ranking import rank_venues
+from app.quote_cache import QuoteCache, quote_key
+from app.rate_limit import RateLimiter, RateLimitMiddleware, client_key
+from app.reloader import ReloadingFile
+from app.shadow import ShadowPricer
+from app.shared_cache import SharedQuoteCache
+from app.surge import SurgePricing
+from app.settings import settings
+from app.stream import serve_quote_stream
+from app.tracing import TracingMiddleware
 
 
-app = FastAPI(title="Delivery Fee API")
+"""Audit sink for quoted fees, None unless AUDIT_LOG_DIR is set."""
+audit_log: AuditLog | None = AuditLog.from_settings(settings)
+"""Shadow evaluation of candidate rule sets, None unless SHADOW_RULES is set."""
+shadow_pricer: ShadowPricer | None = ShadowPricer.from_settings(settings)
+"""Pricing experiment, reloaded when its file changes. None unless EXPERIMENTS is set."""
+experiment: ReloadingFile[Experiment] | None = (
+    ReloadingFile(
+        settings.experiments_path,
+        load_experiment,
+        settings.experiments_reload_interval,
+    )
+    if settings.experiments_path is not None
+    else None
+)
+"""Holiday and event pricing calendar, reloaded when its file changes. None unless PRICING_CALENDAR is set."""
+pricing_calendar: ReloadingFile[PricingCalendar] | None = (
+    ReloadingFile(
+        settings.pricing_calendar_path,
+        load_calendar,
+        settings.pricing_calendar_reload_interval,
+    )
+    if settings.pricing_calendar_path is not None
+    else None
+)
+"""Rule sets of markets with their own currency by region, None unless PRICING_PROFILES is set."""
+pricing_profiles: PricingProfiles | None = (
+    load_profiles(settings.pricing_profiles_path)
+    if settings.pricing_profiles_path is not None
+    else None
+)
+"""Recently computed fees, the fallback when the service is saturated."""
+quote_cache: QuoteCache | None = (
+    QuoteCache(settings.quote_cache_size) if settings.quote_cache_size > 0 else None
+)
+"""Quote cache shared by all replicas behind quote_cache, None unless SHARED_CACHE_URL is set."""
+shared_cache: SharedQuoteCache | None = SharedQuoteCache.from_settings(settings)
+"""Concurrency limit in front of the fee calculation, None unless ADMISSION_MAX_CONCURRENCY is set."""
+admission: AdmissionController | None = AdmissionController.from_settings(settings)
+"""Per-client token buckets, None unless RATE_LIMIT_PER_SECOND is set."""
+rate_limiter: RateLimiter | None = RateLimiter.from_settings(settings)
+"""Sampled /delivery_fee traffic for replay tests, None unless CAPTURE_PATH is set."""
+traffic_capture: TrafficCapture | None = TrafficCapture.from_settings(settings)
+"""Sampling profiler behind /admin/profile."""
+profiler: Profiler = Profiler()
+"""Demand-driven surge multipliers, None unless SURGE_CURVE is set."""
+surge_pricing: SurgePricing | None = SurgePricing.from_settings(settings)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background workers on startup and drain them on shutdown."""
+    if audit_log is not None:
+        audit_log.start()
+    if shadow_pricer is not None:
+        shadow_pricer.start()
+    if surge_pricing is not None:
+        surge_pricing.start()
+    if shared_cache is not None:
+        shared_cache.start()
+    if traffic_capture is not None:
+        traffic_capture.start()
+    yield
+    if traffic_capture is not None:
+        traffic_capture.stop()
+    if shared_cache is not None:
+        shared_cache.stop()
+    if surge_pricing is not None:
+        surge_pricing.stop()
+    if shadow_pricer is not None:
+        shadow_pricer.stop()
+    if audit_log is not None:
+        audit_log.stop()
+
+
+app = FastAPI(title="Delivery Fee API", lifespan=lifespan)
+app.add_middleware(ArrivalTimeMiddleware)
+app.add_middleware(CaptureMiddleware, capture=lambda: traffic_capture)
+if settings.tracing:
+    app.add_middleware(TracingMiddleware)
+app.add_middleware(RateLimitMiddleware, limiter=lambda: rate_limiter)
+
+
+def market_rules(region: str | None) -> OrderConstants:
+    """Return the rules of the pricing profile of a region, or the production rules."""
+    if pricing_profiles is not None:
+        profile = pricing_profiles.for_region(region)
+        if profile is not None:
+            return profile.rules
+    return DEFAULT_RULES
+
+
+def pricing_rules(
+    order_data: Order, reload: bool = True
+) -> tuple[OrderConstants, str | None]:
+    """Return the rule set an order is priced with and its experiment arm, if any.
+
+    Orders from a region with a pricing profile are priced with its rules.
+    Other orders with a customer_id are priced with the rules of their
+    experiment arm when an experiment is running, all remaining orders with
+    the production rules. With reload False, the loaded experiment is used
+    without checking its file for changes.
+    """
+    rules: OrderConstants = market_rules(order_data.region)
+    if rules is not DEFAULT_RULES:
+        return rules, None
+    if experiment is not None and order_data.customer_id is not None:
+        running: Experiment = experiment.get() if reload else experiment.value
+        arm = running.assign(order_data.customer_id)
+        return arm.rules, arm.name
+    return DEFAULT_RULES, None
+
+
+def current_surge(order_data: Order) -> float:
+    """Count the quote towards its region's demand and return the region's surge
+    multiplier, 1.0 when surge pricing is disabled.
+    """
+    if surge_pricing is None:
+        return 1.0
+    surge_pricing.record(order_data.region)
+    return surge_pricing.multiplier(order_data.region)
+
+
+def calendar_multiplier(
+    time: str, region: str | None = None, reload: bool = True
+) -> float | None:
+    """Return the multiplier of the holiday or event an order time falls in.
+
+    None outside every calendar entry, without a calendar, and when surge
+    pricing replaces the rush hour, since calendar entries are rush windows.
+    With reload False, the loaded calendar is used without checking its file
+    for changes.
+    """
+    if pricing_calendar is None or (
+        surge_pricing is not None and surge_pricing.replaces_rush_hour
+    ):
+        return None
+    calendar: PricingCalendar = (
+        pricing_calendar.get() if reload else pricing_calendar.value
+    )
+    return calendar.multiplier(parse_order_time(time), region)
+
+
+def currency(rules: OrderConstants) -> str | None:
+    """Return the currency of a rule set, None for the production currency."""
+    return rules.CURRENCY if rules.CURRENCY != DEFAULT_RULES.CURRENCY else None
+
+
+def record_quote(
+    order_data: Order,
+    fee: int,
+    rules: OrderConstants,
+    surge: float,
+    calendar: float | None = None,
+) -> None:
+    """Record a quoted fee in the audit log and offer it to the shadow pricer.
+
+    Only fees priced with the production rules go to the shadow pricer, which
+    compares the candidate rule sets against production.
+    """
+    if audit_log is not None:
+        audit_log.record(order_data, fee, rules.RULES_VERSION, surge, calendar)
+    if shadow_pricer is not None and rules is DEFAULT_RULES:
+        shadow_pricer.submit(order_data, fee, surge, calendar)
+
+
+def cached_fee(key: tuple, shared: bool = True) -> int | None:
+    """Look a fee up in the in-process cache, then in the shared cache unless
+    shared is False.
+
+    Fees found in the shared cache are copied into the in-process one.
+    """
+    if quote_cache is not None:
+        fee: int | None = quote_cache.get(key)
+        if fee is not None:
+            return fee
+    if shared_cache is None or not shared:
+        return None
+    fee = shared_cache.get(key)
+    if fee is not None and quote_cache is not None:
+        quote_cache.put(key, fee)
+    return fee
+
+
+def cache_fee(key: tuple, fee: int) -> None:
+    """Store a computed fee in both cache tiers."""
+    if quote_cache is not None:
+        quote_cache.put(key, fee)
+    if shared_cache is not None:
+        shared_cache.put(key, fee)
+
+
+def quote_order(order_data: Order) -> Quote:
+    """Price a validated order through the quote caches and record the quote.
+
+    Shared by the POST endpoint and the streaming channel so every quoted fee
+    goes through the same steps.
+    """
+    rules, arm_name = pricing_rules(order_data)
+    surge: float = current_surge(order_data)
+    calendar: float | None = calendar_multiplier(order_data.time, order_data.region)
+    key: tuple = quote_key(order_data, rules, surge, calendar)
+    fee: int | None = cached_fee(key)
+    if fee is None:
+        fee = calculate_delivery_fee(
+            order_data,
+            rules,
+            surge,
+            surge_pricing is not None and surge_pricing.replaces_rush_hour,
+            calendar,
+        )
+        cache_fee(key, fee)
+    record_quote(order_data, fee, rules, surge, calendar)
+    return Quote(fee, arm_name, currency(rules))
+
+
+def cached_quote(order_data: Order) -> Quote | None:
+    """Return the quote of an identical, recently priced order from the
+    in-process cache without computing the fee, or None if there is none.
+
+    Runs on the event loop while the service is saturated, so it never waits
+    on the shared cache and never reloads the experiment or calendar files:
+    parsing one would block every connection. It uses the loaded versions,
+    which the next quote_order brings up to date.
+    """
+    if quote_cache is None:
+        return None
+    rules, arm_name = pricing_rules(order_data, reload=False)
+    surge: float = current_surge(order_data)
+    calendar: float | None = calendar_multiplier(
+        order_data.time, order_data.region, reload=False
+    )
+    fee: int | None = cached_fee(
+        quote_key(order_data, rules, surge, calendar), shared=False
+    )
+    if fee is None:
+        return None
+    record_quote(order_data, fee, rules, surge, calendar)
+    return Quote(fee, arm_name, currency(rules))
+
+
+async def body_order(request: Request) -> Order | None:
+    """Validate the request body as an order, or return None if it is not one."""
+    try:
+        return Order.model_validate(await request.json())
+    except (ValueError, HTTPException):
+        return None
+
+
+async def admission_slot(
+    request: Request, response: Response
+) -> AsyncIterator[Quote | None]:
+    """Hold an admission slot while the request is priced.
+
+    Runs on the event loop before the endpoint is handed to the threadpool,
+    with the queue timeout counted from the request's arrival. It does not
+    declare the order as a parameter, which would validate the body a second
+    time and report every error twice; only a saturated request in degraded
+    mode validates it here.
+
+    Yields:
+        Quote | None: None once a slot is held, or the cached quote of a
+        saturated request in degraded mode.
+
+    Raises:
+        HTTPException: 503 with a Retry-After header if no slot freed up within
+            the queue timeout and the order could not be served from the cache.
+    """
+    if admission is None:
+        yield None
+        return
+
+    if await admission.acquire(request.state.arrived):
+        try:
+            yield None
+        finally:
+            admission.release()
+        return
+
+    order_data: Order | None = await body_order(request) if admission.degraded else None
+    quote: Quote | None = cached_quote(order_data) if order_data is not None else None
+    if quote is None:
+        admission.record_rejected()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=ErrorMessages.SERVICE_SATURATED,
+            headers={"Retry-After": str(admission.retry_after)},
+        )
+    admission.record_degraded()
+    response.headers[HeaderNames.DEGRADED] = "cache"
+    yield quote
 
 
 @app.post("/delivery_fee")
-def fee_calculator(order_data: Order) -> DeliveryFeeResponse:
+def fee_calculator(
+    order_data: Order,
+    response: Response,
+    degraded_quote: Quote | None = Depends(admission_slot),
+) -> DeliveryFeeResponse:
     """Calculate the delivery fee based on the provided order data.
 
     Args:
         order_data (Order): The order details including cart value, delivery distance, number of items, and order time.
+        response (Response): Used to name the experiment arm in the X-Experiment-Arm header.
+        degraded_quote (Quote | None): The cached quote admission control served a saturated request with.
+
+    Raises:
+        HTTPException: 503 with a Retry-After header when the service is saturated.
 
     Returns:
         DeliveryFeeResponse: An object containing the calculated delivery fee in cents.
@@ -29,5 +372,194 @@ def fee_calculator(order_data: Order) -> DeliveryFeeResponse:
             "time": "2024-01-31T17:00:00Z"
         }
     """
-    fee: int = calculate_delivery_fee(order_data)
-    return DeliveryFeeResponse(delivery_fee=fee)
+    quote: Quote = (
+        degraded_quote if degraded_quote is not None else quote_order(order_data)
+    )
+    if quote.experiment_arm is not None:
+        response.headers[HeaderNames.EXPERIMENT_ARM] = quote.experiment_arm
+    if quote.currency is not None:
+        response.headers[HeaderNames.CURRENCY] = quote.currency
+    return DeliveryFeeResponse(delivery_fee=quote.delivery_fee)
+
+
+@app.post("/delivery_fee/rank")
+def cheapest_venues(ranking: RankingRequest) -> RankingResponse:
+    """Rank candidate venues by the delivery fee of one customer's order.
+
+    Args:
+        ranking (RankingRequest): The customer context and up to 5000 candidate venues.
+
+    Returns:
+        RankingResponse: The limit cheapest venues with their fees, cheapest first.
+
+    The venues are priced with the production rules, including the rush hour
+    or pricing calendar multiplier. Venues with equal fees keep the order they were sent in.
+
+    Example:
+        {
+            "cart_value": 975,
+            "number_of_items": 3,
+            "time": "2024-01-31T17:00:00Z",
+            "venues": [{"id": "a", "delivery_distance": 3520}, {"id": "b", "delivery_distance": 800}],
+            "limit": 1
+        }
+    """
+    return RankingResponse(
+        venues=rank_venues(ranking, calendar_multiplier(ranking.time))
+    )
+
+
+@app.post("/delivery_fee/insights")
+def fee_insights_calculator(
+    order_data: Order,
+    response: Response,
+    vary: list[CurveInput] = Query(default=[]),
+) -> FeeInsights:
+    """Explain how the fee of an order would change with its inputs.
+
+    Args:
+        order_data (Order): The order, in the same format as for /delivery_fee.
+        response (Response): Used to name the experiment arm and currency in headers.
+        vary (list[CurveInput]): Inputs to return piecewise fee curves for, e.g.
+            ?vary=cart_value&vary=number_of_items
+
+    Returns:
+        FeeInsights: The cart value to add for free delivery or to avoid the small
+        order surcharge, the item count of the bulk fee, the next distance step and
+        the requested curves. Computed with the rules, surge and calendar
+        multiplier /delivery_fee would price the order with, without counting
+        the order towards the region's demand.
+    """
+    rules, arm_name = pricing_rules(order_data)
+    if arm_name is not None:
+        response.headers[HeaderNames.EXPERIMENT_ARM] = arm_name
+    if currency(rules) is not None:
+        response.headers[HeaderNames.CURRENCY] = rules.CURRENCY
+    return fee_insights(
+        order_data,
+        vary,
+        rules,
+        calendar_multiplier(order_data.time, order_data.region),
+        surge_pricing.multiplier(order_data.region) if surge_pricing else 1.0,
+        surge_pricing is not None and surge_pricing.replaces_rush_hour,
+    )
+
+
+@app.websocket("/delivery_fee/stream")
+async def fee_stream(websocket: WebSocket) -> None:
+    """Persistent quote channel for clients that price orders back to back.
+
+    Messages are JSON objects of the form {"id": ..., "order": {...}} where the
+    order follows the /delivery_fee request body. Replies echo the id and are
+    sent as soon as each fee is ready, so they may arrive out of order. With
+    rate limiting, every message counts as one request of the connection's
+    X-API-Key.
+    See app/stream.py for the message format and backpressure behaviour.
+    """
+    await serve_quote_stream(
+        websocket,
+        quote_order,
+        admission,
+        rate_limiter,
+        client_key(websocket.scope),
+    )
+
+
+@app.get("/stats/shadow")
+def shadow_stats() -> dict:
+    """Aggregated fee differences between each candidate rule set and production."""
+    if shadow_pricer is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorMessages.SHADOW_PRICING_DISABLED,
+        )
+    return shadow_pricer.snapshot()
+
+
+@app.get("/stats/admission")
+def admission_stats() -> dict:
+    """Admission control counters and statistics of both quote cache tiers."""
+    return {
+        "admission": admission.snapshot() if admission is not None else None,
+        "quote_cache": quote_cache.snapshot() if quote_cache is not None else None,
+        "shared_cache": shared_cache.snapshot() if shared_cache is not None else None,
+    }
+
+
+@app.get("/stats/surge")
+def surge_stats() -> dict:
+    """Current surge multipliers per region and this worker's demand counts."""
+    if surge_pricing is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorMessages.SURGE_PRICING_DISABLED,
+        )
+    return surge_pricing.snapshot()
+
+
+def require_admin(
+    admin_token: str | None = Header(default=None, alias=HeaderNames.ADMIN_TOKEN),
+) -> None:
+    """Allow the request only with the configured admin token.
+
+    Raises:
+        HTTPException: 404 if no ADMIN_TOKEN is configured, 403 if the
+            X-Admin-Token header does not match it.
+    """
+    if settings.admin_token is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorMessages.ADMIN_DISABLED,
+        )
+    if admin_token is None or not hmac.compare_digest(
+        admin_token.encode(), settings.admin_token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=ErrorMessages.INVALID_ADMIN_TOKEN,
+        )
+
+
+@app.get(
+    "/admin/profile",
+    dependencies=[Depends(require_admin)],
+    response_class=PlainTextResponse,
+)
+def profile(
+    seconds: float = Query(default=5.0, gt=0, le=ProfilerConstants.MAX_SECONDS),
+    interval_ms: float = Query(default=10.0, ge=ProfilerConstants.MIN_INTERVAL_MS),
+) -> str:
+    """Sample every thread of this worker and return the collapsed stacks.
+
+    Args:
+        seconds (float): How long to sample, at most 60 seconds.
+        interval_ms (float): Milliseconds between two samples.
+
+    Raises:
+        HTTPException: 409 if a profile is already being taken.
+
+    Returns:
+        str: One "root;...;leaf count" line per distinct stack, ready for
+        flamegraph.pl or speedscope.
+    """
+    stacks: str | None = profiler.profile(seconds, interval_ms / 1000)
+    if stacks is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ErrorMessages.PROFILER_BUSY,
+        )
+    return stacks
+
+
+@app.get("/stats/clients", dependencies=[Depends(require_admin)])
+def client_stats() -> dict:
+    """Request and rejection counts per API key, for capacity planning.
+
+    Behind the admin token since the keys identify the clients.
+    """
+    if rate_limiter is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorMessages.RATE_LIMITING_DISABLED,
+        )
+    return rate_limiter.snapshot()
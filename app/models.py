@@ -1,7 +1,18 @@
+from typing import Annotated, Any, NamedTuple
 from fastapi import HTTPException, status
-from pydantic import BaseModel, field_validator, Field
+from pydantic import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    ValidationError,
+    WithJsonSchema,
+    field_validator,
+    model_validator,
+)
+from pydantic_core import InitErrorDetails
 from dateutil import parser
-from app.constants import ErrorMessages
+from app.constants import CartConstants, ErrorMessages, RankingConstants
+from app.tracing import traced
 
 
 """Error messages for raising HTTPException when receiving incorrect time formats."""
@@ -9,6 +20,101 @@ invalid_utc_err: str = ErrorMessages.INVALID_UTC_OFFSET
 invalid_time_err: str = ErrorMessages.INVALID_TIME_FORMAT
 
 
+class CartSummary(NamedTuple):
+    """Totals of an order's item list, everything the fee rules need from it.
+
+    Attributes:
+        quantity (int): The number of items, the sum of the line quantities.
+        weight (int): The total weight in grams.
+        large (int): The number of items in the large volume category.
+        extra_large (int): The number of items in the extra large volume category.
+    """
+
+    quantity: int
+    weight: int
+    large: int
+    extra_large: int
+
+
+"""Index of each volume category in the per-category counts."""
+_VOLUME_INDEX: dict[str, int] = {
+    category: index for index, category in enumerate(CartConstants.VOLUME_CATEGORIES)
+}
+
+
+"""JSON schema of the item list, documenting the lines summarize_cart accepts."""
+ITEM_LIST_SCHEMA: dict[str, Any] = {
+    "type": "array",
+    "minItems": 1,
+    "maxItems": CartConstants.MAX_LINES,
+    "items": {
+        "type": "object",
+        "properties": {
+            "quantity": {"type": "integer", "minimum": 1},
+            "weight": {"type": "integer", "minimum": 0, "default": 0},
+            "volume": {
+                "enum": list(CartConstants.VOLUME_CATEGORIES),
+                "default": CartConstants.VOLUME_CATEGORIES[0],
+            },
+        },
+        "required": ["quantity"],
+    },
+}
+
+
+def summarize_cart(items: Any) -> CartSummary:
+    """Validate an item list and sum it up in a single pass.
+
+    Args:
+        items (Any): The item list as parsed from JSON, a list of objects with an
+            integer quantity (at least 1), an optional integer weight in grams per
+            item and an optional volume category, "small" by default.
+
+    Returns:
+        CartSummary: The totals of the list.
+
+    Raises:
+        ValueError: If the list is empty, too long or a line is invalid.
+
+    The lines are read as plain dicts, no model is built per line, so the cost
+    grows linearly with the list and allocates nothing per line.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError(ErrorMessages.EMPTY_ITEM_LIST)
+    if len(items) > CartConstants.MAX_LINES:
+        raise ValueError(ErrorMessages.TOO_MANY_ITEM_LINES)
+
+    quantity: int = 0
+    weight: int = 0
+    volumes: list[int] = [0] * len(_VOLUME_INDEX)
+    for line_number, line in enumerate(items):
+        if type(line) is not dict:
+            raise ValueError(f"{ErrorMessages.INVALID_ITEM_LINE}{line_number}")
+        line_quantity = line.get("quantity")
+        line_weight = line.get("weight", 0)
+        line_volume = line.get("volume", CartConstants.VOLUME_CATEGORIES[0])
+        volume: int | None = (
+            _VOLUME_INDEX.get(line_volume) if type(line_volume) is str else None
+        )
+        if (
+            type(line_quantity) is not int
+            or line_quantity < 1
+            or type(line_weight) is not int
+            or line_weight < 0
+            or volume is None
+        ):
+            raise ValueError(f"{ErrorMessages.INVALID_ITEM_LINE}{line_number}")
+        quantity += line_quantity
+        weight += line_quantity * line_weight
+        volumes[volume] += line_quantity
+    return CartSummary(
+        quantity,
+        weight,
+        volumes[_VOLUME_INDEX["large"]],
+        volumes[_VOLUME_INDEX["extra_large"]],
+    )
+
+
 class Order(BaseModel):
     """Class (model) representing an order, the request body must follow this format.
     By default, extra fields are not forbidden, but disregarded. Pydantic handles the
@@ -17,17 +123,64 @@ class Order(BaseModel):
     Attributes:
         cart_value (int): The value of the shopping cart in cents.
         delivery_distance (int): The distance between the store and customer's location in meters.
-        number_of_items (int): The number of items in the customer's shopping cart.
+        number_of_items (int): The number of items in the customer's shopping cart,
+            derived from the item list if it is left out.
         time (str): Order time in ISO format.
+        customer_id (str | None): Optional customer or session id, used to assign pricing experiment arms.
+        region (str | None): Optional region of the venue, used for demand-driven surge pricing.
+        items (list | None): Optional item list of {"quantity": int, "weight": int,
+            "volume": str} lines, used for the weight and volume surcharges.
+        cart (CartSummary | None): The totals of the item list, see summarize_cart.
     """
 
     cart_value: int = Field(strict=True, ge=0)
     delivery_distance: int = Field(strict=True, ge=0)
-    number_of_items: int = Field(strict=True, ge=1)
+    number_of_items: int | None = Field(default=None, strict=True, ge=1)
     time: str
+    customer_id: str | None = Field(default=None, strict=True, max_length=256)
+    region: str | None = Field(default=None, strict=True, max_length=64)
+    items: Annotated[list[Any], WithJsonSchema(ITEM_LIST_SCHEMA)] | None = None
+    _cart: CartSummary | None = PrivateAttr(default=None)
+
+    @property
+    def cart(self) -> CartSummary | None:
+        """The totals of the item list, None without one."""
+        # self._cart would first fail the regular attribute lookup, raising and
+        # catching an AttributeError on every call, several microseconds on the hot path.
+        return self.__pydantic_private__["_cart"]
+
+    @model_validator(mode="after")
+    def check_number_of_items(self):
+        """Sum the item list up, then derive the number of items from it or
+        require it without one.
+        """
+        if self.items is None:
+            if self.number_of_items is None:
+                raise ValueError(ErrorMessages.MISSING_NUMBER_OF_ITEMS)
+            return self
+        try:
+            self._cart = summarize_cart(self.items)
+        except ValueError as error:
+            raise ValidationError.from_exception_data(
+                type(self).__name__,
+                [
+                    InitErrorDetails(
+                        type="value_error",
+                        loc=("items",),
+                        input=self.items,
+                        ctx={"error": error},
+                    )
+                ],
+            )
+        if self.number_of_items is None:
+            self.number_of_items = self._cart.quantity
+        elif self.number_of_items != self._cart.quantity:
+            raise ValueError(ErrorMessages.ITEM_COUNT_MISMATCH)
+        return self
 
     @field_validator("time")
     @classmethod
+    @traced("validate_iso_time_string")
     def validate_iso_time_string(cls, time):
         """Validate that the time string fits the ISO 8061 standard."""
         try:
@@ -48,3 +201,124 @@ class DeliveryFeeResponse(BaseModel):
     """Model representing the response body."""
 
     delivery_fee: int = Field(strict=True, ge=0)
+
+
+class Quote(NamedTuple):
+    """A priced order: the fee in minor units, the experiment arm it was priced in,
+    if any, and its currency if it is not the production currency.
+    """
+
+    delivery_fee: int
+    experiment_arm: str | None = None
+    currency: str | None = None
+
+
+class Venue(BaseModel):
+    """A candidate venue of a ranking request, located either by its delivery
+    distance or by its coordinates.
+
+    Attributes:
+        id (str): Identifier of the venue, returned as is.
+        delivery_distance (int | None): Distance to the customer in meters.
+        latitude (float | None): Latitude of the venue, used with the customer's location.
+        longitude (float | None): Longitude of the venue, used with the customer's location.
+    """
+
+    id: str = Field(strict=True)
+    delivery_distance: int | None = Field(default=None, strict=True, ge=0)
+    latitude: float | None = Field(default=None, ge=-90, le=90)
+    longitude: float | None = Field(default=None, ge=-180, le=180)
+
+    @model_validator(mode="after")
+    def check_location(self):
+        """Require either a delivery distance or both coordinates."""
+        has_coordinates: bool = self.latitude is not None and self.longitude is not None
+        if self.delivery_distance is None and not has_coordinates:
+            raise ValueError(ErrorMessages.VENUE_WITHOUT_LOCATION)
+        return self
+
+
+class RankingRequest(BaseModel):
+    """Model representing the request body of the cheapest venue ranking: one
+    customer context and the candidate venues.
+
+    Attributes:
+        cart_value (int): The value of the shopping cart in cents.
+        number_of_items (int): The number of items in the customer's shopping cart.
+        time (str): Order time in ISO format.
+        latitude (float | None): Latitude of the customer, needed for venues given by coordinates.
+        longitude (float | None): Longitude of the customer, needed for venues given by coordinates.
+        venues (list[Venue]): The candidate venues.
+        limit (int): Number of venues to return.
+    """
+
+    cart_value: int = Field(strict=True, ge=0)
+    number_of_items: int = Field(strict=True, ge=1)
+    time: str
+    latitude: float | None = Field(default=None, ge=-90, le=90)
+    longitude: float | None = Field(default=None, ge=-180, le=180)
+    venues: list[Venue] = Field(min_length=1, max_length=RankingConstants.MAX_VENUES)
+    limit: int = Field(default=10, strict=True, ge=1, le=RankingConstants.MAX_VENUES)
+
+    @field_validator("time")
+    @classmethod
+    def validate_iso_time_string(cls, time):
+        """Validate the time string the same way as the order time."""
+        return Order.validate_iso_time_string(time)
+
+    @model_validator(mode="after")
+    def check_customer_location(self):
+        """Require the customer's coordinates when a venue is given by coordinates."""
+        has_coordinates: bool = self.latitude is not None and self.longitude is not None
+        if not has_coordinates and any(
+            venue.delivery_distance is None for venue in self.venues
+        ):
+            raise ValueError(ErrorMessages.CUSTOMER_WITHOUT_LOCATION)
+        return self
+
+
+class RankedVenue(BaseModel):
+    """A venue of the ranking response with its delivery fee."""
+
+    id: str
+    delivery_distance: int
+    delivery_fee: int
+
+
+class RankingResponse(BaseModel):
+    """Model representing the response of the cheapest venue ranking, cheapest first."""
+
+    venues: list[RankedVenue]
+
+
+class FeeSegment(BaseModel):
+    """A range of one input, start and end inclusive, over which the fee is constant.
+    The last segment of a curve has no end."""
+
+    start: int
+    end: int | None
+    delivery_fee: int
+
+
+class FeeInsights(BaseModel):
+    """Model representing the response of the fee insights endpoint.
+
+    Attributes:
+        delivery_fee (int): The current fee in cents.
+        add_for_free_delivery (int): Cart value to add for free delivery, 0 if it is free already.
+        add_for_no_cart_surcharge (int): Cart value to add so no small order surcharge applies.
+        items_with_bulk_fee (int): The number of items from which the bulk fee applies.
+        items_until_bulk_fee (int): Items that can be added before the bulk fee applies, 0 if it does.
+        next_distance_step (int): The smallest distance with a higher distance surcharge.
+        fee_at_next_distance_step (int): The fee at that distance.
+        curves (dict[str, list[FeeSegment]]): The requested piecewise fee curves by input name.
+    """
+
+    delivery_fee: int
+    add_for_free_delivery: int
+    add_for_no_cart_surcharge: int
+    items_with_bulk_fee: int
+    items_until_bulk_fee: int
+    next_distance_step: int
+    fee_at_next_distance_step: int
+    curves: dict[str, list[FeeSegment]]
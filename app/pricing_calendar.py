@@ -0,0 +1,271 @@
+import bisect
+import heapq
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from dateutil import parser
+
+
+"""
+Holiday and special-event pricing calendar. Dated events and weekly recurring
+windows get their own multiplier, which replaces the rush hour multiplier of the
+rules while they last. Example file:
+
+    {
+        "events": [
+            {"name": "new-year", "start": "2024-12-31T18:00:00+02:00",
+             "end": "2025-01-01T04:00:00+02:00", "multiplier": 1.5},
+            {"name": "derby", "start": "2024-05-04T16:00:00Z",
+             "end": "2024-05-04T20:00:00Z", "multiplier": 1.3,
+             "regions": ["helsinki"], "priority": 1}
+        ],
+        "weekly": [
+            {"name": "saturday-lunch", "day": 5, "start_hour": 11,
+             "end_hour": 14, "multiplier": 1.1}
+        ]
+    }
+
+Entries without "regions" apply in every region. Weekly windows are in whole
+UTC hours like the rush hour, with day 0 for Monday.
+
+Everything is resolved when the file is loaded, so a lookup never compares
+overlapping entries: the events of each region are flattened into disjoint,
+sorted intervals searched with bisect, and the weekly windows are written into a
+168-slot hour-of-week table. Where entries overlap, a dated event beats a weekly
+window, then the higher priority wins, then the higher multiplier, then the
+entry listed first in the file.
+"""
+
+
+"""Hours in a week, the size of the weekly table."""
+HOURS_PER_WEEK: int = 7 * 24
+
+
+@dataclass(frozen=True)
+class CalendarEntry:
+    """A named calendar window and the multiplier applied while it lasts."""
+
+    name: str
+    multiplier: float
+    priority: int
+
+
+@dataclass(frozen=True)
+class _Event:
+    entry: CalendarEntry
+    start: float
+    end: float
+    regions: tuple[str, ...] | None
+    position: int
+
+
+@dataclass(frozen=True)
+class _Weekly:
+    entry: CalendarEntry
+    day: int
+    start_hour: int
+    end_hour: int
+    regions: tuple[str, ...] | None
+    position: int
+
+
+def _rank(entry: CalendarEntry, position: int) -> tuple:
+    """Sort key putting the entry that wins an overlap first."""
+    return (-entry.priority, -entry.multiplier, position)
+
+
+class IntervalIndex:
+    """Disjoint time intervals, each with the entry that won it.
+
+    Args:
+        events (list[_Event]): Possibly overlapping events, resolved by _rank.
+    """
+
+    def __init__(self, events: list[_Event]):
+        self.starts: list[float] = []
+        self.ends: list[float] = []
+        self.entries: list[CalendarEntry] = []
+
+        points: list[float] = sorted(
+            {event.start for event in events} | {event.end for event in events}
+        )
+        pending: list[_Event] = sorted(events, key=lambda event: event.start)
+        active: list[tuple[tuple, float, CalendarEntry]] = []
+        next_event: int = 0
+        for start, end in zip(points, points[1:]):
+            while next_event < len(pending) and pending[next_event].start <= start:
+                event: _Event = pending[next_event]
+                heapq.heappush(
+                    active,
+                    (_rank(event.entry, event.position), event.end, event.entry),
+                )
+                next_event += 1
+            while active and active[0][1] <= start:
+                heapq.heappop(active)
+            if not active:
+                continue
+            winner: CalendarEntry = active[0][2]
+            if self.ends and self.ends[-1] == start and self.entries[-1] is winner:
+                self.ends[-1] = end
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+                self.entries.append(winner)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def lookup(self, timestamp: float) -> CalendarEntry | None:
+        """Return the entry of the interval containing timestamp, if any."""
+        index: int = bisect.bisect_right(self.starts, timestamp) - 1
+        if index >= 0 and timestamp < self.ends[index]:
+            return self.entries[index]
+        return None
+
+
+def _weekly_table(windows: list[_Weekly]) -> list[CalendarEntry | None]:
+    """Write weekly windows into an hour-of-week table, winners first."""
+    table: list[CalendarEntry | None] = [None] * HOURS_PER_WEEK
+    for window in sorted(windows, key=lambda w: _rank(w.entry, w.position)):
+        first_hour: int = window.day * 24
+        for hour in range(first_hour + window.start_hour, first_hour + window.end_hour):
+            if table[hour] is None:
+                table[hour] = window.entry
+    return table
+
+
+class PricingCalendar:
+    """Compiled calendar answering which entry applies at a time in a region.
+
+    Args:
+        events (list[dict]): Dated events with a name, ISO 8601 start and end
+            including an offset, a multiplier and optional priority and regions.
+        weekly (list[dict]): Weekly windows with a name, day, start_hour,
+            end_hour, a multiplier and optional priority and regions.
+
+    Raises:
+        ValueError: If an entry is incomplete or invalid.
+    """
+
+    def __init__(self, events: list[dict[str, Any]], weekly: list[dict[str, Any]]):
+        parsed_events: list[_Event] = [
+            _parse_event(event, position) for position, event in enumerate(events)
+        ]
+        parsed_weekly: list[_Weekly] = [
+            _parse_weekly(window, position) for position, window in enumerate(weekly)
+        ]
+        regions: set[str] = {
+            region
+            for item in [*parsed_events, *parsed_weekly]
+            for region in item.regions or ()
+        }
+
+        def applies(item: _Event | _Weekly, region: str | None) -> bool:
+            return item.regions is None or region in item.regions
+
+        self._events: dict[str | None, IntervalIndex] = {}
+        self._weekly: dict[str | None, list[CalendarEntry | None]] = {}
+        for region in [None, *sorted(regions)]:
+            self._events[region] = IntervalIndex(
+                [event for event in parsed_events if applies(event, region)]
+            )
+            self._weekly[region] = _weekly_table(
+                [window for window in parsed_weekly if applies(window, region)]
+            )
+        self.event_count: int = len(parsed_events)
+        self.weekly_count: int = len(parsed_weekly)
+
+    def lookup(
+        self, order_time_utc: datetime | None, region: str | None = None
+    ) -> CalendarEntry | None:
+        """Return the entry in effect at an order time, or None outside every entry.
+
+        Regions without entries of their own get the entries of every region.
+        """
+        if order_time_utc is None:
+            return None
+        if region not in self._events:
+            region = None
+        entry: CalendarEntry | None = self._events[region].lookup(
+            order_time_utc.timestamp()
+        )
+        if entry is not None:
+            return entry
+        return self._weekly[region][order_time_utc.weekday() * 24 + order_time_utc.hour]
+
+    def multiplier(
+        self, order_time_utc: datetime | None, region: str | None = None
+    ) -> float | None:
+        """Return the multiplier replacing the rush hour at an order time, if any."""
+        entry: CalendarEntry | None = self.lookup(order_time_utc, region)
+        return entry.multiplier if entry is not None else None
+
+
+def _entry(config: dict[str, Any]) -> CalendarEntry:
+    name = config.get("name")
+    multiplier = config.get("multiplier")
+    priority = config.get("priority", 0)
+    if not isinstance(name, str):
+        raise ValueError("Every calendar entry needs a name")
+    if type(multiplier) not in (int, float) or multiplier <= 0:
+        raise ValueError(f"Calendar entry {name} needs a positive multiplier")
+    if type(priority) is not int:
+        raise ValueError(f"Calendar entry {name} needs an integer priority")
+    return CalendarEntry(name, float(multiplier), priority)
+
+
+def _regions(config: dict[str, Any], name: str) -> tuple[str, ...] | None:
+    regions = config.get("regions")
+    if regions is None:
+        return None
+    if not isinstance(regions, list) or not all(
+        isinstance(region, str) for region in regions
+    ):
+        raise ValueError(f"Regions of calendar entry {name} must be a list of strings")
+    return tuple(regions)
+
+
+def _timestamp(value: Any, name: str) -> float:
+    if not isinstance(value, str):
+        raise ValueError(f"Calendar entry {name} needs an ISO 8601 start and end")
+    moment: datetime = parser.isoparse(value)
+    if moment.tzinfo is None:
+        raise ValueError(f"Times of calendar entry {name} need a UTC offset")
+    return moment.timestamp()
+
+
+def _parse_event(config: dict[str, Any], position: int) -> _Event:
+    entry: CalendarEntry = _entry(config)
+    start: float = _timestamp(config.get("start"), entry.name)
+    end: float = _timestamp(config.get("end"), entry.name)
+    if start >= end:
+        raise ValueError(f"Calendar entry {entry.name} must end after it starts")
+    return _Event(entry, start, end, _regions(config, entry.name), position)
+
+
+def _parse_weekly(config: dict[str, Any], position: int) -> _Weekly:
+    entry: CalendarEntry = _entry(config)
+    day = config.get("day")
+    start_hour = config.get("start_hour")
+    end_hour = config.get("end_hour")
+    if type(day) is not int or not 0 <= day <= 6:
+        raise ValueError(f"Weekly entry {entry.name} needs a day from 0 to 6")
+    if (
+        type(start_hour) is not int
+        or type(end_hour) is not int
+        or not 0 <= start_hour < end_hour <= 24
+    ):
+        raise ValueError(
+            f"Weekly entry {entry.name} needs hours with 0 <= start_hour < end_hour <= 24"
+        )
+    return _Weekly(
+        entry, day, start_hour, end_hour, _regions(config, entry.name), position
+    )
+
+
+def load_calendar(path: str) -> PricingCalendar:
+    """Load and compile a pricing calendar from a JSON file."""
+    with open(path) as calendar_file:
+        config: dict[str, Any] = json.load(calendar_file)
+    return PricingCalendar(config.get("events", []), config.get("weekly", []))
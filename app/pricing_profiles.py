@@ -0,0 +1,83 @@
+import dataclasses
+import json
+from dataclasses import dataclass
+from typing import Any
+from app.constants import OrderConstants
+from app.rules import rules_fingerprint, rules_from_overrides
+
+
+"""
+Pricing profiles of markets with their own currency. A profile is a rule set
+given as overrides of the production rules, with every amount in the minor
+units of its currency, and the regions it prices. Example file:
+
+    {
+        "sweden": {
+            "regions": ["stockholm", "gothenburg"],
+            "rules": {
+                "CURRENCY": "SEK",
+                "MAX_DELIVERY_FEE": 15000,
+                "FREE_DELIVERY_CART_VALUE": 200000,
+                "MIN_CART_VALUE_NO_SURCHARGE": 10000,
+                "DISTANCE_STARTING_FEE": 2000,
+                "DISTANCE_HALF_KM_FEE": 1000,
+                "ADDITIONAL_FEE_PER_ITEM": 500,
+                "ITEMS_BULK_FEE": 1200,
+                "ROUNDING_MODE": "half_up",
+                "ROUNDING_STEP": 100
+            }
+        }
+    }
+
+Orders from other regions are priced with the production rules.
+"""
+
+
+@dataclass(frozen=True)
+class PricingProfile:
+    """A market's name and the rule set its orders are priced with."""
+
+    name: str
+    rules: OrderConstants
+
+
+class PricingProfiles:
+    """Compiled pricing profiles, looked up by region.
+
+    Args:
+        profiles (dict[str, dict]): Profiles by name, each with a list of
+            regions and rule overrides. The name and a fingerprint of the rules
+            are added to the profile's RULES_VERSION.
+
+    Raises:
+        ValueError: If a rule is invalid or a region belongs to two profiles.
+    """
+
+    def __init__(self, profiles: dict[str, dict[str, Any]]):
+        self.profiles: dict[str, PricingProfile] = {}
+        self._by_region: dict[str, PricingProfile] = {}
+        for name, config in profiles.items():
+            rules: OrderConstants = rules_from_overrides(config.get("rules", {}))
+            rules = dataclasses.replace(
+                rules,
+                RULES_VERSION=f"{rules.RULES_VERSION}+{name}:{rules_fingerprint(rules)}",
+            )
+            profile = PricingProfile(name, rules)
+            self.profiles[name] = profile
+            for region in config.get("regions", []):
+                if region in self._by_region:
+                    raise ValueError(f"Region {region} is in more than one profile")
+                self._by_region[region] = profile
+
+    def for_region(self, region: str | None) -> PricingProfile | None:
+        """Return the profile pricing a region, or None for the production rules."""
+        if region is None:
+            return None
+        return self._by_region.get(region)
+
+
+def load_profiles(path: str) -> PricingProfiles:
+    """Load and compile pricing profiles from a JSON file."""
+    with open(path) as profiles_file:
+        config: dict[str, dict[str, Any]] = json.load(profiles_file)
+    return PricingProfiles(config)
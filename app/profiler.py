@@ -0,0 +1,82 @@
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+
+"""
+On-demand sampling profiler. While a profile is taken, a thread snapshots the
+stack of every other thread of the worker with sys._current_frames() at a
+fixed interval and counts identical stacks. The result is in the collapsed
+format read by flamegraph.pl, speedscope and similar tools, one stack per line,
+root first, followed by the number of samples:
+
+    MainThread;uvicorn.server:serve;app.main:fee_calculator 42
+
+Nothing runs between profiles, so the profiler costs nothing until it is used.
+"""
+
+
+def _frame_name(frame: FrameType) -> str:
+    module: str = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def collapse_stack(thread_name: str, frame: FrameType | None) -> str:
+    """Return the collapsed stack of a frame, the thread name as its root."""
+    names: list[str] = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(thread_name)
+    names.reverse()
+    return ";".join(names)
+
+
+def sample_stacks(seconds: float, interval: float) -> Counter[str]:
+    """Sample the stacks of all threads but the calling one for the given time.
+
+    Args:
+        seconds (float): How long to sample.
+        interval (float): Seconds between two samples.
+
+    Returns:
+        Counter[str]: The number of samples of every collapsed stack.
+    """
+    own_id: int = threading.get_ident()
+    stacks: Counter[str] = Counter()
+    deadline: float = time.monotonic() + seconds
+    while True:
+        names: dict[int, str] = {
+            thread.ident: thread.name for thread in threading.enumerate()
+        }
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own_id:
+                stacks[collapse_stack(names.get(thread_id, str(thread_id)), frame)] += 1
+        if time.monotonic() + interval > deadline:
+            return stacks
+        time.sleep(interval)
+
+
+def format_collapsed(stacks: Counter[str]) -> str:
+    """Format counted stacks as collapsed stack lines, most frequent first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class Profiler:
+    """Takes one profile at a time, so concurrent requests cannot pile up samplers."""
+
+    def __init__(self):
+        self._busy = threading.Lock()
+
+    def profile(self, seconds: float, interval: float) -> str | None:
+        """Sample the worker and return collapsed stacks, or None if a profile
+        is already being taken.
+        """
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            return format_collapsed(sample_stacks(seconds, interval))
+        finally:
+            self._busy.release()
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable
+from app.models import Order
+from app.constants import OrderConstants
+from app.rules import rules_fingerprint
+
+
+def quote_key(
+    order_data: Order,
+    rules: OrderConstants,
+    surge: float = 1.0,
+    calendar_multiplier: float | None = None,
+) -> tuple:
+    """Cache key of an order priced with a rule set: the fingerprint of the rules,
+    the surge and calendar multipliers and every order field the fee depends on.
+    """
+    return (
+        rules_fingerprint(rules),
+        surge,
+        calendar_multiplier,
+        order_data.cart_value,
+        order_data.delivery_distance,
+        order_data.number_of_items,
+        order_data.time,
+        order_data.cart,
+    )
+
+
+class QuoteCache:
+    """Thread-safe LRU cache of computed delivery fees.
+
+    Args:
+        capacity (int): Number of fees kept before the least recently used one is evicted.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.hits: int = 0
+        self.misses: int = 0
+        self._fees: OrderedDict[Hashable, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> int | None:
+        """Return the cached fee for key, or None if it is not cached."""
+        with self._lock:
+            fee: int | None = self._fees.get(key)
+            if fee is None:
+                self.misses += 1
+                return None
+            self._fees.move_to_end(key)
+            self.hits += 1
+            return fee
+
+    def put(self, key: Hashable, fee: int) -> None:
+        """Cache a fee, evicting the least recently used one when full."""
+        with self._lock:
+            self._fees[key] = fee
+            self._fees.move_to_end(key)
+            if len(self._fees) > self.capacity:
+                self._fees.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        """Return the cache size and hit statistics."""
+        with self._lock:
+            return {"size": len(self._fees), "hits": self.hits, "misses": self.misses}
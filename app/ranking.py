@@ -0,0 +1,155 @@
+import heapq
+import math
+from typing import Sequence
+from app.constants import OrderConstants, RankingConstants
+from app.delivery_fee import (
+    DEFAULT_RULES,
+    cart_value_surcharge,
+    distance_surcharges,
+    fee_finalizer,
+    finalize_fee,
+    is_rush_hour,
+    items_surcharge,
+    rush_hour_multiplier,
+)
+from app.models import RankedVenue, RankingRequest
+
+
+def haversine_distance(
+    latitude_a: float, longitude_a: float, latitude_b: float, longitude_b: float
+) -> int:
+    """Return the great-circle distance between two coordinates in whole meters,
+    rounded up like a started half kilometre is.
+    """
+    phi_a, phi_b = math.radians(latitude_a), math.radians(latitude_b)
+    d_phi: float = phi_b - phi_a
+    d_lambda: float = math.radians(longitude_b - longitude_a)
+    a: float = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi_a) * math.cos(phi_b) * math.sin(d_lambda / 2) ** 2
+    )
+    return math.ceil(2 * RankingConstants.EARTH_RADIUS * math.asin(math.sqrt(a)))
+
+
+def capped_distance(
+    fixed_fee: int, multiplier: float, rules: OrderConstants = DEFAULT_RULES
+) -> float:
+    """Return the distance beyond which the fee is always the maximum delivery fee.
+
+    The fee only grows with the distance, so once the first distance step
+    reaches the cap, every farther venue costs exactly MAX_DELIVERY_FEE and
+    its surcharge does not need to be computed.
+    """
+    if rules.DISTANCE_HALF_KM_FEE <= 0:
+        return math.inf
+
+    half_kms: int = 0
+    while True:
+        surcharge: int = (
+            rules.DISTANCE_STARTING_FEE + half_kms * rules.DISTANCE_HALF_KM_FEE
+        )
+        if (
+            finalize_fee(fixed_fee + surcharge, multiplier, rules)
+            >= rules.MAX_DELIVERY_FEE
+        ):
+            if half_kms == 0:
+                return -1
+            return rules.STARTING_DISTANCE + (half_kms - 1) * 500
+        half_kms += 1
+
+
+def rank_by_fee(
+    cart_value: int,
+    number_of_items: int,
+    time: str,
+    distances: Sequence[int],
+    limit: int,
+    rules: OrderConstants = DEFAULT_RULES,
+    calendar_multiplier: float | None = None,
+) -> list[tuple[int, int]]:
+    """Return the limit cheapest venues as (index into distances, delivery fee).
+
+    Args:
+        cart_value (int): The value of the shopping cart in cents.
+        number_of_items (int): The number of items in the shopping cart.
+        time (str): The validated order time.
+        distances (Sequence[int]): Delivery distance of every candidate venue in meters.
+        limit (int): Number of venues to return.
+        rules (OrderConstants): The rule set to price with.
+        calendar_multiplier (float | None): Multiplier of the calendar entry the
+            order falls in, replacing the rush hour multiplier.
+
+    Returns:
+        list[tuple[int, int]]: Cheapest first; venues with equal fees keep their input order.
+
+    Everything but the distance surcharge is the same for every venue, so it is
+    computed once. Venues beyond the capped distance get MAX_DELIVERY_FEE without
+    further work, and only the remaining fees go through a partial selection.
+    """
+    if cart_value >= rules.FREE_DELIVERY_CART_VALUE:
+        return [(index, 0) for index in range(min(limit, len(distances)))]
+
+    fixed_fee: int = cart_value_surcharge(cart_value, rules)
+    fixed_fee += items_surcharge(number_of_items, rules)
+    multiplier: float = rush_hour_multiplier(
+        calendar_multiplier is None and is_rush_hour(time, rules),
+        rules,
+        calendar_multiplier,
+    )
+    cap_distance: float = capped_distance(fixed_fee, multiplier, rules)
+
+    uncapped: list[int] = [
+        index for index, distance in enumerate(distances) if distance <= cap_distance
+    ]
+    finalize = fee_finalizer(multiplier, rules)
+    fees: list[int] = [
+        finalize(fixed_fee + surcharge)
+        for surcharge in distance_surcharges([distances[i] for i in uncapped], rules)
+    ]
+    cheapest: list[int] = heapq.nsmallest(
+        limit, range(len(uncapped)), key=fees.__getitem__
+    )
+    ranked: list[tuple[int, int]] = [(uncapped[i], fees[i]) for i in cheapest]
+
+    if len(ranked) < limit:
+        max_fee: int = rules.MAX_DELIVERY_FEE
+        for index, distance in enumerate(distances):
+            if distance > cap_distance:
+                ranked.append((index, max_fee))
+                if len(ranked) == limit:
+                    break
+    return ranked
+
+
+def rank_venues(
+    ranking: RankingRequest, calendar_multiplier: float | None = None
+) -> list[RankedVenue]:
+    """Rank the venues of a validated ranking request by delivery fee, cheapest
+    first, with the multiplier of the calendar entry the order falls in, if any.
+    """
+    distances: list[int] = [
+        (
+            venue.delivery_distance
+            if venue.delivery_distance is not None
+            else haversine_distance(
+                ranking.latitude, ranking.longitude, venue.latitude, venue.longitude
+            )
+        )
+        for venue in ranking.venues
+    ]
+    ranked = rank_by_fee(
+        ranking.cart_value,
+        ranking.number_of_items,
+        ranking.time,
+        distances,
+        ranking.limit,
+        calendar_multiplier=calendar_multiplier,
+    )
+    return [
+        RankedVenue(
+            id=ranking.venues[index].id,
+            delivery_distance=distances[index],
+            delivery_fee=fee,
+        )
+        for index, fee in ranked
+    ]
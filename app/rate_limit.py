@@ -0,0 +1,216 @@
+import math
+import threading
+import time
+from array import array
+from typing import Callable
+from fastapi import status
+from fastapi.responses import JSONResponse
+from app.constants import ErrorMessages, HeaderNames, RateLimitConstants
+from app.settings import Settings
+
+
+"""
+Per-client rate limiting with token buckets, keyed on the X-API-Key header.
+Every client may make burst requests at once and rate requests per second on
+average; requests without a key share one anonymous bucket.
+
+The buckets live in fixed-size arrays indexed by a slot per client, so the
+table takes the same memory however many clients come and go. A bucket is
+only refilled when its client makes a request. Clients idle for longer than
+the idle timeout are evicted; the timeout is never shorter than the time to
+refill a bucket, so an evicted client comes back with exactly the full bucket
+it would have had. When every slot is taken by an active client, new clients
+share an overflow bucket until a slot frees up.
+
+The middleware answers over-limit requests with a 429 before the body is read,
+so rejected traffic never reaches JSON parsing or Order validation. Messages
+on the quote stream are limited one by one with the same buckets.
+"""
+
+
+"""Key of the requests that do not send an API key."""
+ANONYMOUS_CLIENT: str = ""
+
+
+class RateLimiter:
+    """Token buckets of up to max_clients clients in an array-backed table.
+
+    Args:
+        rate (float): Tokens added to a bucket per second.
+        burst (int): Capacity of a bucket.
+        max_clients (int): Clients tracked at the same time.
+        idle_timeout (float): Seconds without requests after which a client is evicted.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_clients: int = 10000,
+        idle_timeout: float = 300.0,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.idle_timeout = max(idle_timeout, burst / rate)
+        # The slot after the last client slot is the shared overflow bucket.
+        self._overflow: int = max_clients
+        size: int = max_clients + 1
+        self._tokens = array("d", [float(burst)]) * size
+        self._updated = array("d", [0.0]) * size
+        self._allowed = array("q", [0]) * size
+        self._rejected = array("q", [0]) * size
+        self._slots: dict[str, int] = {}
+        self._free: list[int] = list(range(max_clients - 1, -1, -1))
+        self._evicted: dict[str, int] = {"clients": 0, "allowed": 0, "rejected": 0}
+        self._next_sweep: float = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RateLimiter | None":
+        """Return a rate limiter configured from settings, or None if it is disabled."""
+        if settings.rate_limit_per_second <= 0:
+            return None
+        return cls(
+            settings.rate_limit_per_second,
+            settings.rate_limit_burst,
+            max_clients=settings.rate_limit_max_clients,
+            idle_timeout=settings.rate_limit_idle_timeout,
+        )
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """Take a token from the client's bucket.
+
+        Args:
+            key (str): The client's API key.
+            now (float | None): time.monotonic() of the request, now by default.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds until the
+            bucket holds a token again.
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._evict_idle(now)
+            slot: int | None = self._slots.get(key)
+            if slot is None:
+                slot = self._add(key, now)
+            tokens: float = min(
+                self.burst, self._tokens[slot] + (now - self._updated[slot]) * self.rate
+            )
+            self._updated[slot] = now
+            if tokens >= 1:
+                self._tokens[slot] = tokens - 1
+                self._allowed[slot] += 1
+                return 0.0
+            self._tokens[slot] = tokens
+            self._rejected[slot] += 1
+            return (1 - tokens) / self.rate
+
+    def _add(self, key: str, now: float) -> int:
+        """Give a new client a full bucket, or the overflow bucket if the table is full."""
+        if not self._free:
+            return self._overflow
+        slot: int = self._free.pop()
+        self._slots[key] = slot
+        self._tokens[slot] = self.burst
+        self._updated[slot] = now
+        self._allowed[slot] = 0
+        self._rejected[slot] = 0
+        return slot
+
+    def _evict_idle(self, now: float) -> None:
+        """Free the slots of clients idle for longer than the idle timeout.
+
+        Runs at most twice per idle timeout, so a client is evicted within one
+        and a half timeouts of its last request.
+        """
+        self._next_sweep = now + self.idle_timeout / 2
+        oldest: float = now - self.idle_timeout
+        for key, slot in list(self._slots.items()):
+            if self._updated[slot] < oldest:
+                self._evicted["clients"] += 1
+                self._evicted["allowed"] += self._allowed[slot]
+                self._evicted["rejected"] += self._rejected[slot]
+                del self._slots[key]
+                self._free.append(slot)
+
+    def _usage(self, slot: int, now: float) -> dict:
+        return {
+            "allowed": self._allowed[slot],
+            "rejected": self._rejected[slot],
+            "tokens": round(
+                min(
+                    self.burst,
+                    self._tokens[slot] + (now - self._updated[slot]) * self.rate,
+                ),
+                3,
+            ),
+        }
+
+    def snapshot(self) -> dict:
+        """Return the usage counters of every tracked client, the shared overflow
+        bucket and the totals of evicted clients.
+        """
+        now: float = time.monotonic()
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "tracked": len(self._slots),
+                "max_clients": self.max_clients,
+                "clients": {
+                    key: self._usage(slot, now) for key, slot in self._slots.items()
+                },
+                "overflow": self._usage(self._overflow, now),
+                "evicted": dict(self._evicted),
+            }
+
+
+def client_key(scope) -> str:
+    """Return the API key of a request, truncated, or ANONYMOUS_CLIENT without one."""
+    header: bytes = HeaderNames.API_KEY.lower().encode()
+    for name, value in scope["headers"]:
+        if name == header:
+            return value[: RateLimitConstants.MAX_KEY_LENGTH].decode("latin-1")
+    return ANONYMOUS_CLIENT
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering requests over their client's limit with a 429.
+
+    Only HTTP requests are limited here. The quote stream takes a token per
+    message instead of one per connection, see serve_quote_stream.
+
+    Args:
+        app: The wrapped ASGI app.
+        limiter (Callable[[], RateLimiter | None]): Returns the current rate
+            limiter, looked up per request. Requests pass while it returns None.
+    """
+
+    def __init__(self, app, limiter: Callable[[], "RateLimiter | None"]):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send) -> None:
+        limiter: RateLimiter | None = self.limiter()
+        if (
+            limiter is None
+            or scope["type"] != "http"
+            or not scope["path"].startswith(RateLimitConstants.LIMITED_PATH_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        retry_after: float = limiter.acquire(client_key(scope))
+        if retry_after <= 0:
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse(
+            {"detail": ErrorMessages.RATE_LIMITED},
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,57 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class ReloadingFile(Generic[T]):
+    """Holds the result of loading a configuration file and reloads it when the
+    file changes, so new configuration takes effect without a restart.
+
+    Args:
+        path (str): The file to load.
+        load (Callable[[str], T]): Parses the file, raising if it is invalid.
+        interval (float): Minimum number of seconds between modification checks.
+
+    The file is loaded once on construction, so an invalid file fails at startup.
+    Afterwards, get() checks the modification time at most once per interval; a
+    file that fails to load is logged and the previous value is kept.
+    """
+
+    def __init__(self, path: str, load: Callable[[str], T], interval: float = 5.0):
+        self.path = path
+        self.interval = interval
+        self._load = load
+        self._lock = threading.Lock()
+        self._mtime: int = os.stat(path).st_mtime_ns
+        self.value: T = load(path)
+        self._next_check: float = time.monotonic() + interval
+
+    def get(self) -> T:
+        """Return the current value, reloading the file first if it is due and changed."""
+        now: float = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.interval
+                self.reload()
+            finally:
+                self._lock.release()
+        return self.value
+
+    def reload(self) -> None:
+        """Reload the file if its modification time changed since the last load."""
+        try:
+            mtime: int = os.stat(self.path).st_mtime_ns
+            if mtime != self._mtime:
+                self.value = self._load(self.path)
+                self._mtime = mtime
+                logger.info("Reloaded %s", self.path)
+        except Exception:
+            logger.exception(
+                "Failed to reload %s, keeping the previous version", self.path
+            )
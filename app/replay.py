@@ -0,0 +1,189 @@
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+import httpx
+from app.capture import CAPTURED_PATH
+
+
+"""
+Replays traffic captured by app/capture.py against the app, in-process or
+against a running server, and reports how the build compares:
+
+    python -m app.replay capture.jsonl                         # in-process
+    python -m app.replay capture.jsonl --url http://localhost:8000 --speed 4
+
+Requests are sent at their recorded pace divided by --speed (0 sends them as
+fast as the --concurrency senders allow). Every response is compared with the
+recorded one, so a changed fee is reported as a mismatch; captures taken with
+surge pricing or experiments enabled only match under the same conditions.
+The exit status is 1 if any request mismatched or failed.
+"""
+
+
+"""Sends a request body and returns the response status and JSON."""
+Sender = Callable[[Any], tuple[int, Any]]
+
+
+def load_capture(path: str) -> list[dict]:
+    """Load the records of a capture file, oldest first."""
+    with open(path) as capture_file:
+        records = [json.loads(line) for line in capture_file if line.strip()]
+    return sorted(records, key=lambda record: record["ts"])
+
+
+def latency_summary(latencies_ms: list[float]) -> dict[str, float]:
+    """Return the mean, nearest-rank percentiles and maximum of latencies in ms."""
+    if not latencies_ms:
+        return {}
+    ordered: list[float] = sorted(latencies_ms)
+
+    def percentile(q: float) -> float:
+        return ordered[max(0, math.ceil(len(ordered) * q / 100) - 1)]
+
+    return {
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(percentile(50), 3),
+        "p90": round(percentile(90), 3),
+        "p99": round(percentile(99), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def replay(
+    records: list[dict],
+    send: Sender,
+    speed: float = 1.0,
+    concurrency: int = 8,
+    verify: bool = True,
+) -> dict:
+    """Send the recorded requests on schedule and compare the responses.
+
+    Args:
+        records (list[dict]): Captured records, oldest first.
+        send (Sender): Sends one request body, called from concurrency threads.
+        speed (float): Rate multiplier of the recorded pace, 0 for no pacing.
+        concurrency (int): Requests in flight at most.
+        verify (bool): Compare status and response body with the recorded ones.
+
+    Returns:
+        dict: Counts, the first mismatches, the achieved rate, the replayed and
+        recorded latency distributions and how far the schedule fell behind.
+    """
+    latencies: list[float] = []
+    mismatches: list[dict] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def replay_one(record: dict) -> None:
+        started: float = time.perf_counter()
+        try:
+            status, response = send(record["body"])
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+            return
+        latency_ms: float = (time.perf_counter() - started) * 1000
+        mismatched: bool = verify and (
+            status != record["status"] or response != record["response"]
+        )
+        with lock:
+            latencies.append(latency_ms)
+            if mismatched:
+                mismatches.append(
+                    {
+                        "body": record["body"],
+                        "expected": [record["status"], record["response"]],
+                        "actual": [status, response],
+                    }
+                )
+
+    first_ts: float = records[0]["ts"] if records else 0.0
+    max_lag: float = 0.0
+    started: float = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as senders:
+        for record in records:
+            if speed > 0:
+                due: float = (record["ts"] - first_ts) / speed
+                delay: float = due - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    max_lag = max(max_lag, -delay)
+            senders.submit(replay_one, record)
+    duration: float = time.perf_counter() - started
+
+    return {
+        "requests": len(records),
+        "errors": len(errors),
+        "mismatches": len(mismatches),
+        "first_mismatches": mismatches[:5],
+        "first_errors": errors[:5],
+        "duration_s": round(duration, 3),
+        "rate_per_s": round(len(records) / duration, 1) if duration > 0 else 0.0,
+        "max_schedule_lag_ms": round(max_lag * 1000, 3),
+        "latency_ms": latency_summary(latencies),
+        "recorded_latency_ms": latency_summary(
+            [record["latency_ms"] for record in records]
+        ),
+    }
+
+
+@contextmanager
+def in_process_sender() -> Iterator[Sender]:
+    """Send requests straight into app.main.app, including its lifespan."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+
+        def send(body: Any) -> tuple[int, Any]:
+            response = client.post(CAPTURED_PATH, json=body)
+            return response.status_code, response.json()
+
+        yield send
+
+
+@contextmanager
+def http_sender(url: str, concurrency: int) -> Iterator[Sender]:
+    """Send requests to a running server."""
+    limits = httpx.Limits(max_connections=concurrency)
+    with httpx.Client(base_url=url, limits=limits) as client:
+
+        def send(body: Any) -> tuple[int, Any]:
+            response = client.post(CAPTURED_PATH, json=body)
+            return response.status_code, response.json()
+
+        yield send
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line interface: python -m app.replay CAPTURE [--url URL] ..."""
+    parser = argparse.ArgumentParser(prog="python -m app.replay")
+    parser.add_argument("capture", help="JSONL file written by the capture middleware")
+    parser.add_argument("--url", help="server to replay against, in-process if unset")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--no-verify", action="store_true")
+    args = parser.parse_args(argv)
+
+    records: list[dict] = load_capture(args.capture)
+    sender = (
+        http_sender(args.url, args.concurrency) if args.url else in_process_sender()
+    )
+    with sender as send:
+        report: dict = replay(
+            records, send, args.speed, args.concurrency, not args.no_verify
+        )
+    print(json.dumps(report, indent=2))
+    if report["mismatches"] or report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
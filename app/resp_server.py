@@ -0,0 +1,178 @@
+import argparse
+import os
+import socketserver
+import threading
+import time
+from app.shared_cache import RespError, read_reply
+
+
+"""
+Minimal in-memory RESP server standing in for Redis in tests and local
+development. It implements only the commands the shared quote cache uses:
+PING, GET, SET (with EX), DEL, DBSIZE and FLUSHALL.
+
+    python -m app.resp_server --port 6380
+    python -m app.resp_server --unix /tmp/quotes.sock
+"""
+
+
+def _bulk(value: bytes | None) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class Store:
+    """Thread-safe key value store with per-key expiry."""
+
+    def __init__(self):
+        self._values: dict[bytes, tuple[bytes, float | None]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> bytes | None:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key: bytes, value: bytes, ttl: float | None) -> None:
+        expires: float | None = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._values[key] = (value, expires)
+
+    def delete(self, keys: list[bytes]) -> int:
+        with self._lock:
+            return sum(self._values.pop(key, None) is not None for key in keys)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._values)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def execute(store: Store, command: list[bytes]) -> bytes:
+    """Run one command and return its encoded reply."""
+    name: str = command[0].decode().upper()
+    args: list[bytes] = command[1:]
+    if name == "PING":
+        return b"+PONG\r\n"
+    if name == "GET" and len(args) == 1:
+        return _bulk(store.get(args[0]))
+    if name == "SET" and len(args) in (2, 4):
+        ttl: float | None = None
+        if len(args) == 4:
+            if args[2].upper() != b"EX":
+                return b"-ERR syntax error\r\n"
+            ttl = int(args[3])
+        store.set(args[0], args[1], ttl)
+        return b"+OK\r\n"
+    if name == "DEL" and args:
+        return b":%d\r\n" % store.delete(args)
+    if name == "DBSIZE":
+        return b":%d\r\n" % store.size()
+    if name == "FLUSHALL":
+        store.clear()
+        return b"+OK\r\n"
+    return b"-ERR unknown command or wrong number of arguments\r\n"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ConnectionError, RespError, ValueError):
+                return
+            if not isinstance(command, list) or not command:
+                self.wfile.write(b"-ERR expected a command array\r\n")
+                continue
+            self.wfile.write(execute(self.server.store, command))
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class RespServer:
+    """In-memory RESP server on a TCP port or a Unix socket, served from a thread.
+
+    Args:
+        port (int): TCP port on localhost, 0 picks a free one.
+        unix_path (str | None): Listen on this Unix socket instead of TCP.
+    """
+
+    def __init__(self, port: int = 0, unix_path: str | None = None):
+        if unix_path is not None:
+            if os.path.exists(unix_path):
+                os.remove(unix_path)
+            self._server: socketserver.BaseServer = _UnixServer(unix_path, _Handler)
+            self.url: str = f"unix://{unix_path}"
+        else:
+            self._server = _TCPServer(("127.0.0.1", port), _Handler)
+            self.url = f"redis://127.0.0.1:{self._server.server_address[1]}"
+        self._server.store = Store()
+        self.unix_path = unix_path
+        self._thread: threading.Thread | None = None
+
+    @property
+    def store(self) -> Store:
+        """The served key value store."""
+        return self._server.store
+
+    def serve_forever(self) -> None:
+        """Serve connections until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def start(self) -> None:
+        """Serve connections from a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            args=(0.05,),
+            name="resp-server",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.remove(self.unix_path)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command line interface: python -m app.resp_server [--port PORT | --unix PATH]"""
+    parser = argparse.ArgumentParser(prog="python -m app.resp_server")
+    parser.add_argument("--port", type=int, default=6380)
+    parser.add_argument("--unix", help="listen on a Unix socket instead of TCP")
+    args = parser.parse_args(argv)
+
+    server = RespServer(args.port, args.unix)
+    print(f"Serving on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
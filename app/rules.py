@@ -0,0 +1,64 @@
+import dataclasses
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any
+from app.constants import OrderConstants
+from app.delivery_fee import DEFAULT_RULES, ROUNDING_MODES
+
+
+"""
+Alternative rule sets are described as overrides of the production rules,
+e.g. {"FREE_DELIVERY_CART_VALUE": 25000, "RUSH_HOUR_MULTIPLIER": 1.3}.
+"""
+
+
+RULE_FIELDS: dict[str, type] = {
+    field.name: type(field.default) for field in dataclasses.fields(OrderConstants)
+}
+
+
+def rules_from_overrides(overrides: dict[str, Any]) -> OrderConstants:
+    """Return the production rules with the given fields replaced.
+
+    Raises:
+        ValueError: If a field does not exist, its value has the wrong type or
+            the rounding rules are invalid.
+    """
+    for name, value in overrides.items():
+        expected_type: type | None = RULE_FIELDS.get(name)
+        if expected_type is None:
+            raise ValueError(f"Unknown rule: {name}")
+        if expected_type is float and type(value) is int:
+            continue
+        if type(value) is not expected_type:
+            raise ValueError(f"Rule {name} must be of type {expected_type.__name__}")
+    rules: OrderConstants = dataclasses.replace(DEFAULT_RULES, **overrides)
+    if rules.ROUNDING_MODE not in ROUNDING_MODES:
+        raise ValueError(f"ROUNDING_MODE must be one of {', '.join(ROUNDING_MODES)}")
+    if rules.ROUNDING_STEP < 1 or rules.MAX_DELIVERY_FEE % rules.ROUNDING_STEP:
+        raise ValueError(
+            "MAX_DELIVERY_FEE must be a multiple of a positive ROUNDING_STEP"
+        )
+    return rules
+
+
+@lru_cache(maxsize=256)
+def rules_fingerprint(rules: OrderConstants) -> str:
+    """Return a short hash of every rule value.
+
+    Unlike RULES_VERSION, which is bumped by hand, the fingerprint changes
+    whenever any rule changes, so fees cached under it can never be served for
+    different rules, also not by another replica.
+    """
+    values: str = json.dumps(dataclasses.astuple(rules))
+    return hashlib.blake2b(values.encode(), digest_size=8).hexdigest()
+
+
+def load_rule_sets(path: str) -> dict[str, OrderConstants]:
+    """Load named rule sets from a JSON file mapping names to rule overrides."""
+    with open(path) as rules_file:
+        rule_sets: dict[str, dict[str, Any]] = json.load(rules_file)
+    return {
+        name: rules_from_overrides(overrides) for name, overrides in rule_sets.items()
+    }
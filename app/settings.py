@@ -0,0 +1,195 @@
+import os
+from dataclasses import dataclass
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    return value.lower() in ("1", "true", "yes") if value else default
+
+
+@dataclass
+class Settings:
+    """Runtime configuration read from environment variables. Optional features
+    stay disabled unless the variable that enables them is set. The in-process
+    quote cache is the exception: it is on by default since it never changes a
+    response, QUOTE_CACHE_SIZE=0 turns it off.
+    """
+
+    """Directory the quote audit log is written to (AUDIT_LOG_DIR), disabled if unset."""
+    audit_log_dir: str | None = None
+    """Records held in memory before the oldest ones are dropped (AUDIT_BUFFER_SIZE)."""
+    audit_buffer_size: int = 65536
+    """Records compressed and written together (AUDIT_BATCH_SIZE)."""
+    audit_batch_size: int = 1024
+    """Seconds between flushes of a partial batch (AUDIT_FLUSH_INTERVAL)."""
+    audit_flush_interval: float = 1.0
+    """Seconds between fsync calls on the current file (AUDIT_FSYNC_INTERVAL)."""
+    audit_fsync_interval: float = 5.0
+    """Size in bytes after which a new file is started (AUDIT_MAX_FILE_BYTES)."""
+    audit_max_file_bytes: int = 64 * 1024 * 1024
+
+    """JSON file of candidate rule sets for shadow pricing (SHADOW_RULES), disabled if unset."""
+    shadow_rules_path: str | None = None
+    """Orders waiting for shadow evaluation before new ones are dropped (SHADOW_QUEUE_SIZE)."""
+    shadow_queue_size: int = 10000
+    """Orders evaluated together by the shadow worker (SHADOW_BATCH_SIZE)."""
+    shadow_batch_size: int = 256
+
+    """JSON file of the pricing experiment (EXPERIMENTS), disabled if unset."""
+    experiments_path: str | None = None
+    """Seconds between checks for a changed experiment file (EXPERIMENTS_RELOAD_INTERVAL)."""
+    experiments_reload_interval: float = 5.0
+
+    """JSON file of holiday and event pricing windows (PRICING_CALENDAR), disabled if unset."""
+    pricing_calendar_path: str | None = None
+    """Seconds between checks for a changed calendar file (PRICING_CALENDAR_RELOAD_INTERVAL)."""
+    pricing_calendar_reload_interval: float = 5.0
+
+    """Requests priced at the same time (ADMISSION_MAX_CONCURRENCY), disabled if unset or 0."""
+    admission_max_concurrency: int = 0
+    """Seconds a request may wait for a free slot (ADMISSION_QUEUE_TIMEOUT)."""
+    admission_queue_timeout: float = 0.05
+    """Value of the Retry-After header of rejected requests (ADMISSION_RETRY_AFTER)."""
+    admission_retry_after: int = 1
+    """Serve saturated requests from the quote cache before rejecting them (ADMISSION_DEGRADED)."""
+    admission_degraded: bool = False
+    """Number of fees kept in the in-process quote cache (QUOTE_CACHE_SIZE), 0 disables it."""
+    quote_cache_size: int = 65536
+    """redis://host:port or unix:///path of the cache shared by all replicas (SHARED_CACHE_URL), disabled if unset."""
+    shared_cache_url: str | None = None
+    """Seconds any operation on the shared cache may take (SHARED_CACHE_TIMEOUT)."""
+    shared_cache_timeout: float = 0.005
+    """Connections kept open to the shared cache per worker (SHARED_CACHE_POOL_SIZE)."""
+    shared_cache_pool_size: int = 8
+    """Seconds a fee is kept in the shared cache (SHARED_CACHE_TTL)."""
+    shared_cache_ttl: int = 3600
+    """Seconds the shared cache is skipped after a failure (SHARED_CACHE_RETRY_INTERVAL)."""
+    shared_cache_retry_interval: float = 1.0
+
+    """JSON file of the pricing profiles of markets with their own currency (PRICING_PROFILES), disabled if unset."""
+    pricing_profiles_path: str | None = None
+
+    """Requests per second each API key may make on average (RATE_LIMIT_PER_SECOND), disabled if unset or 0."""
+    rate_limit_per_second: float = 0.0
+    """Requests a client may make in a burst on top of the average (RATE_LIMIT_BURST)."""
+    rate_limit_burst: int = 20
+    """Clients tracked at the same time, further ones share one bucket (RATE_LIMIT_MAX_CLIENTS)."""
+    rate_limit_max_clients: int = 10000
+    """Seconds without requests after which a client is forgotten (RATE_LIMIT_IDLE_TIMEOUT)."""
+    rate_limit_idle_timeout: float = 300.0
+
+    """JSON list of [quotes per minute, multiplier] steps (SURGE_CURVE), disabled if unset."""
+    surge_curve: str | None = None
+    """'stack' multiplies the surge with the rush hour multiplier, 'replace' applies only the surge (SURGE_MODE)."""
+    surge_mode: str = "stack"
+    """Seconds of demand the quote rate is measured over (SURGE_WINDOW)."""
+    surge_window: int = 60
+    """Seconds between recomputations of the multipliers (SURGE_AGGREGATION_INTERVAL)."""
+    surge_aggregation_interval: float = 1.0
+    """Directory the worker processes share their counts through (SURGE_SHARE_DIR)."""
+    surge_share_dir: str | None = None
+    """Comma separated known regions, others count as the default region (SURGE_REGIONS). Any region if unset."""
+    surge_regions: str | None = None
+    """Regions tracked at the same time when SURGE_REGIONS is unset (SURGE_MAX_REGIONS)."""
+    surge_max_regions: int = 1024
+
+    """JSONL file sampled /delivery_fee traffic is captured to (CAPTURE_PATH), disabled if unset."""
+    capture_path: str | None = None
+    """Share of the requests captured (CAPTURE_SAMPLE_RATE)."""
+    capture_sample_rate: float = 0.01
+
+    """Compile in the tracing spans turned on per request by X-Trace (TRACING)."""
+    tracing: bool = False
+    """Token required in X-Admin-Token by the admin endpoints (ADMIN_TOKEN), disabled if unset."""
+    admin_token: str | None = None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build the settings from the current environment."""
+        return cls(
+            audit_log_dir=os.environ.get("AUDIT_LOG_DIR") or None,
+            audit_buffer_size=_env_int("AUDIT_BUFFER_SIZE", cls.audit_buffer_size),
+            audit_batch_size=_env_int("AUDIT_BATCH_SIZE", cls.audit_batch_size),
+            audit_flush_interval=_env_float(
+                "AUDIT_FLUSH_INTERVAL", cls.audit_flush_interval
+            ),
+            audit_fsync_interval=_env_float(
+                "AUDIT_FSYNC_INTERVAL", cls.audit_fsync_interval
+            ),
+            audit_max_file_bytes=_env_int(
+                "AUDIT_MAX_FILE_BYTES", cls.audit_max_file_bytes
+            ),
+            shadow_rules_path=os.environ.get("SHADOW_RULES") or None,
+            shadow_queue_size=_env_int("SHADOW_QUEUE_SIZE", cls.shadow_queue_size),
+            shadow_batch_size=_env_int("SHADOW_BATCH_SIZE", cls.shadow_batch_size),
+            experiments_path=os.environ.get("EXPERIMENTS") or None,
+            experiments_reload_interval=_env_float(
+                "EXPERIMENTS_RELOAD_INTERVAL", cls.experiments_reload_interval
+            ),
+            pricing_calendar_path=os.environ.get("PRICING_CALENDAR") or None,
+            pricing_calendar_reload_interval=_env_float(
+                "PRICING_CALENDAR_RELOAD_INTERVAL",
+                cls.pricing_calendar_reload_interval,
+            ),
+            admission_max_concurrency=_env_int(
+                "ADMISSION_MAX_CONCURRENCY", cls.admission_max_concurrency
+            ),
+            admission_queue_timeout=_env_float(
+                "ADMISSION_QUEUE_TIMEOUT", cls.admission_queue_timeout
+            ),
+            admission_retry_after=_env_int(
+                "ADMISSION_RETRY_AFTER", cls.admission_retry_after
+            ),
+            admission_degraded=_env_bool("ADMISSION_DEGRADED", cls.admission_degraded),
+            quote_cache_size=_env_int("QUOTE_CACHE_SIZE", cls.quote_cache_size),
+            shared_cache_url=os.environ.get("SHARED_CACHE_URL") or None,
+            shared_cache_timeout=_env_float(
+                "SHARED_CACHE_TIMEOUT", cls.shared_cache_timeout
+            ),
+            shared_cache_pool_size=_env_int(
+                "SHARED_CACHE_POOL_SIZE", cls.shared_cache_pool_size
+            ),
+            shared_cache_ttl=_env_int("SHARED_CACHE_TTL", cls.shared_cache_ttl),
+            shared_cache_retry_interval=_env_float(
+                "SHARED_CACHE_RETRY_INTERVAL", cls.shared_cache_retry_interval
+            ),
+            pricing_profiles_path=os.environ.get("PRICING_PROFILES") or None,
+            rate_limit_per_second=_env_float(
+                "RATE_LIMIT_PER_SECOND", cls.rate_limit_per_second
+            ),
+            rate_limit_burst=_env_int("RATE_LIMIT_BURST", cls.rate_limit_burst),
+            rate_limit_max_clients=_env_int(
+                "RATE_LIMIT_MAX_CLIENTS", cls.rate_limit_max_clients
+            ),
+            rate_limit_idle_timeout=_env_float(
+                "RATE_LIMIT_IDLE_TIMEOUT", cls.rate_limit_idle_timeout
+            ),
+            surge_curve=os.environ.get("SURGE_CURVE") or None,
+            surge_mode=os.environ.get("SURGE_MODE") or cls.surge_mode,
+            surge_window=_env_int("SURGE_WINDOW", cls.surge_window),
+            surge_aggregation_interval=_env_float(
+                "SURGE_AGGREGATION_INTERVAL", cls.surge_aggregation_interval
+            ),
+            surge_share_dir=os.environ.get("SURGE_SHARE_DIR") or None,
+            surge_regions=os.environ.get("SURGE_REGIONS") or None,
+            surge_max_regions=_env_int("SURGE_MAX_REGIONS", cls.surge_max_regions),
+            capture_path=os.environ.get("CAPTURE_PATH") or None,
+            capture_sample_rate=_env_float(
+                "CAPTURE_SAMPLE_RATE", cls.capture_sample_rate
+            ),
+            tracing=_env_bool("TRACING", cls.tracing),
+            admin_token=os.environ.get("ADMIN_TOKEN") or None,
+        )
+
+
+settings: Settings = Settings.from_env()
@@ -0,0 +1,177 @@
+import queue
+import threading
+from dataclasses import dataclass, asdict
+from app.models import Order
+from app.constants import OrderConstants
+from app.delivery_fee import calculate_delivery_fees, parse_order_time
+from app.settings import Settings
+from app.rules import load_rule_sets
+
+
+"""
+Shadow pricing: candidate rule sets are evaluated on live traffic next to the
+production rules without affecting the response. The request path only offers
+the order to a bounded queue; a background thread prices whole batches with
+every candidate and aggregates the difference to the fee that was served.
+When the worker falls behind, new orders are dropped instead of queued.
+"""
+
+
+@dataclass
+class ShadowStats:
+    """Aggregated difference between a candidate rule set and production."""
+
+    quotes: int = 0
+    changed: int = 0
+    increased: int = 0
+    decreased: int = 0
+    production_total: int = 0
+    candidate_total: int = 0
+    max_increase: int = 0
+    max_decrease: int = 0
+
+    def add(self, production_fees: list[int], candidate_fees: list[int]) -> None:
+        """Add a batch of fee pairs to the statistics."""
+        for production_fee, candidate_fee in zip(production_fees, candidate_fees):
+            delta: int = candidate_fee - production_fee
+            if delta > 0:
+                self.increased += 1
+                self.max_increase = max(self.max_increase, delta)
+            elif delta < 0:
+                self.decreased += 1
+                self.max_decrease = max(self.max_decrease, -delta)
+        self.quotes += len(production_fees)
+        self.changed = self.increased + self.decreased
+        self.production_total += sum(production_fees)
+        self.candidate_total += sum(candidate_fees)
+
+    def as_dict(self) -> dict:
+        """Return the statistics together with the derived revenue delta."""
+        stats = asdict(self)
+        stats["delta_total"] = self.candidate_total - self.production_total
+        stats["mean_delta"] = stats["delta_total"] / self.quotes if self.quotes else 0
+        return stats
+
+
+class ShadowPricer:
+    """Evaluates candidate rule sets off the response path.
+
+    Args:
+        candidates (dict[str, OrderConstants]): The rule sets to compare with production.
+        queue_size (int): Orders waiting for evaluation before new ones are dropped.
+        batch_size (int): Maximum number of orders evaluated together.
+        surge_replaces_rush_hour (bool): Whether production ignores the rush hour
+            window in favour of the surge multiplier, see app/surge.py.
+    """
+
+    def __init__(
+        self,
+        candidates: dict[str, OrderConstants],
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        surge_replaces_rush_hour: bool = False,
+    ):
+        self.candidates = candidates
+        self.batch_size = batch_size
+        self.surge_replaces_rush_hour = surge_replaces_rush_hour
+        self.dropped: int = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._stats: dict[str, ShadowStats] = {
+            name: ShadowStats() for name in candidates
+        }
+        self._stats_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ShadowPricer | None":
+        """Return a ShadowPricer configured from settings, or None if it is disabled."""
+        if settings.shadow_rules_path is None:
+            return None
+        return cls(
+            load_rule_sets(settings.shadow_rules_path),
+            queue_size=settings.shadow_queue_size,
+            batch_size=settings.shadow_batch_size,
+            surge_replaces_rush_hour=settings.surge_mode == "replace",
+        )
+
+    def submit(
+        self,
+        order_data: Order,
+        fee: int,
+        surge: float = 1.0,
+        calendar_multiplier: float | None = None,
+    ) -> None:
+        """Offer a priced order for shadow evaluation, dropping it if the queue is full.
+
+        Candidates are evaluated with the same surge and calendar multipliers the
+        order was served with.
+        """
+        try:
+            self._queue.put_nowait((order_data, fee, surge, calendar_multiplier))
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        """Start the background worker thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="shadow-pricer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Evaluate the orders still queued and stop the worker."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping: bool = batch[-1] is None
+            if stopping:
+                batch.pop()
+            self.evaluate(batch)
+            if stopping:
+                return
+
+    def evaluate(self, batch: list[tuple[Order, int, float, float | None]]) -> None:
+        """Price a batch with every candidate and add the result to the statistics."""
+        if not batch:
+            return
+        orders = [order_data for order_data, _, _, _ in batch]
+        production_fees = [fee for _, fee, _, _ in batch]
+        surges = [surge for _, _, surge, _ in batch]
+        calendar_multipliers = [multiplier for _, _, _, multiplier in batch]
+        if self.surge_replaces_rush_hour:
+            order_times = [None] * len(orders)
+        else:
+            order_times = [parse_order_time(order_data.time) for order_data in orders]
+
+        results = {
+            name: calculate_delivery_fees(
+                orders, rules, order_times, surges, calendar_multipliers
+            )
+            for name, rules in self.candidates.items()
+        }
+        with self._stats_lock:
+            for name, candidate_fees in results.items():
+                self._stats[name].add(production_fees, candidate_fees)
+
+    def snapshot(self) -> dict:
+        """Return the current statistics of every candidate."""
+        with self._stats_lock:
+            candidates = {name: stats.as_dict() for name, stats in self._stats.items()}
+        return {
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "candidates": candidates,
+        }
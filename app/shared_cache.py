@@ -0,0 +1,375 @@
+import json
+import logging
+import queue
+import socket
+import threading
+import time
+from typing import BinaryIO, Hashable
+from urllib.parse import urlparse
+from app.settings import Settings
+
+
+"""
+Quote cache shared by all replicas, the second tier behind the in-process
+QuoteCache. It talks the Redis serialization protocol (RESP) to any compatible
+server, e.g. Redis, Valkey or the stand-in in app/resp_server.py.
+
+The shared tier must never make a request slower than computing the fee: every
+socket operation is bounded by a short timeout, a failure makes the cache skip
+the server for retry_interval seconds, and writes are pipelined by a
+background thread instead of waiting on the request path.
+"""
+
+
+logger = logging.getLogger(__name__)
+
+
+class RespError(Exception):
+    """Error reply sent by the server."""
+
+
+def encode_command(*args: str | bytes | int) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+    parts: list[bytes] = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data: bytes = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def read_reply(reader: BinaryIO) -> str | int | bytes | list | None:
+    """Read one RESP value.
+
+    Raises:
+        RespError: If the value is an error reply.
+        ConnectionError: If the connection closed or sent something that is not RESP.
+    """
+    line: bytes = reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by the server")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise RespError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length: int = int(payload)
+        if length < 0:
+            return None
+        data: bytes = reader.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError("Connection closed by the server")
+        return data[:-2]
+    if kind == b"*":
+        count: int = int(payload)
+        if count < 0:
+            return None
+        return [read_reply(reader) for _ in range(count)]
+    raise ConnectionError(f"Invalid RESP type {kind!r}")
+
+
+def _remaining(deadline: float) -> float:
+    remaining: float = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Shared cache deadline exceeded")
+    return remaining
+
+
+class RespConnection:
+    """One connection to a RESP server.
+
+    Every operation takes the monotonic deadline of the whole lookup, and each
+    connect, send and receive only waits for the time left until it, so a slow
+    server cannot add more than one timeout to a request.
+
+    Args:
+        url (str): redis://host:port or unix:///path/to/socket.
+        deadline (float): time.monotonic() value by which the connection must be open.
+    """
+
+    def __init__(self, url: str, deadline: float):
+        address = urlparse(url)
+        if address.scheme == "unix":
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            target: str | tuple = address.path
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            target = (address.hostname or "localhost", address.port or 6379)
+        self._buffer = bytearray()
+        self._deadline: float = deadline
+        try:
+            self._socket.settimeout(_remaining(deadline))
+            self._socket.connect(target)
+        except OSError:
+            self._socket.close()
+            raise
+
+    def _fill(self) -> None:
+        self._socket.settimeout(_remaining(self._deadline))
+        data: bytes = self._socket.recv(65536)
+        if not data:
+            raise ConnectionError("Connection closed by the server")
+        self._buffer += data
+
+    def readline(self) -> bytes:
+        """Read up to and including the next CRLF, read_reply's reader interface."""
+        while (end := self._buffer.find(b"\r\n")) < 0:
+            self._fill()
+        line: bytes = bytes(self._buffer[: end + 2])
+        del self._buffer[: end + 2]
+        return line
+
+    def read(self, size: int) -> bytes:
+        """Read exactly size bytes, read_reply's reader interface."""
+        while len(self._buffer) < size:
+            self._fill()
+        data: bytes = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def pipeline(self, commands: list[tuple], deadline: float) -> list:
+        """Send several commands in one write and read their replies in order."""
+        self._deadline = deadline
+        self._socket.settimeout(_remaining(deadline))
+        self._socket.sendall(b"".join(encode_command(*command) for command in commands))
+        return [read_reply(self) for _ in commands]
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._socket.close()
+
+
+class ConnectionPool:
+    """Reuses up to max_connections connections to one server.
+
+    Connections that failed are closed instead of returned, so the pool only
+    hands out connections in a known state.
+
+    Args:
+        url (str): redis://host:port or unix:///path/to/socket.
+        max_connections (int): Connections open at the same time.
+        timeout (float): Seconds a whole operation, from waiting for a
+            connection to reading the last reply, may take.
+    """
+
+    def __init__(self, url: str, max_connections: int, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[RespConnection] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def acquire(self, deadline: float) -> RespConnection:
+        """Return an idle connection or open a new one.
+
+        Raises:
+            TimeoutError: If every connection stayed in use until the deadline.
+            OSError: If a new connection could not be opened.
+        """
+        if not self._slots.acquire(timeout=_remaining(deadline)):
+            raise TimeoutError("No free connection to the shared cache")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return RespConnection(self.url, deadline)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection: RespConnection, broken: bool = False) -> None:
+        """Return a connection to the pool, or close it if it failed."""
+        if broken:
+            connection.close()
+        else:
+            self._idle.put(connection)
+        self._slots.release()
+
+    def run(self, commands: list[tuple]) -> list:
+        """Run commands as one pipeline on a pooled connection within the timeout.
+
+        Raises:
+            OSError: If the server could not be reached or did not answer in time.
+            RespError: If the server answered with an error.
+        """
+        deadline: float = time.monotonic() + self.timeout
+        connection: RespConnection = self.acquire(deadline)
+        try:
+            replies: list = connection.pipeline(commands, deadline)
+        except BaseException:
+            self.release(connection, broken=True)
+            raise
+        self.release(connection)
+        return replies
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def cache_key(key: Hashable) -> str:
+    """Encode a quote_key tuple as a server key."""
+    return "quote:" + json.dumps(key, separators=(",", ":"))
+
+
+class SharedQuoteCache:
+    """Quote cache on a RESP server, failing silently within a bounded time.
+
+    Args:
+        pool (ConnectionPool): Connections to the server.
+        ttl (int): Seconds a fee is kept on the server.
+        retry_interval (float): Seconds the server is skipped after a failure.
+        write_queue_size (int): Fees waiting to be written before new ones are dropped.
+        write_batch_size (int): Maximum number of fees written in one pipeline.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        ttl: int = 3600,
+        retry_interval: float = 1.0,
+        write_queue_size: int = 10000,
+        write_batch_size: int = 256,
+    ):
+        self.pool = pool
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.write_batch_size = write_batch_size
+        self._writes: queue.Queue = queue.Queue(maxsize=write_queue_size)
+        self._down_until: float = 0.0
+        self._thread: threading.Thread | None = None
+        self._stats_lock = threading.Lock()
+        self._stats: dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "errors": 0,
+            "skipped": 0,
+            "written": 0,
+            "dropped_writes": 0,
+        }
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SharedQuoteCache | None":
+        """Return a shared cache configured from settings, or None if it is disabled."""
+        if settings.shared_cache_url is None:
+            return None
+        return cls(
+            ConnectionPool(
+                settings.shared_cache_url,
+                settings.shared_cache_pool_size,
+                settings.shared_cache_timeout,
+            ),
+            ttl=settings.shared_cache_ttl,
+            retry_interval=settings.shared_cache_retry_interval,
+        )
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _available(self) -> bool:
+        if time.monotonic() < self._down_until:
+            self._count("skipped")
+            return False
+        return True
+
+    def _run_pipeline(self, commands: list[tuple]) -> list | None:
+        """Run commands on a pooled connection, returning None on any failure."""
+        try:
+            return self.pool.run(commands)
+        except (OSError, RespError, ValueError):
+            self._failed()
+            return None
+
+    def _failed(self) -> None:
+        self._count("errors")
+        self._down_until = time.monotonic() + self.retry_interval
+
+    def get(self, key: Hashable) -> int | None:
+        """Return the shared fee for key, or None if it is missing or the server failed.
+
+        A value that is not a fee counts as a failure of the server.
+        """
+        if not self._available():
+            return None
+        replies: list | None = self._run_pipeline([("GET", cache_key(key))])
+        if replies is None:
+            return None
+        if replies[0] is None:
+            self._count("misses")
+            return None
+        try:
+            fee: int = int(replies[0])
+        except ValueError:
+            self._failed()
+            return None
+        self._count("hits")
+        return fee
+
+    def put(self, key: Hashable, fee: int) -> None:
+        """Queue a fee for writing, dropping it if the writer falls behind."""
+        try:
+            self._writes.put_nowait((key, fee))
+        except queue.Full:
+            self._count("dropped_writes")
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="shared-cache-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write the queued fees, stop the writer and close the connections."""
+        if self._thread is None:
+            return
+        self._writes.put(None)
+        self._thread.join()
+        self._thread = None
+        self.pool.close()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < self.write_batch_size:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            stopping: bool = batch[-1] is None
+            if stopping:
+                batch.pop()
+            try:
+                self.write(batch)
+            except Exception:
+                logger.exception("Writing to the shared quote cache failed")
+            if stopping:
+                return
+
+    def write(self, batch: list[tuple[Hashable, int]]) -> None:
+        """Write a batch of fees in one pipeline."""
+        if not batch or not self._available():
+            return
+        replies: list | None = self._run_pipeline(
+            [("SET", cache_key(key), fee, "EX", self.ttl) for key, fee in batch]
+        )
+        if replies is not None:
+            self._count("written", len(batch))
+
+    def snapshot(self) -> dict:
+        """Return the hit, error and write statistics."""
+        with self._stats_lock:
+            stats: dict = dict(self._stats)
+        stats["queued_writes"] = self._writes.qsize()
+        stats["available"] = time.monotonic() >= self._down_until
+        return stats
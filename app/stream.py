@@ -0,0 +1,208 @@
+import asyncio
+import json
+import logging
+import math
+from typing import Any, Callable
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from app.admission import AdmissionController
+from app.rate_limit import RateLimiter
+from app.models import Order, Quote
+from app.constants import ErrorMessages, StreamConstants
+
+
+"""
+Persistent streaming quote channel. A client keeps one WebSocket open and
+pipelines quote requests on it, each one tagged with a correlation id:
+
+    {"id": "q-1", "order": {"cart_value": 790, "delivery_distance": 2235, ...}}
+
+Replies carry the same id and may arrive in any order:
+
+    {"id": "q-1", "delivery_fee": 710}
+    {"id": "q-2", "status_code": 400, "detail": "Invalid time format: ..."}
+
+With rate limiting, every message takes a token from the bucket of the
+connection's API key, and a message over the limit is answered at once:
+
+    {"id": "q-3", "status_code": 429, "detail": "...", "retry_after": 1}
+"""
+
+
+logger = logging.getLogger(__name__)
+
+
+def quote_reply(
+    raw_message: str | None, quote: Callable[[Order], Quote]
+) -> dict[str, Any]:
+    """Validate a single stream message and price the order it carries.
+
+    Args:
+        raw_message (str | None): The JSON text frame received from the client,
+            None for a binary frame.
+        quote (Callable): Prices a validated order, the same one the POST endpoint uses.
+
+    Returns:
+        dict: The reply frame, either the delivery fee or an error mirroring the
+        status code and detail the /delivery_fee endpoint would have returned.
+
+    The order goes through the same Order validation as the HTTP endpoint, so a
+    request rejected there is rejected here with the same status code.
+    """
+    try:
+        message = json.loads(raw_message) if raw_message is not None else None
+    except ValueError:
+        message = None
+    if not isinstance(message, dict) or "order" not in message:
+        return {
+            "id": None,
+            "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY,
+            "detail": ErrorMessages.INVALID_STREAM_MESSAGE,
+        }
+
+    request_id = message.get("id")
+    try:
+        order_data = Order.model_validate(message["order"])
+    except ValidationError as e:
+        return {
+            "id": request_id,
+            "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY,
+            "detail": json.loads(e.json(include_url=False)),
+        }
+    except HTTPException as e:
+        return {"id": request_id, "status_code": e.status_code, "detail": e.detail}
+    except Exception:
+        logger.exception("Validating a streamed order failed")
+        return failed_reply(request_id)
+
+    try:
+        quoted: Quote = quote(order_data)
+    except HTTPException as e:
+        return {"id": request_id, "status_code": e.status_code, "detail": e.detail}
+    except Exception:
+        logger.exception("Pricing a streamed order failed")
+        return failed_reply(request_id)
+    reply: dict[str, Any] = {"id": request_id, "delivery_fee": quoted.delivery_fee}
+    if quoted.experiment_arm is not None:
+        reply["experiment_arm"] = quoted.experiment_arm
+    if quoted.currency is not None:
+        reply["currency"] = quoted.currency
+    return reply
+
+
+def failed_reply(request_id: Any) -> dict[str, Any]:
+    """Return the reply to a message whose quote failed unexpectedly."""
+    return {
+        "id": request_id,
+        "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+        "detail": ErrorMessages.QUOTE_FAILED,
+    }
+
+
+def message_id(raw_message: str | None) -> Any:
+    """Return the correlation id of a raw message, None if it has none."""
+    try:
+        message = json.loads(raw_message) if raw_message is not None else None
+    except ValueError:
+        return None
+    return message.get("id") if isinstance(message, dict) else None
+
+
+def saturated_reply(raw_message: str | None, retry_after: int) -> dict[str, Any]:
+    """Return the reply to a message that admission control rejected."""
+    return {
+        "id": message_id(raw_message),
+        "status_code": status.HTTP_503_SERVICE_UNAVAILABLE,
+        "detail": ErrorMessages.SERVICE_SATURATED,
+        "retry_after": retry_after,
+    }
+
+
+def rate_limited_reply(raw_message: str | None, retry_after: float) -> dict[str, Any]:
+    """Return the reply to a message over its client's rate limit."""
+    return {
+        "id": message_id(raw_message),
+        "status_code": status.HTTP_429_TOO_MANY_REQUESTS,
+        "detail": ErrorMessages.RATE_LIMITED,
+        "retry_after": math.ceil(retry_after),
+    }
+
+
+async def serve_quote_stream(
+    websocket: WebSocket,
+    quote: Callable[[Order], Quote],
+    admission: AdmissionController | None = None,
+    limiter: RateLimiter | None = None,
+    client: str = "",
+) -> None:
+    """Answer pipelined quote requests on an open WebSocket until it closes.
+
+    Args:
+        websocket (WebSocket): The client connection.
+        quote (Callable): Prices a validated order.
+        admission (AdmissionController | None): The limiter of the HTTP endpoint.
+            Every message needs a slot before it is handed to the threadpool,
+            one that gets none within the queue timeout is answered with a 503.
+        limiter (RateLimiter | None): The rate limiter of the HTTP endpoints.
+            Every message takes a token of the client, one over the limit is
+            answered with a 429 without being parsed.
+        client (str): The connection's rate limiting key, see client_key.
+
+    Each message is priced in the threadpool, like the synchronous HTTP
+    endpoint, and answered as soon as it is done. At most
+    StreamConstants.MAX_IN_FLIGHT quotes are pending per connection; when a
+    client outpaces the server, no further frames are read until a slot frees
+    up, which pushes the backpressure down to the socket.
+    """
+    await websocket.accept()
+    in_flight = asyncio.Semaphore(StreamConstants.MAX_IN_FLIGHT)
+    send_lock = asyncio.Lock()
+    pending: set[asyncio.Task] = set()
+
+    async def admitted_reply(raw_message: str | None) -> dict[str, Any]:
+        if admission is None:
+            return await run_in_threadpool(quote_reply, raw_message, quote)
+        if not await admission.acquire():
+            admission.record_rejected()
+            return saturated_reply(raw_message, admission.retry_after)
+        try:
+            return await run_in_threadpool(quote_reply, raw_message, quote)
+        finally:
+            admission.release()
+
+    async def answer(raw_message: str | None) -> None:
+        try:
+            try:
+                reply = await admitted_reply(raw_message)
+            except Exception:
+                logger.exception("Answering a streamed order failed")
+                reply = failed_reply(message_id(raw_message))
+            async with send_lock:
+                await websocket.send_json(reply)
+        finally:
+            in_flight.release()
+
+    try:
+        while True:
+            await in_flight.acquire()
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            if limiter is not None:
+                retry_after: float = limiter.acquire(client)
+                if retry_after > 0:
+                    async with send_lock:
+                        await websocket.send_json(
+                            rate_limited_reply(frame.get("text"), retry_after)
+                        )
+                    in_flight.release()
+                    continue
+            task = asyncio.create_task(answer(frame.get("text")))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in pending:
+            task.cancel()
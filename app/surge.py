@@ -0,0 +1,243 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from app.settings import Settings
+
+
+"""
+Demand-driven surge pricing. Every quote increments a per-second bucket of its
+region's sliding window counter. A background thread periodically sums the
+windows, adds the counts published by the other worker processes and maps each
+region's quote rate (quotes per minute) through a step curve to a multiplier:
+
+    [[60, 1.1], [120, 1.3], [240, 1.5]]
+
+means 1.1 from 60 quotes per minute, 1.3 from 120 and 1.5 from 240. The
+multipliers are published by swapping a dict, so reading one on the request
+path is a single dict lookup and never waits for the aggregation.
+
+Regions come from the client, so their number is bounded: with a configured
+set of regions every other region is counted as the default region, and
+without one at most max_regions are tracked at a time, further regions getting
+no surge. Regions without quotes for a whole window are forgotten.
+"""
+
+
+logger = logging.getLogger(__name__)
+
+"""Region of orders that do not name one."""
+DEFAULT_REGION: str = "default"
+
+
+class SlidingWindowCounter:
+    """Counts events over the last window_seconds in one-second buckets.
+
+    Increments take no lock: each request thread only touches the bucket of the
+    current second, and a lost increment under a rare race only makes the
+    demand estimate marginally lower.
+    """
+
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self._counts: list[int] = [0] * window_seconds
+        self._seconds: list[int] = [0] * window_seconds
+
+    def increment(self, now: float) -> None:
+        """Count one event at the given time."""
+        second: int = int(now)
+        index: int = second % self.window_seconds
+        if self._seconds[index] != second:
+            self._seconds[index] = second
+            self._counts[index] = 0
+        self._counts[index] += 1
+
+    def total(self, now: float) -> int:
+        """Return the number of events in the window ending at the given time."""
+        oldest: int = int(now) - self.window_seconds
+        return sum(
+            count
+            for count, second in zip(self._counts, self._seconds)
+            if second > oldest
+        )
+
+
+class SurgePricing:
+    """Per-region surge multipliers derived from the recent quote rate.
+
+    Args:
+        curve (list[tuple[float, float]]): Quotes per minute thresholds and their multipliers.
+        replaces_rush_hour (bool): Whether the surge replaces the static rush hour
+            multiplier instead of stacking on top of it.
+        window_seconds (int): Length of the sliding window.
+        aggregation_interval (float): Seconds between recomputations of the multipliers.
+        share_dir (str | None): Directory the worker processes publish their counts
+            to, so every worker sees the demand of the whole service.
+        regions (set[str] | None): The known regions, any other region is
+            counted as DEFAULT_REGION. All regions are accepted if None.
+        max_regions (int): Regions tracked at the same time when regions is None.
+    """
+
+    def __init__(
+        self,
+        curve: list[tuple[float, float]],
+        replaces_rush_hour: bool = False,
+        window_seconds: int = 60,
+        aggregation_interval: float = 1.0,
+        share_dir: str | None = None,
+        regions: set[str] | None = None,
+        max_regions: int = 1024,
+    ):
+        curve = sorted(curve)
+        self._thresholds: list[float] = [threshold for threshold, _ in curve]
+        self._curve_multipliers: list[float] = [multiplier for _, multiplier in curve]
+        self.replaces_rush_hour = replaces_rush_hour
+        self.window_seconds = window_seconds
+        self.aggregation_interval = aggregation_interval
+        self.share_dir = share_dir
+        self.regions = regions
+        self.max_regions = max_regions
+        self._counters: dict[str, SlidingWindowCounter] = {}
+        self._multipliers: dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SurgePricing | None":
+        """Return surge pricing configured from settings, or None if it is disabled."""
+        if settings.surge_curve is None:
+            return None
+        return cls(
+            [tuple(point) for point in json.loads(settings.surge_curve)],
+            replaces_rush_hour=settings.surge_mode == "replace",
+            window_seconds=settings.surge_window,
+            aggregation_interval=settings.surge_aggregation_interval,
+            share_dir=settings.surge_share_dir,
+            regions=(
+                {region.strip() for region in settings.surge_regions.split(",")}
+                if settings.surge_regions is not None
+                else None
+            ),
+            max_regions=settings.surge_max_regions,
+        )
+
+    def _region(self, region: str | None) -> str:
+        if not region or (self.regions is not None and region not in self.regions):
+            return DEFAULT_REGION
+        return region
+
+    def record(self, region: str | None) -> None:
+        """Count a quote in its region, unless max_regions other regions are tracked."""
+        region = self._region(region)
+        counter: SlidingWindowCounter | None = self._counters.get(region)
+        if counter is None:
+            if len(self._counters) >= self.max_regions:
+                return
+            counter = self._counters.setdefault(
+                region, SlidingWindowCounter(self.window_seconds)
+            )
+        counter.increment(time.time())
+
+    def multiplier(self, region: str | None) -> float:
+        """Return the current multiplier of a region, 1.0 if there is no surge."""
+        return self._multipliers.get(self._region(region), 1.0)
+
+    def curve_multiplier(self, quotes_per_minute: float) -> float:
+        """Map a quote rate through the curve."""
+        index: int = bisect.bisect_right(self._thresholds, quotes_per_minute)
+        return self._curve_multipliers[index - 1] if index else 1.0
+
+    def start(self) -> None:
+        """Start the background aggregation thread."""
+        if self._thread is not None:
+            return
+        if self.share_dir is not None:
+            os.makedirs(self.share_dir, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="surge-aggregator", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the aggregation thread and withdraw this worker's published counts."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self.share_dir is not None:
+            try:
+                os.remove(self._share_path(os.getpid()))
+            except FileNotFoundError:
+                pass
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.aggregation_interval):
+            try:
+                self.aggregate()
+            except Exception:
+                logger.exception(
+                    "Surge aggregation failed, keeping the last multipliers"
+                )
+
+    def aggregate(self) -> None:
+        """Recompute every region's multiplier from the counts of all workers and
+        forget the regions without quotes in the window.
+        """
+        now: float = time.time()
+        totals: dict[str, int] = {}
+        for region, counter in list(self._counters.items()):
+            total: int = counter.total(now)
+            if total == 0:
+                self._counters.pop(region, None)
+            else:
+                totals[region] = total
+        if self.share_dir is not None:
+            self._publish(totals, now)
+            totals = self._collect(now)
+
+        minutes: float = self.window_seconds / 60
+        self._multipliers = {
+            region: self.curve_multiplier(total / minutes)
+            for region, total in totals.items()
+        }
+
+    def _share_path(self, pid: int) -> str:
+        return os.path.join(self.share_dir, f"surge-{pid}.json")
+
+    def _publish(self, totals: dict[str, int], now: float) -> None:
+        path: str = self._share_path(os.getpid())
+        with open(path + ".tmp", "w") as share_file:
+            json.dump({"ts": now, "totals": totals}, share_file)
+        os.replace(path + ".tmp", path)
+
+    def _collect(self, now: float) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for name in os.listdir(self.share_dir):
+            if not (name.startswith("surge-") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.share_dir, name)) as share_file:
+                    published = json.load(share_file)
+            except (OSError, ValueError):
+                continue
+            if now - published["ts"] > self.window_seconds:
+                continue
+            for region, total in published["totals"].items():
+                totals[region] = totals.get(region, 0) + total
+        return totals
+
+    def snapshot(self) -> dict:
+        """Return the current multipliers and this worker's window counts."""
+        now: float = time.time()
+        return {
+            "replaces_rush_hour": self.replaces_rush_hour,
+            "multipliers": dict(self._multipliers),
+            "local_window_counts": {
+                region: counter.total(now)
+                for region, counter in list(self._counters.items())
+            },
+        }
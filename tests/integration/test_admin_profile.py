@@ -0,0 +1,107 @@
+import json
+import os
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from fastapi import status
+from app import main
+from app.constants import HeaderNames
+from app.tracing import TracingMiddleware
+from tests.conftest import API_ENDPOINT, root_directory
+
+
+PAYLOAD: dict = {
+    "cart_value": 790,
+    "delivery_distance": 2235,
+    "number_of_items": 4,
+    "time": "2024-01-15T13:00:00Z",
+}
+
+
+def test_profile_disabled_without_token():
+    with TestClient(main.app) as client:
+        response = client.get("/admin/profile", params={"seconds": 0.01})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_profile_requires_token(monkeypatch):
+    monkeypatch.setattr(main.settings, "admin_token", "secret")
+    with TestClient(main.app) as client:
+        missing = client.get("/admin/profile", params={"seconds": 0.01})
+        wrong = client.get(
+            "/admin/profile",
+            params={"seconds": 0.01},
+            headers={HeaderNames.ADMIN_TOKEN: "guess"},
+        )
+        response = client.get(
+            "/admin/profile",
+            params={"seconds": 0.05, "interval_ms": 5},
+            headers={HeaderNames.ADMIN_TOKEN: "secret"},
+        )
+    assert missing.status_code == status.HTTP_403_FORBIDDEN
+    assert wrong.status_code == status.HTTP_403_FORBIDDEN
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    for line in response.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+
+
+def test_profile_duration_is_bounded(monkeypatch):
+    monkeypatch.setattr(main.settings, "admin_token", "secret")
+    with TestClient(main.app) as client:
+        response = client.get(
+            "/admin/profile",
+            params={"seconds": 3600},
+            headers={HeaderNames.ADMIN_TOKEN: "secret"},
+        )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+"""Prices one traced and one untraced order in an app imported with TRACING=1."""
+TRACED_APP_SCRIPT: str = f"""
+import json
+from fastapi.testclient import TestClient
+from app import main
+with TestClient(main.app) as client:
+    traced = client.post(
+        {API_ENDPOINT!r}, json={PAYLOAD!r}, headers={{{HeaderNames.TRACE!r}: "1"}}
+    )
+    untraced = client.post({API_ENDPOINT!r}, json={PAYLOAD!r})
+print(json.dumps([traced.json(), dict(traced.headers), dict(untraced.headers)]))
+"""
+
+
+def test_traced_request_reports_spans():
+    """Tracing is compiled in at import time, so the traced app runs in its own
+    interpreter instead of changing the app the rest of the suite imports.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", TRACED_APP_SCRIPT],
+        cwd=root_directory,
+        env={**os.environ, "TRACING": "1"},
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    body, traced_headers, untraced_headers = json.loads(result.stdout)
+    assert body == {"delivery_fee": 710}
+    spans = dict(
+        span.split(";dur=")
+        for span in traced_headers[HeaderNames.SERVER_TIMING.lower()].split(", ")
+    )
+    assert set(spans) == {
+        "validate_iso_time_string",
+        "calculate_delivery_fee",
+        "is_rush_hour",
+    }
+    assert all(float(duration) >= 0 for duration in spans.values())
+    assert HeaderNames.SERVER_TIMING.lower() not in untraced_headers
+
+
+def test_tracing_is_off_by_default():
+    assert not main.settings.tracing
+    assert not any(
+        middleware.cls is TracingMiddleware for middleware in main.app.user_middleware
+    )
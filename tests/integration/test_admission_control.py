@@ -0,0 +1,97 @@
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from fastapi import status
+from app import main
+from app.admission import AdmissionController
+from app.constants import HeaderNames
+from app.experiments import load_experiment
+from app.reloader import ReloadingFile
+from tests.conftest import API_ENDPOINT
+
+
+PAYLOAD: dict = {
+    "cart_value": 790,
+    "delivery_distance": 2235,
+    "number_of_items": 4,
+    "time": "2024-01-15T13:00:00Z",
+}
+
+
+def saturated(degraded: bool) -> AdmissionController:
+    """Return a controller whose only slot is taken."""
+    admission = AdmissionController(1, 0.001, retry_after=3, degraded=degraded)
+    asyncio.run(admission.acquire())
+    return admission
+
+
+def test_saturated_service_rejects_fast(monkeypatch):
+    monkeypatch.setattr(main, "admission", saturated(degraded=False))
+    with TestClient(main.app) as client:
+        response = client.post(API_ENDPOINT, json=PAYLOAD)
+        stats = client.get("/stats/admission").json()
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "3"
+    assert stats["admission"]["rejected"] == 1
+
+
+def test_degraded_mode_serves_cached_quotes(monkeypatch):
+    with TestClient(main.app) as client:
+        assert client.post(API_ENDPOINT, json=PAYLOAD).status_code == status.HTTP_200_OK
+
+        monkeypatch.setattr(main, "admission", saturated(degraded=True))
+        response = client.post(API_ENDPOINT, json=PAYLOAD)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"delivery_fee": 710}
+        assert response.headers[HeaderNames.DEGRADED] == "cache"
+
+        uncached = {**PAYLOAD, "cart_value": 791}
+        response = client.post(API_ENDPOINT, json=uncached)
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+        stats = client.get("/stats/admission").json()
+    assert stats["admission"]["served_degraded"] == 1
+    assert stats["admission"]["rejected"] == 1
+
+
+def test_saturated_stream_quote_is_answered(monkeypatch):
+    monkeypatch.setattr(main, "admission", saturated(degraded=False))
+    with TestClient(main.app) as client:
+        with client.websocket_connect("/delivery_fee/stream") as websocket:
+            websocket.send_json({"id": "q-1", "order": PAYLOAD})
+            reply = websocket.receive_json()
+    assert reply["id"] == "q-1"
+    assert reply["status_code"] == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert reply["retry_after"] == 3
+
+
+def test_admitted_requests_release_their_slot(monkeypatch):
+    admission = AdmissionController(1, 0.05)
+    monkeypatch.setattr(main, "admission", admission)
+    with TestClient(main.app) as client:
+        for _ in range(3):
+            response = client.post(API_ENDPOINT, json=PAYLOAD)
+            assert response.status_code == status.HTTP_200_OK
+    stats = admission.snapshot()
+    assert (stats["admitted"], stats["in_flight"]) == (3, 0)
+
+
+def test_degraded_mode_does_not_reload_files(tmp_path, monkeypatch):
+    path = tmp_path / "experiment.json"
+    arms = [{"name": "control", "weight": 1, "rules": {}}]
+    path.write_text(json.dumps({"name": "exp", "salt": "s1", "arms": arms}))
+    experiment = ReloadingFile(str(path), load_experiment, interval=0)
+    monkeypatch.setattr(main, "experiment", experiment)
+    order = {**PAYLOAD, "customer_id": "c-1"}
+    with TestClient(main.app) as client:
+        assert client.post(API_ENDPOINT, json=order).status_code == status.HTTP_200_OK
+
+        def reload() -> None:
+            raise AssertionError("reloaded on the event loop")
+
+        monkeypatch.setattr(experiment, "reload", reload)
+        monkeypatch.setattr(main, "admission", saturated(degraded=True))
+        response = client.post(API_ENDPOINT, json=order)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers[HeaderNames.EXPERIMENT_ARM] == "control"
+    assert response.headers[HeaderNames.DEGRADED] == "cache"
@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+from app import main
+from app.audit import AuditLog, read_records
+from app.constants import OrderConstants
+from tests.conftest import API_ENDPOINT
+
+
+def test_quotes_are_audited(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "audit_log", AuditLog(str(tmp_path)))
+    payload = {
+        "cart_value": 790,
+        "delivery_distance": 2235,
+        "number_of_items": 4,
+        "time": "2024-01-15T13:00:00Z",
+    }
+    with TestClient(main.app) as client:
+        client.post(API_ENDPOINT, json=payload)
+        with client.websocket_connect(API_ENDPOINT + "/stream") as websocket:
+            websocket.send_json({"id": 1, "order": payload})
+            websocket.receive_json()
+
+    records = list(read_records([str(tmp_path)]))
+    assert len(records) == 2
+    assert all(record["order"] == payload for record in records)
+    assert all(record["delivery_fee"] == 710 for record in records)
+    assert all(
+        record["rules_version"] == OrderConstants.RULES_VERSION for record in records
+    )
+
+
+def test_calendar_multiplier_is_audited(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "audit_log", AuditLog(str(tmp_path)))
+    monkeypatch.setattr(main, "calendar_multiplier", lambda time, region=None: 1.5)
+    payload = {
+        "cart_value": 790,
+        "delivery_distance": 2235,
+        "number_of_items": 4,
+        "time": "2024-12-24T13:00:00Z",
+    }
+    with TestClient(main.app) as client:
+        fee = client.post(API_ENDPOINT, json=payload).json()["delivery_fee"]
+
+    (record,) = read_records([str(tmp_path)])
+    assert record["calendar"] == 1.5
+    assert record["delivery_fee"] == fee == 1065
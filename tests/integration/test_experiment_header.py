@@ -0,0 +1,75 @@
+import json
+from fastapi.testclient import TestClient
+from app import main
+from app.constants import HeaderNames, OrderConstants
+from app.experiments import load_experiment
+from app.reloader import ReloadingFile
+from app.shadow import ShadowPricer
+from tests.conftest import API_ENDPOINT
+
+
+PAYLOAD: dict = {
+    "cart_value": 1000,
+    "delivery_distance": 2235,
+    "number_of_items": 4,
+    "time": "2024-01-15T13:00:00Z",
+}
+
+
+def test_experiment_arm_pricing(tmp_path, monkeypatch):
+    path = tmp_path / "experiment.json"
+    arms = [{"name": "expensive", "weight": 1, "rules": {"DISTANCE_HALF_KM_FEE": 200}}]
+    path.write_text(json.dumps({"name": "exp", "salt": "s1", "arms": arms}))
+    monkeypatch.setattr(main, "experiment", ReloadingFile(str(path), load_experiment))
+
+    with TestClient(main.app) as client:
+        response = client.post(API_ENDPOINT, json={**PAYLOAD, "customer_id": "c-1"})
+        assert response.headers[HeaderNames.EXPERIMENT_ARM] == "expensive"
+        assert response.json() == {"delivery_fee": 800}
+
+        response = client.post(API_ENDPOINT, json=PAYLOAD)
+        assert HeaderNames.EXPERIMENT_ARM not in response.headers
+        assert response.json() == {"delivery_fee": 500}
+
+
+def test_no_experiment_running():
+    with TestClient(main.app) as client:
+        response = client.post(API_ENDPOINT, json={**PAYLOAD, "customer_id": "c-1"})
+    assert HeaderNames.EXPERIMENT_ARM not in response.headers
+    assert response.json() == {"delivery_fee": 500}
+
+
+def test_only_production_quotes_are_shadow_priced(tmp_path, monkeypatch):
+    path = tmp_path / "experiment.json"
+    arms = [{"name": "expensive", "weight": 1, "rules": {"DISTANCE_HALF_KM_FEE": 200}}]
+    path.write_text(json.dumps({"name": "exp", "salt": "s1", "arms": arms}))
+    monkeypatch.setattr(main, "experiment", ReloadingFile(str(path), load_experiment))
+    monkeypatch.setattr(main, "shadow_pricer", ShadowPricer({"same": OrderConstants()}))
+
+    with TestClient(main.app) as client:
+        client.post(API_ENDPOINT, json={**PAYLOAD, "customer_id": "c-1"})
+        client.post(API_ENDPOINT, json=PAYLOAD)
+        stats = client.get("/stats/shadow").json()
+    assert stats["candidates"]["same"]["quotes"] == 1
+    assert stats["candidates"]["same"]["changed"] == 0
+
+
+def test_reloaded_arm_rules_are_not_served_from_cache(tmp_path, monkeypatch):
+    path = tmp_path / "experiment.json"
+
+    def write_arm(half_km_fee: int) -> None:
+        rules = {"DISTANCE_HALF_KM_FEE": half_km_fee}
+        arms = [{"name": "arm", "weight": 1, "rules": rules}]
+        path.write_text(json.dumps({"name": "exp", "salt": "s1", "arms": arms}))
+
+    write_arm(200)
+    experiment = ReloadingFile(str(path), load_experiment, interval=0)
+    monkeypatch.setattr(main, "experiment", experiment)
+    with TestClient(main.app) as client:
+        response = client.post(API_ENDPOINT, json={**PAYLOAD, "customer_id": "c-1"})
+        assert response.json() == {"delivery_fee": 800}
+
+        write_arm(50)
+        experiment.reload()
+        response = client.post(API_ENDPOINT, json={**PAYLOAD, "customer_id": "c-1"})
+        assert response.json() == {"delivery_fee": 350}
@@ -0,0 +1,111 @@
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from fastapi import status
+from app import main
+from app.constants import HeaderNames
+from app.experiments import load_experiment
+from app.main import app
+from app.reloader import ReloadingFile
+from app.surge import SurgePricing
+from tests.conftest import API_ENDPOINT
+
+
+INSIGHTS_ENDPOINT: str = "/delivery_fee/insights"
+
+ORDER: dict = {
+    "cart_value": 790,
+    "delivery_distance": 2235,
+    "number_of_items": 4,
+    "time": "2024-01-15T13:00:00Z",
+}
+
+
+def test_thresholds():
+    with TestClient(app) as client:
+        response = client.post(INSIGHTS_ENDPOINT, json=ORDER)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "delivery_fee": 710,
+        "add_for_free_delivery": 19210,
+        "add_for_no_cart_surcharge": 210,
+        "items_with_bulk_fee": 13,
+        "items_until_bulk_fee": 8,
+        "next_distance_step": 2501,
+        "fee_at_next_distance_step": 810,
+        "curves": {},
+    }
+
+
+def test_requested_curves():
+    with TestClient(app) as client:
+        response = client.post(
+            INSIGHTS_ENDPOINT + "?vary=number_of_items&vary=delivery_distance",
+            json=ORDER,
+        )
+    assert response.status_code == status.HTTP_200_OK
+    curves = response.json()["curves"]
+    assert set(curves) == {"number_of_items", "delivery_distance"}
+    assert curves["number_of_items"][0] == {"start": 1, "end": 4, "delivery_fee": 710}
+    assert curves["delivery_distance"][-1]["end"] is None
+
+
+def test_unknown_curve():
+    with TestClient(app) as client:
+        response = client.post(INSIGHTS_ENDPOINT + "?vary=time", json=ORDER)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_invalid_order():
+    with TestClient(app) as client:
+        response = client.post(INSIGHTS_ENDPOINT, json={**ORDER, "time": "yesterday"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    "vary, first", [("cart_value", 0), ("delivery_distance", 0), ("number_of_items", 1)]
+)
+def test_curves_of_free_delivery_order(vary: str, first: int):
+    with TestClient(app) as client:
+        response = client.post(
+            f"{INSIGHTS_ENDPOINT}?vary={vary}", json={**ORDER, "cart_value": 25000}
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["delivery_fee"] == 0
+    segments = response.json()["curves"][vary]
+    assert segments[0]["start"] == first
+    assert segments[-1] == {
+        "start": segments[-1]["start"],
+        "end": None,
+        "delivery_fee": 0,
+    }
+    if vary != "cart_value":
+        assert len(segments) == 1
+
+
+def test_insights_follow_the_experiment_arm(tmp_path, monkeypatch):
+    path = tmp_path / "experiment.json"
+    arms = [{"name": "cheap", "weight": 1, "rules": {"FREE_DELIVERY_CART_VALUE": 5000}}]
+    path.write_text(json.dumps({"name": "exp", "salt": "s1", "arms": arms}))
+    monkeypatch.setattr(main, "experiment", ReloadingFile(str(path), load_experiment))
+    order = {**ORDER, "customer_id": "c-1"}
+    with TestClient(app) as client:
+        fee = client.post(API_ENDPOINT, json=order).json()["delivery_fee"]
+        response = client.post(INSIGHTS_ENDPOINT, json=order)
+    assert response.headers[HeaderNames.EXPERIMENT_ARM] == "cheap"
+    assert response.json()["delivery_fee"] == fee
+    assert response.json()["add_for_free_delivery"] == 5000 - 790
+
+
+def test_insights_apply_the_surge_without_counting_demand(monkeypatch):
+    surge = SurgePricing([(1, 1.5)], window_seconds=60)
+    surge.record("helsinki")
+    surge.aggregate()
+    monkeypatch.setattr(main, "surge_pricing", surge)
+    order = {**ORDER, "region": "helsinki"}
+    with TestClient(app) as client:
+        insights = client.post(INSIGHTS_ENDPOINT, json=order).json()
+        assert surge._counters["helsinki"].total(time.time()) == 1
+        fee = client.post(API_ENDPOINT, json=order).json()["delivery_fee"]
+    assert insights["delivery_fee"] == fee == 1065
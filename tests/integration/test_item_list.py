@@ -0,0 +1,78 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from app.main import app
+from tests.conftest import API_ENDPOINT
+
+
+PAYLOAD: dict = {
+    "cart_value": 1000,
+    "delivery_distance": 1000,
+    "time": "2024-01-15T13:00:00Z",
+}
+
+
+def test_item_list_is_priced():
+    items = [
+        {"quantity": 3, "weight": 4000, "volume": "large"},
+        {"quantity": 3, "weight": 100},
+    ]
+    with TestClient(app) as client:
+        response = client.post(API_ENDPOINT, json={**PAYLOAD, "items": items})
+    # 200 distance + 2 extra items * 50 + 12.3 kg, one started 5 kg step + 3 large items
+    assert response.json() == {"delivery_fee": 200 + 100 + 100 + 150}
+
+
+def test_item_list_changes_the_cached_fee():
+    light = [{"quantity": 2, "weight": 100}]
+    heavy = [{"quantity": 2, "weight": 8000}]
+    with TestClient(app) as client:
+        first = client.post(API_ENDPOINT, json={**PAYLOAD, "items": light})
+        second = client.post(API_ENDPOINT, json={**PAYLOAD, "items": heavy})
+    assert first.json() == {"delivery_fee": 200}
+    assert second.json() == {"delivery_fee": 400}
+
+
+def test_thousands_of_lines():
+    items = [{"quantity": 1, "weight": 10, "volume": "medium"}] * 5000
+    with TestClient(app) as client:
+        response = client.post(API_ENDPOINT, json={**PAYLOAD, "items": items})
+    assert response.json() == {"delivery_fee": 1500}
+
+
+def test_mismatching_item_count():
+    with TestClient(app) as client:
+        response = client.post(
+            API_ENDPOINT,
+            json={**PAYLOAD, "number_of_items": 2, "items": [{"quantity": 3}]},
+        )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_invalid_item_line():
+    with TestClient(app) as client:
+        response = client.post(
+            API_ENDPOINT, json={**PAYLOAD, "items": [{"quantity": 1}, {"quantity": -1}]}
+        )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert any("items" in error["loc"] for error in response.json()["detail"])
+
+
+@pytest.mark.parametrize("volume", [["x"], {"a": 1}, 3, None])
+def test_volume_of_wrong_type(volume):
+    with TestClient(app) as client:
+        response = client.post(
+            API_ENDPOINT,
+            json={**PAYLOAD, "items": [{"quantity": 1, "volume": volume}]},
+        )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert [error["loc"] for error in response.json()["detail"]] == [["body", "items"]]
+
+
+def test_item_list_schema():
+    with TestClient(app) as client:
+        schema = client.get("/openapi.json").json()
+    items = schema["components"]["schemas"]["Order"]["properties"]["items"]
+    line = items["anyOf"][0]["items"]
+    assert line["required"] == ["quantity"]
+    assert set(line["properties"]) == {"quantity", "weight", "volume"}
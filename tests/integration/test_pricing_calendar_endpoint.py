@@ -0,0 +1,86 @@
+import json
+from fastapi.testclient import TestClient
+from app import main
+from app.constants import OrderConstants
+from app.pricing_calendar import load_calendar
+from app.reloader import ReloadingFile
+from app.shadow import ShadowPricer
+from tests.conftest import API_ENDPOINT
+
+
+PAYLOAD: dict = {
+    "cart_value": 1000,
+    "delivery_distance": 2235,
+    "number_of_items": 4,
+    "time": "2024-12-24T16:00:00Z",
+}
+
+CALENDAR: dict = {
+    "events": [
+        {
+            "name": "christmas-eve",
+            "start": "2024-12-24T12:00:00+02:00",
+            "end": "2024-12-25T00:00:00+02:00",
+            "multiplier": 1.5,
+        },
+        {
+            "name": "helsinki-eve",
+            "start": "2024-12-24T12:00:00+02:00",
+            "end": "2024-12-25T00:00:00+02:00",
+            "multiplier": 1.8,
+            "regions": ["helsinki"],
+        },
+    ]
+}
+
+
+def use_calendar(tmp_path, monkeypatch, calendar: dict = CALENDAR) -> None:
+    path = tmp_path / "calendar.json"
+    path.write_text(json.dumps(calendar))
+    monkeypatch.setattr(
+        main, "pricing_calendar", ReloadingFile(str(path), load_calendar)
+    )
+
+
+def test_calendar_multiplier_applies(tmp_path, monkeypatch):
+    use_calendar(tmp_path, monkeypatch)
+    with TestClient(main.app) as client:
+        holiday = client.post(API_ENDPOINT, json=PAYLOAD)
+        regional = client.post(API_ENDPOINT, json={**PAYLOAD, "region": "helsinki"})
+        normal = client.post(
+            API_ENDPOINT, json={**PAYLOAD, "time": "2024-12-23T16:00:00Z"}
+        )
+    assert holiday.json() == {"delivery_fee": 750}
+    assert regional.json() == {"delivery_fee": 900}
+    assert normal.json() == {"delivery_fee": 500}
+
+
+def test_calendar_applies_to_ranking(tmp_path, monkeypatch):
+    use_calendar(tmp_path, monkeypatch)
+    ranking = {
+        "cart_value": 1000,
+        "number_of_items": 4,
+        "time": PAYLOAD["time"],
+        "venues": [{"id": "a", "delivery_distance": 2235}],
+    }
+    with TestClient(main.app) as client:
+        response = client.post("/delivery_fee/rank", json=ranking)
+    assert response.json()["venues"][0]["delivery_fee"] == 750
+
+
+def test_calendar_is_not_served_from_cache_of_other_region(tmp_path, monkeypatch):
+    use_calendar(tmp_path, monkeypatch)
+    with TestClient(main.app) as client:
+        client.post(API_ENDPOINT, json=PAYLOAD)
+        response = client.post(API_ENDPOINT, json={**PAYLOAD, "region": "helsinki"})
+    assert response.json() == {"delivery_fee": 900}
+
+
+def test_shadow_pricer_gets_the_calendar_multiplier(tmp_path, monkeypatch):
+    use_calendar(tmp_path, monkeypatch)
+    monkeypatch.setattr(main, "shadow_pricer", ShadowPricer({"same": OrderConstants()}))
+    with TestClient(main.app) as client:
+        client.post(API_ENDPOINT, json=PAYLOAD)
+        stats = client.get("/stats/shadow").json()
+    assert stats["candidates"]["same"]["quotes"] == 1
+    assert stats["candidates"]["same"]["changed"] == 0
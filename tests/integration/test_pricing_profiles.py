@@ -0,0 +1,69 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app import main
+from app.constants import HeaderNames
+from app.pricing_profiles import PricingProfiles, load_profiles
+from tests.conftest import API_ENDPOINT
+
+
+PROFILES: dict = {
+    "sweden": {
+        "regions": ["stockholm"],
+        "rules": {
+            "CURRENCY": "SEK",
+            "MAX_DELIVERY_FEE": 15000,
+            "FREE_DELIVERY_CART_VALUE": 200000,
+            "MIN_CART_VALUE_NO_SURCHARGE": 10000,
+            "DISTANCE_STARTING_FEE": 2000,
+            "DISTANCE_HALF_KM_FEE": 1000,
+            "ADDITIONAL_FEE_PER_ITEM": 500,
+            "ITEMS_BULK_FEE": 1200,
+            "ROUNDING_MODE": "half_up",
+            "ROUNDING_STEP": 100,
+        },
+    },
+}
+
+PAYLOAD: dict = {
+    "cart_value": 9950,
+    "delivery_distance": 2235,
+    "number_of_items": 4,
+    "time": "2024-01-19T16:00:00Z",
+}
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps(PROFILES))
+    monkeypatch.setattr(main, "pricing_profiles", load_profiles(str(path)))
+
+
+def test_profile_prices_in_its_currency(profiles):
+    with TestClient(main.app) as client:
+        sek = client.post(API_ENDPOINT, json={**PAYLOAD, "region": "stockholm"})
+        eur = client.post(API_ENDPOINT, json={**PAYLOAD, "region": "helsinki"})
+    # (50 + 2000 + 3 * 1000) * 1.2 = 6060 ore, rounded to whole kronor
+    assert sek.json() == {"delivery_fee": 6100}
+    assert sek.headers[HeaderNames.CURRENCY] == "SEK"
+    assert eur.json() == {"delivery_fee": 600}
+    assert HeaderNames.CURRENCY not in eur.headers
+
+
+def test_stream_reply_names_the_currency(profiles):
+    with TestClient(main.app) as client:
+        with client.websocket_connect("/delivery_fee/stream") as websocket:
+            websocket.send_json({"id": 1, "order": {**PAYLOAD, "region": "stockholm"}})
+            reply = websocket.receive_json()
+    assert reply == {"id": 1, "delivery_fee": 6100, "currency": "SEK"}
+
+
+def test_region_in_two_profiles():
+    with pytest.raises(ValueError):
+        PricingProfiles(
+            {
+                "a": {"regions": ["stockholm"], "rules": {}},
+                "b": {"regions": ["stockholm"], "rules": {}},
+            }
+        )
@@ -0,0 +1,129 @@
+import json
+from fastapi.testclient import TestClient
+from fastapi import status
+from app import main, stream
+from app.main import app
+from app.constants import ErrorMessages, StreamConstants
+
+
+STREAM_ENDPOINT: str = "/delivery_fee/stream"
+
+
+def order(cart_value: int = 790, time: str = "2024-01-15T13:00:00Z") -> dict:
+    return {
+        "cart_value": cart_value,
+        "delivery_distance": 2235,
+        "number_of_items": 4,
+        "time": time,
+    }
+
+
+def test_single_quote():
+    with TestClient(app) as client:
+        with client.websocket_connect(STREAM_ENDPOINT) as websocket:
+            websocket.send_json({"id": "q-1", "order": order()})
+            assert websocket.receive_json() == {"id": "q-1", "delivery_fee": 710}
+
+
+def test_pipelined_quotes_are_correlated():
+    """Send more quotes than the in-flight limit before reading any reply."""
+    count: int = StreamConstants.MAX_IN_FLIGHT * 3
+    with TestClient(app) as client:
+        with client.websocket_connect(STREAM_ENDPOINT) as websocket:
+            for i in range(count):
+                websocket.send_json({"id": i, "order": order(cart_value=i)})
+            replies = [websocket.receive_json() for _ in range(count)]
+    fees = {reply["id"]: reply["delivery_fee"] for reply in replies}
+    assert fees == {i: 1000 - i + 500 for i in range(count)}
+
+
+def test_invalid_time_matches_http_endpoint():
+    with TestClient(app) as client:
+        with client.websocket_connect(STREAM_ENDPOINT) as websocket:
+            websocket.send_json(
+                {"id": "bad", "order": order(time="24-01-26T16:30:45Z")}
+            )
+            reply = websocket.receive_json()
+    assert reply["id"] == "bad"
+    assert reply["status_code"] == status.HTTP_400_BAD_REQUEST
+    assert ErrorMessages.INVALID_TIME_FORMAT in reply["detail"]
+
+
+def test_invalid_order_fields():
+    with TestClient(app) as client:
+        with client.websocket_connect(STREAM_ENDPOINT) as websocket:
+            websocket.send_json({"id": 7, "order": order(cart_value=-1)})
+            reply = websocket.receive_json()
+    assert reply["id"] == 7
+    assert reply["status_code"] == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert any("cart_value" in error["loc"] for error in reply["detail"])
+
+
+def test_malformed_message_keeps_connection_open():
+    with TestClient(app) as client:
+        with client.websocket_connect(STREAM_ENDPOINT) as websocket:
+            websocket.send_text("not json")
+            reply = websocket.receive_json()
+            assert reply["status_code"] == status.HTTP_422_UNPROCESSABLE_ENTITY
+            assert reply["detail"] == ErrorMessages.INVALID_STREAM_MESSAGE
+
+            websocket.send_text(json.dumps({"id": "next", "order": order()}))
+            assert websocket.receive_json() == {"id": "next", "delivery_fee": 710}
+
+
+def test_binary_frame_is_rejected():
+    with TestClient(app) as client:
+        with client.websocket_connect(STREAM_ENDPOINT) as websocket:
+            websocket.send_bytes(json.dumps({"id": "b", "order": order()}).encode())
+            reply = websocket.receive_json()
+            assert reply["status_code"] == status.HTTP_422_UNPROCESSABLE_ENTITY
+            assert reply["detail"] == ErrorMessages.INVALID_STREAM_MESSAGE
+
+            websocket.send_json({"id": "next", "order": order()})
+            assert websocket.receive_json() == {"id": "next", "delivery_fee": 710}
+
+
+def test_pricing_error_is_answered(monkeypatch):
+    def failing_quote(order_data):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main, "quote_order", failing_quote)
+    with TestClient(app) as client:
+        with client.websocket_connect(STREAM_ENDPOINT) as websocket:
+            websocket.send_json({"id": "q-1", "order": order()})
+            reply = websocket.receive_json()
+    assert reply == {
+        "id": "q-1",
+        "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+        "detail": ErrorMessages.QUOTE_FAILED,
+    }
+
+
+def test_validation_error_is_answered(monkeypatch):
+    def failing_validation(data):
+        raise TypeError("unhashable type")
+
+    monkeypatch.setattr(stream.Order, "model_validate", failing_validation)
+    with TestClient(app) as client:
+        with client.websocket_connect(STREAM_ENDPOINT) as websocket:
+            websocket.send_json({"id": "q-1", "order": order()})
+            reply = websocket.receive_json()
+    assert reply["id"] == "q-1"
+    assert reply["status_code"] == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+def test_admission_error_is_answered(monkeypatch):
+    class BrokenAdmission:
+        async def acquire(self):
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(main, "admission", BrokenAdmission())
+    with TestClient(app) as client:
+        with client.websocket_connect(STREAM_ENDPOINT) as websocket:
+            websocket.send_json({"id": "q-2", "order": order()})
+            reply = websocket.receive_json()
+    assert reply == {
+        "id": "q-2",
+        "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+        "detail": ErrorMessages.QUOTE_FAILED,
+    }
@@ -0,0 +1,88 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+from app import main
+from app.constants import ErrorMessages, HeaderNames
+from app.rate_limit import RateLimiter
+from tests.conftest import API_ENDPOINT
+
+
+PAYLOAD: dict = {
+    "cart_value": 790,
+    "delivery_distance": 2235,
+    "number_of_items": 4,
+    "time": "2024-01-15T13:00:00Z",
+}
+
+
+def test_over_limit_requests_get_429(monkeypatch):
+    monkeypatch.setattr(main, "rate_limiter", RateLimiter(rate=0.1, burst=2))
+    team_a = {HeaderNames.API_KEY: "team-a"}
+    with TestClient(main.app) as client:
+        responses = [
+            client.post(API_ENDPOINT, json=PAYLOAD, headers=team_a) for _ in range(3)
+        ]
+        other = client.post(
+            API_ENDPOINT, json=PAYLOAD, headers={HeaderNames.API_KEY: "b"}
+        )
+        stats = client.get("/stats/admission", headers=team_a)
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[2].headers["Retry-After"] == "10"
+    assert other.status_code == status.HTTP_200_OK
+    assert stats.status_code == status.HTTP_200_OK
+
+
+def test_rejected_before_validation(monkeypatch):
+    monkeypatch.setattr(main, "rate_limiter", RateLimiter(rate=0.1, burst=1))
+    with TestClient(main.app) as client:
+        first = client.post(API_ENDPOINT, content=b"not json")
+        second = client.post(API_ENDPOINT, content=b"not json")
+    assert first.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+def test_client_stats(monkeypatch):
+    monkeypatch.setattr(main, "rate_limiter", RateLimiter(rate=0.1, burst=1))
+    monkeypatch.setattr(main.settings, "admin_token", "secret")
+    admin = {HeaderNames.ADMIN_TOKEN: "secret"}
+    with TestClient(main.app) as client:
+        for _ in range(2):
+            client.post(API_ENDPOINT, json=PAYLOAD, headers={HeaderNames.API_KEY: "a"})
+        forbidden = client.get("/stats/clients")
+        stats = client.get("/stats/clients", headers=admin).json()
+    assert forbidden.status_code == status.HTTP_403_FORBIDDEN
+    assert stats["clients"]["a"]["allowed"] == 1
+    assert stats["clients"]["a"]["rejected"] == 1
+
+
+def test_client_stats_without_rate_limiting(monkeypatch):
+    monkeypatch.setattr(main.settings, "admin_token", "secret")
+    with TestClient(main.app) as client:
+        response = client.get(
+            "/stats/clients", headers={HeaderNames.ADMIN_TOKEN: "secret"}
+        )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_stream_messages_are_rate_limited(monkeypatch):
+    monkeypatch.setattr(main, "rate_limiter", RateLimiter(rate=0.1, burst=2))
+    with TestClient(main.app) as client:
+        with client.websocket_connect(
+            API_ENDPOINT + "/stream", headers={HeaderNames.API_KEY: "team-a"}
+        ) as websocket:
+            for request_id in range(3):
+                websocket.send_json({"id": request_id, "order": PAYLOAD})
+            replies = {
+                reply["id"]: reply
+                for reply in [websocket.receive_json() for _ in range(3)]
+            }
+        response = client.post(
+            API_ENDPOINT, json=PAYLOAD, headers={HeaderNames.API_KEY: "team-a"}
+        )
+    assert replies[0]["delivery_fee"] == replies[1]["delivery_fee"] == 710
+    assert replies[2] == {
+        "id": 2,
+        "status_code": status.HTTP_429_TOO_MANY_REQUESTS,
+        "detail": ErrorMessages.RATE_LIMITED,
+        "retry_after": 10,
+    }
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
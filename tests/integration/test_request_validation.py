@@ -176,3 +176,18 @@ def test_invalid_data_types(payload):
         response = client.post(API_ENDPOINT, json=payload)
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
         assert any("integer" in error["msg"] for error in response.json()["detail"])
+
+
+def test_errors_are_reported_once():
+    with TestClient(app) as client:
+        response = client.post(
+            API_ENDPOINT,
+            json={
+                "cart_value": -1,
+                "delivery_distance": 1000,
+                "number_of_items": 1,
+                "time": "2024-01-15T13:00:00Z",
+            },
+        )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert len(response.json()["detail"]) == 1
@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+from fastapi import status
+from app import main
+from app.rules import rules_from_overrides
+from app.shadow import ShadowPricer
+from tests.conftest import API_ENDPOINT
+
+
+def test_shadow_stats_disabled():
+    with TestClient(main.app) as client:
+        response = client.get("/stats/shadow")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_response_uses_production_rules(monkeypatch):
+    candidate = rules_from_overrides({"RUSH_HOUR_MULTIPLIER": 2.0})
+    monkeypatch.setattr(main, "shadow_pricer", ShadowPricer({"double": candidate}))
+    payload = {
+        "cart_value": 1000,
+        "delivery_distance": 500,
+        "number_of_items": 4,
+        "time": "2024-01-26T16:00:00Z",
+    }
+    with TestClient(main.app) as client:
+        response = client.post(API_ENDPOINT, json=payload)
+        assert response.json() == {"delivery_fee": 240}
+    with TestClient(main.app) as client:
+        stats = client.get("/stats/shadow").json()
+    assert stats["candidates"]["double"]["quotes"] == 1
+    assert stats["candidates"]["double"]["delta_total"] == 400 - 240
@@ -0,0 +1,64 @@
+import socket
+from fastapi.testclient import TestClient
+from fastapi import status
+from app import main
+from app.quote_cache import QuoteCache
+from app.resp_server import RespServer
+from app.shared_cache import ConnectionPool, SharedQuoteCache
+from tests.conftest import API_ENDPOINT
+
+
+PAYLOAD: dict = {
+    "cart_value": 790,
+    "delivery_distance": 2235,
+    "number_of_items": 4,
+    "time": "2024-01-15T13:00:00Z",
+}
+
+
+def replica(monkeypatch, url: str) -> None:
+    """Give the app the empty in-process cache of a freshly started replica."""
+    monkeypatch.setattr(main, "quote_cache", QuoteCache(100))
+    monkeypatch.setattr(
+        main,
+        "shared_cache",
+        SharedQuoteCache(ConnectionPool(url, 2, 0.5), retry_interval=60),
+    )
+
+
+def test_new_replica_is_warmed_by_shared_cache(monkeypatch):
+    server = RespServer()
+    server.start()
+    try:
+        replica(monkeypatch, server.url)
+        with TestClient(main.app) as client:
+            assert client.post(API_ENDPOINT, json=PAYLOAD).json() == {
+                "delivery_fee": 710
+            }
+
+        replica(monkeypatch, server.url)
+        monkeypatch.setattr(main, "calculate_delivery_fee", None)
+        with TestClient(main.app) as client:
+            response = client.post(API_ENDPOINT, json=PAYLOAD)
+            stats = client.get("/stats/admission").json()
+    finally:
+        server.stop()
+    assert response.json() == {"delivery_fee": 710}
+    assert stats["shared_cache"]["hits"] == 1
+    assert stats["quote_cache"]["size"] == 1
+
+
+def test_failing_shared_cache_falls_back_to_computing(monkeypatch):
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]
+    replica(monkeypatch, f"redis://127.0.0.1:{port}")
+    with TestClient(main.app) as client:
+        for cart_value in (790, 791):
+            response = client.post(
+                API_ENDPOINT, json={**PAYLOAD, "cart_value": cart_value}
+            )
+            assert response.status_code == status.HTTP_200_OK
+        stats = client.get("/stats/admission").json()
+    assert stats["shared_cache"]["errors"] == 1
+    assert stats["shared_cache"]["available"] is False
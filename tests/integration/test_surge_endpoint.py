@@ -0,0 +1,40 @@
+from fastapi.testclient import TestClient
+from fastapi import status
+from app import main
+from app.surge import SurgePricing
+from tests.conftest import API_ENDPOINT
+
+
+PAYLOAD: dict = {
+    "cart_value": 1000,
+    "delivery_distance": 500,
+    "number_of_items": 4,
+    "time": "2024-01-15T13:00:00Z",
+    "region": "helsinki",
+}
+
+
+def test_surge_stats_disabled():
+    with TestClient(main.app) as client:
+        response = client.get("/stats/surge")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_demand_raises_the_fee(monkeypatch):
+    surge = SurgePricing([(3, 1.5)], window_seconds=60, aggregation_interval=3600)
+    monkeypatch.setattr(main, "surge_pricing", surge)
+    with TestClient(main.app) as client:
+        for _ in range(3):
+            assert client.post(API_ENDPOINT, json=PAYLOAD).json() == {
+                "delivery_fee": 200
+            }
+        surge.aggregate()
+        assert client.post(API_ENDPOINT, json=PAYLOAD).json() == {"delivery_fee": 300}
+
+        other_region = {**PAYLOAD, "region": "espoo"}
+        assert client.post(API_ENDPOINT, json=other_region).json() == {
+            "delivery_fee": 200
+        }
+        stats = client.get("/stats/surge").json()
+    assert stats["multipliers"] == {"helsinki": 1.5}
+    assert stats["local_window_counts"] == {"helsinki": 4, "espoo": 1}
@@ -0,0 +1,61 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app import main
+from app.capture import TrafficCapture
+from app.replay import main as replay_main
+from tests.conftest import API_ENDPOINT
+
+
+PAYLOAD: dict = {
+    "cart_value": 790,
+    "delivery_distance": 2235,
+    "number_of_items": 4,
+    "time": "2024-01-15T13:00:00Z",
+}
+
+
+def capture_traffic(monkeypatch, path, sample_rate: float = 1.0) -> None:
+    monkeypatch.setattr(main, "traffic_capture", TrafficCapture(str(path), sample_rate))
+    with TestClient(main.app) as client:
+        for cart_value in range(780, 800):
+            client.post(API_ENDPOINT, json={**PAYLOAD, "cart_value": cart_value})
+        client.post(API_ENDPOINT, json={**PAYLOAD, "time": "yesterday"})
+        client.get("/stats/admission")
+
+
+def test_requests_are_captured(tmp_path, monkeypatch):
+    path = tmp_path / "capture.jsonl"
+    capture_traffic(monkeypatch, path)
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 21
+    assert records[0]["body"] == {**PAYLOAD, "cart_value": 780}
+    assert (records[0]["status"], records[0]["response"]) == (
+        200,
+        {"delivery_fee": 720},
+    )
+    assert records[-1]["status"] == 400
+    assert all(record["latency_ms"] >= 0 for record in records)
+
+
+def test_sampling(tmp_path, monkeypatch):
+    path = tmp_path / "capture.jsonl"
+    capture_traffic(monkeypatch, path, sample_rate=0.0)
+    assert path.read_text() == ""
+
+
+def test_replay_in_process(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "capture.jsonl"
+    capture_traffic(monkeypatch, path)
+    monkeypatch.setattr(main, "traffic_capture", None)
+
+    replay_main([str(path), "--speed", "0"])
+    report = json.loads(capsys.readouterr().out)
+    assert (report["requests"], report["mismatches"], report["errors"]) == (21, 0, 0)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    records[3]["response"]["delivery_fee"] += 1
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    with pytest.raises(SystemExit):
+        replay_main([str(path), "--speed", "0"])
+    assert json.loads(capsys.readouterr().out)["mismatches"] == 1
@@ -0,0 +1,74 @@
+from fastapi.testclient import TestClient
+from fastapi import status
+from app.main import app
+
+
+RANK_ENDPOINT: str = "/delivery_fee/rank"
+
+
+def test_cheapest_venues_first():
+    payload = {
+        "cart_value": 1000,
+        "number_of_items": 4,
+        "time": "2024-01-15T13:00:00Z",
+        "venues": [
+            {"id": "far", "delivery_distance": 3520},
+            {"id": "near", "delivery_distance": 800},
+            {"id": "very_far", "delivery_distance": 50000},
+            {"id": "also_near", "delivery_distance": 1000},
+        ],
+        "limit": 3,
+    }
+    with TestClient(app) as client:
+        response = client.post(RANK_ENDPOINT, json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "venues": [
+            {"id": "near", "delivery_distance": 800, "delivery_fee": 200},
+            {"id": "also_near", "delivery_distance": 1000, "delivery_fee": 200},
+            {"id": "far", "delivery_distance": 3520, "delivery_fee": 800},
+        ]
+    }
+
+
+def test_venues_by_coordinates():
+    payload = {
+        "cart_value": 1000,
+        "number_of_items": 4,
+        "time": "2024-01-15T13:00:00Z",
+        "latitude": 60.1710,
+        "longitude": 24.9414,
+        "venues": [
+            {"id": "espoo", "latitude": 60.2055, "longitude": 24.6559},
+            {"id": "cathedral", "latitude": 60.1703, "longitude": 24.9522},
+        ],
+        "limit": 1,
+    }
+    with TestClient(app) as client:
+        response = client.post(RANK_ENDPOINT, json=payload)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["venues"][0]["id"] == "cathedral"
+
+
+def test_coordinates_need_customer_location():
+    payload = {
+        "cart_value": 1000,
+        "number_of_items": 4,
+        "time": "2024-01-15T13:00:00Z",
+        "venues": [{"id": "espoo", "latitude": 60.2055, "longitude": 24.6559}],
+    }
+    with TestClient(app) as client:
+        response = client.post(RANK_ENDPOINT, json=payload)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_invalid_time():
+    payload = {
+        "cart_value": 1000,
+        "number_of_items": 4,
+        "time": "24-01-26T16:30:45Z",
+        "venues": [{"id": "a", "delivery_distance": 10}],
+    }
+    with TestClient(app) as client:
+        response = client.post(RANK_ENDPOINT, json=payload)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,176 @@
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+import pytest
+from app.settings import settings
+
+
+"""
+Performance budgets of the hot path, checked against tests/performance/baseline.json.
+
+Timings are the best of several repeats with the garbage collector off, and are
+compared after calibration: a fixed pure-Python reference loop is timed in
+runs alternating with the measured ones, and the recorded budget is scaled by
+how much faster or slower this machine runs it than the machine that recorded
+the baseline. A timing fails when it exceeds its scaled budget times the
+tolerance of the entry in each of three measurements. Allocations do not depend
+on the machine and are compared as they are.
+
+After an intended change in speed, record a new baseline with:
+
+    PERF_UPDATE_BASELINE=1 pytest tests/performance
+
+The tests are skipped under a tracer such as coverage, which slows the hot
+path and the reference loop by different amounts, and when TRACING is set,
+since the budgets are for the build production runs, without tracing spans.
+"""
+
+
+BASELINE_PATH: Path = Path(__file__).with_name("baseline.json")
+REFERENCE_ITERATIONS: int = 20000
+REPEATS: int = 7
+"""Measurements of a timing that must all exceed the budget for a test to fail."""
+ATTEMPTS: int = 3
+
+
+def _reference_loop(iterations: int) -> int:
+    """Integer arithmetic, comparisons and calls, the mix of the fee calculation."""
+    total: int = 0
+    for i in range(iterations):
+        total += min((i * 7 + 3) // 5 % 11, 9) if i & 1 else max(i % 13, 2)
+    return total
+
+
+def _ns_per_op(function: Callable[[int], object], number: int) -> float:
+    start: int = time.perf_counter_ns()
+    function(number)
+    return (time.perf_counter_ns() - start) / number
+
+
+def calibrated_ns(
+    function: Callable[[int], object], number: int, repeats: int = REPEATS
+) -> tuple[float, float]:
+    """Time function(number) and the reference loop in alternating runs.
+
+    Alternating keeps both timings under the same CPU frequency and load, so
+    their ratio stays steady on a noisy machine.
+
+    Returns:
+        tuple[float, float]: The fastest ns per operation of function and the
+        fastest ns per iteration of the reference loop.
+    """
+    enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        measured: list[float] = []
+        reference: list[float] = []
+        for _ in range(repeats):
+            reference.append(_ns_per_op(_reference_loop, REFERENCE_ITERATIONS))
+            measured.append(_ns_per_op(function, number))
+    finally:
+        if enabled:
+            gc.enable()
+    return min(measured), min(reference)
+
+
+def peak_bytes(function: Callable[[], object]) -> int:
+    """Return the peak memory function allocates on top of what is already traced."""
+    tracemalloc.start()
+    try:
+        before: int = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+def retained_bytes(function: Callable[[int], object], number: int) -> float:
+    """Return the memory still allocated after function(number), per operation."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before: int = tracemalloc.get_traced_memory()[0]
+        function(number)
+        gc.collect()
+        return (tracemalloc.get_traced_memory()[0] - before) / number
+    finally:
+        tracemalloc.stop()
+
+
+class Budgets:
+    """The baseline file, checking measurements against it or recording them."""
+
+    def __init__(self, path: Path, update: bool):
+        self.path = path
+        self.update = update
+        self.baseline: dict = json.loads(path.read_text())
+
+    def check_time(
+        self,
+        name: str,
+        function: Callable[[int], object],
+        number: int,
+        repeats: int = REPEATS,
+    ) -> None:
+        """Fail if function(number) takes longer per operation than the
+        calibrated budget of entry name in each of ATTEMPTS measurements.
+
+        A regression shows in every measurement, a burst of noise rarely in
+        all of them. A new baseline records the median of ATTEMPTS measurements.
+        """
+        entry: dict = self.baseline[name]
+        runs: list[tuple[float, float]] = []
+        for _ in range(ATTEMPTS):
+            measured, reference = calibrated_ns(function, number, repeats)
+            runs.append((measured, reference))
+            if self.update:
+                continue
+            scale: float = reference / entry["reference_ns"]
+            limit: float = entry["value"] * scale * entry["tolerance"]
+            if measured <= limit:
+                return
+        if self.update:
+            measured, reference = sorted(runs, key=lambda run: run[0] / run[1])[
+                ATTEMPTS // 2
+            ]
+            entry["value"] = round(measured, 1)
+            entry["reference_ns"] = round(reference, 2)
+            return
+        raise AssertionError(
+            f"{name}: {measured:.0f} ns/op, budget {limit:.0f} ns/op "
+            f"({entry['value']} ns/op x{scale:.2f} machine speed x{entry['tolerance']})"
+        )
+
+    def check_bytes(self, name: str, measured: float) -> None:
+        """Fail if measured bytes exceed the budget of entry name."""
+        entry: dict = self.baseline[name]
+        if self.update:
+            entry["value"] = round(measured)
+            return
+        limit: float = entry["value"] * entry["tolerance"] + entry.get("slack", 0)
+        assert (
+            measured <= limit
+        ), f"{name}: {measured:.0f} bytes, budget {limit:.0f} bytes"
+
+    def save(self) -> None:
+        """Write the recorded measurements."""
+        self.path.write_text(json.dumps(self.baseline, indent=2) + "\n")
+
+
+@pytest.fixture(scope="session")
+def budgets():
+    if sys.gettrace() is not None:
+        pytest.skip("Performance budgets are not checked under a tracer")
+    if settings.tracing:
+        pytest.skip("Performance budgets are not checked with TRACING set")
+    update: bool = os.environ.get("PERF_UPDATE_BASELINE") == "1"
+    budgets = Budgets(BASELINE_PATH, update)
+    yield budgets
+    if update:
+        budgets.save()
@@ -0,0 +1,94 @@
+import asyncio
+import json
+from app import main
+from app.delivery_fee import calculate_delivery_fee
+from app.models import Order
+from tests.conftest import API_ENDPOINT
+from tests.performance.conftest import peak_bytes, retained_bytes
+
+
+PAYLOAD: dict = {
+    "cart_value": 790,
+    "delivery_distance": 2235,
+    "number_of_items": 13,
+    "time": "2024-01-19T16:00:00Z",
+}
+BODY: bytes = json.dumps(PAYLOAD).encode()
+SCOPE: dict = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "POST",
+    "scheme": "http",
+    "path": API_ENDPOINT,
+    "raw_path": API_ENDPOINT.encode(),
+    "query_string": b"",
+    "root_path": "",
+    "headers": [
+        (b"host", b"testserver"),
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(BODY)).encode()),
+    ],
+    "client": ("127.0.0.1", 50000),
+    "server": ("testserver", 80),
+}
+
+
+async def post_order() -> int:
+    """Send one order through the whole ASGI app and return the response status."""
+    sent: bool = False
+    status: int = 0
+
+    async def receive() -> dict:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": BODY, "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await main.app(dict(SCOPE), receive, send)
+    return status
+
+
+async def post_orders(number: int) -> None:
+    for _ in range(number):
+        assert await post_order() == 200
+
+
+def test_calculate_delivery_fee(budgets):
+    order = Order(**PAYLOAD)
+
+    def run(number: int) -> None:
+        for _ in range(number):
+            calculate_delivery_fee(order)
+
+    assert not hasattr(calculate_delivery_fee, "__wrapped__")
+    run(1000)
+    budgets.check_time("calculate_delivery_fee_ns", run, 4000)
+    budgets.check_bytes("calculate_delivery_fee_peak_bytes", peak_bytes(lambda: run(1)))
+
+
+def test_delivery_fee_endpoint(budgets, monkeypatch):
+    """Every request computes its fee, as a miss of the quote cache does."""
+    monkeypatch.setattr(main, "quote_cache", None)
+    loop = asyncio.new_event_loop()
+
+    def run(number: int) -> None:
+        loop.run_until_complete(post_orders(number))
+
+    try:
+        run(200)
+        budgets.check_time("delivery_fee_endpoint_ns", run, 100)
+        budgets.check_bytes(
+            "delivery_fee_endpoint_peak_bytes", peak_bytes(lambda: run(1))
+        )
+        budgets.check_bytes(
+            "delivery_fee_endpoint_retained_bytes", retained_bytes(run, 500)
+        )
+    finally:
+        loop.close()
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from app.admission import AdmissionController
+from app.quote_cache import QuoteCache
+
+
+def test_concurrency_limit_under_load():
+    """Run more concurrent requests than the controller has slots."""
+    admission = AdmissionController(max_concurrency=2, queue_timeout=0.01)
+    running: list[int] = [0]
+    peak: list[int] = [0]
+
+    async def request():
+        for _ in range(5):
+            if await admission.acquire():
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+                await asyncio.sleep(0.02)
+                running[0] -= 1
+                admission.release()
+            else:
+                await asyncio.sleep(0.001)
+
+    async def load():
+        await asyncio.gather(*(request() for _ in range(8)))
+
+    asyncio.run(load())
+    stats = admission.snapshot()
+    assert peak[0] == 2
+    assert stats["in_flight"] == 0
+    assert stats["saturated"] > 0
+    assert stats["admitted"] + stats["saturated"] == 40
+    assert stats["queue_wait_seconds_max"] < 0.5
+
+
+def test_queue_timeout_fails_fast():
+    admission = AdmissionController(max_concurrency=1, queue_timeout=0.01)
+
+    async def scenario():
+        assert await admission.acquire()
+        start = time.perf_counter()
+        assert not await admission.acquire()
+        assert time.perf_counter() - start < 0.5
+        admission.release()
+        assert await admission.acquire()
+
+    asyncio.run(scenario())
+
+
+def test_queue_time_counts_from_arrival():
+    """A request that already waited the whole timeout before asking is rejected."""
+    admission = AdmissionController(max_concurrency=1, queue_timeout=0.05)
+
+    async def scenario():
+        assert await admission.acquire()
+        assert not await admission.acquire(time.monotonic() - 0.05)
+
+    asyncio.run(scenario())
+    assert admission.snapshot()["queue_wait_seconds_max"] >= 0.05
+
+
+def test_released_slot_goes_to_the_oldest_waiter():
+    admission = AdmissionController(max_concurrency=1, queue_timeout=1.0)
+    order: list[str] = []
+
+    async def request(name: str):
+        assert await admission.acquire()
+        order.append(name)
+        await asyncio.sleep(0.01)
+        admission.release()
+
+    async def scenario():
+        await asyncio.gather(*(request(name) for name in "abcd"))
+
+    asyncio.run(scenario())
+    assert order == list("abcd")
+    assert admission.snapshot()["in_flight"] == 0
+
+
+def test_quote_cache_evicts_least_recently_used():
+    cache = QuoteCache(capacity=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.snapshot() == {"size": 2, "hits": 2, "misses": 1}
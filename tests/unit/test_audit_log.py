@@ -0,0 +1,102 @@
+import gzip
+import os
+from app.audit import AuditLog, main, read_records
+from app.models import Order
+
+
+def make_order(cart_value: int = 790) -> Order:
+    return Order(
+        cart_value=cart_value,
+        delivery_distance=2235,
+        number_of_items=4,
+        time="2024-01-15T13:00:00Z",
+    )
+
+
+def test_records_are_written_in_order(tmp_path):
+    audit_log = AuditLog(str(tmp_path), batch_size=8)
+    audit_log.start()
+    for value in range(100):
+        audit_log.record(make_order(value), value, "test")
+    audit_log.stop()
+
+    records = list(read_records([str(tmp_path)]))
+    assert [record["delivery_fee"] for record in records] == list(range(100))
+    assert records[0]["order"]["cart_value"] == 0
+    assert records[0]["rules_version"] == "test"
+    assert audit_log.written == 100
+
+
+def test_overflow_drops_oldest_and_logs_the_gap(tmp_path):
+    """Without a running writer, the buffer keeps only the newest records."""
+    audit_log = AuditLog(str(tmp_path), buffer_size=10, batch_size=100)
+    for value in range(25):
+        audit_log.record(make_order(), value, "test")
+    audit_log.flush()
+    audit_log.stop()
+
+    records = list(read_records([str(tmp_path)]))
+    fees = [record["delivery_fee"] for record in records if "delivery_fee" in record]
+    assert fees == list(range(15, 25))
+    assert records[-1]["dropped"] == 15
+    assert audit_log.dropped == 15
+
+
+def test_files_rotate_and_stay_valid_gzip(tmp_path):
+    audit_log = AuditLog(str(tmp_path), batch_size=10, max_file_bytes=1)
+    for value in range(30):
+        audit_log.record(make_order(), value, "test")
+    audit_log.flush()
+    audit_log._close_file()
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 3
+    for name in names:
+        with gzip.open(tmp_path / name, "rt") as audit_file:
+            assert len(audit_file.readlines()) == 10
+
+
+def test_reader_cli(tmp_path, capsys):
+    audit_log = AuditLog(str(tmp_path))
+    audit_log.record(make_order(), 710, "test")
+    audit_log.flush()
+    audit_log._close_file()
+
+    main(["read", str(tmp_path)])
+    assert '"delivery_fee": 710' in capsys.readouterr().out
+
+
+def test_failed_write_is_retried(tmp_path, monkeypatch):
+    audit_log = AuditLog(str(tmp_path), batch_size=4)
+    write_lines = audit_log._write_lines
+    failures = iter([OSError("disk full")])
+
+    def flaky_write_lines(lines):
+        error = next(failures, None)
+        if error is not None:
+            raise error
+        write_lines(lines)
+
+    monkeypatch.setattr(audit_log, "_write_lines", flaky_write_lines)
+    for value in range(10):
+        audit_log.record(make_order(), value, "test")
+    audit_log._try_flush()
+    assert audit_log.written == 0
+    audit_log._try_flush()
+    audit_log._close_file()
+
+    records = list(read_records([str(tmp_path)]))
+    assert [record["delivery_fee"] for record in records] == list(range(10))
+
+
+def test_multipliers_are_recorded(tmp_path):
+    audit_log = AuditLog(str(tmp_path))
+    audit_log.record(make_order(), 710, "test")
+    audit_log.record(make_order(), 1065, "test", surge=1.2, calendar=1.5)
+    audit_log.flush()
+    audit_log._close_file()
+
+    plain, event = read_records([str(tmp_path)])
+    assert "surge" not in plain and "calendar" not in plain
+    assert event["surge"] == 1.2
+    assert event["calendar"] == 1.5
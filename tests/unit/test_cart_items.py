@@ -0,0 +1,99 @@
+import pytest
+from pydantic import ValidationError
+from app.constants import CartConstants, OrderConstants
+from app.delivery_fee import calculate_delivery_fee, volume_surcharge, weight_surcharge
+from app.models import CartSummary, Order, summarize_cart
+
+
+def order(**fields) -> Order:
+    return Order(
+        cart_value=1000, delivery_distance=1000, time="2024-01-15T13:00:00Z", **fields
+    )
+
+
+def test_summary_sums_lines():
+    summary = summarize_cart(
+        [
+            {"quantity": 2, "weight": 1500, "volume": "large"},
+            {"quantity": 1, "weight": 200},
+            {"quantity": 3, "volume": "extra_large"},
+            {"quantity": 1, "weight": 0, "volume": "medium", "name": "ignored"},
+        ]
+    )
+    assert summary == CartSummary(quantity=7, weight=3200, large=2, extra_large=3)
+
+
+@pytest.mark.parametrize(
+    "items",
+    [
+        [],
+        "not a list",
+        [1, 2],
+        [{"weight": 10}],
+        [{"quantity": 0}],
+        [{"quantity": True}],
+        [{"quantity": 1.5}],
+        [{"quantity": 1, "weight": -1}],
+        [{"quantity": 1, "weight": "1kg"}],
+        [{"quantity": 1, "volume": "huge"}],
+        [{"quantity": 1, "volume": ["large"]}],
+        [{"quantity": 1, "volume": {"large": 1}}],
+        [{"quantity": 1}] * (CartConstants.MAX_LINES + 1),
+    ],
+)
+def test_invalid_item_lists(items):
+    with pytest.raises(ValueError):
+        summarize_cart(items)
+
+
+def test_number_of_items_is_derived():
+    assert order(items=[{"quantity": 2}, {"quantity": 5}]).number_of_items == 7
+    assert order(number_of_items=7, items=[{"quantity": 7}]).number_of_items == 7
+    with pytest.raises(ValidationError):
+        order(number_of_items=3, items=[{"quantity": 7}])
+    with pytest.raises(ValidationError):
+        order()
+
+
+@pytest.mark.parametrize(
+    "weight, surcharge",
+    [(0, 0), (10000, 0), (10001, 100), (15000, 100), (15001, 200), (40000, 600)],
+)
+def test_weight_surcharge(weight: int, surcharge: int):
+    assert weight_surcharge(weight) == surcharge
+
+
+def test_volume_surcharge():
+    assert volume_surcharge(0, 0) == 0
+    assert volume_surcharge(3, 2) == 3 * 50 + 2 * 200
+    assert volume_surcharge(1, 1, OrderConstants(LARGE_ITEM_FEE=10)) == 210
+
+
+def test_item_list_surcharges_in_fee():
+    plain = order(number_of_items=2)
+    bulky = order(
+        items=[
+            {"quantity": 1, "weight": 12000, "volume": "large"},
+            {"quantity": 1, "weight": 500, "volume": "extra_large"},
+        ]
+    )
+    assert calculate_delivery_fee(plain) == 200
+    assert calculate_delivery_fee(bulky) == 200 + 100 + 50 + 200
+    assert calculate_delivery_fee(order(items=[{"quantity": 2}])) == 200
+
+
+def test_large_cart_is_summed_in_one_pass():
+    lines = [
+        {
+            "quantity": 1 + i % 3,
+            "weight": 100,
+            "volume": CartConstants.VOLUME_CATEGORIES[i % 4],
+        }
+        for i in range(CartConstants.MAX_LINES)
+    ]
+    summary = order(items=lines).cart
+    assert summary.quantity == sum(line["quantity"] for line in lines)
+    assert summary.weight == 100 * summary.quantity
+    assert summary.large == sum(
+        line["quantity"] for line in lines if line["volume"] == "large"
+    )
@@ -0,0 +1,76 @@
+import json
+import os
+import pytest
+from collections import Counter
+from app.experiments import Experiment, load_experiment
+from app.reloader import ReloadingFile
+
+
+ARMS: list[dict] = [
+    {"name": "control", "weight": 75, "rules": {}},
+    {"name": "cheap_distance", "weight": 25, "rules": {"DISTANCE_HALF_KM_FEE": 80}},
+]
+
+
+def write_experiment(path, arms: list[dict], salt: str = "s1") -> None:
+    with open(path, "w") as experiment_file:
+        json.dump({"name": "exp", "salt": salt, "arms": arms}, experiment_file)
+
+
+def test_assignment_is_sticky():
+    experiment = Experiment("exp", "s1", ARMS)
+    recompiled = Experiment("exp", "s1", ARMS)
+    for i in range(100):
+        customer_id = f"customer-{i}"
+        assert experiment.assign(customer_id) == recompiled.assign(customer_id)
+
+
+def test_assignment_follows_weights():
+    experiment = Experiment("exp", "s1", ARMS)
+    counts = Counter(experiment.assign(f"c{i}").name for i in range(20000))
+    assert 0.72 < counts["control"] / 20000 < 0.78
+
+
+def test_arm_rules_are_compiled():
+    experiment = Experiment("exp", "s1", ARMS)
+    arm = experiment.arms[1]
+    assert arm.rules.DISTANCE_HALF_KM_FEE == 80
+    assert "+exp:cheap_distance:" in arm.rules.RULES_VERSION
+
+
+def test_rules_version_changes_with_arm_rules():
+    edited = [ARMS[0], {**ARMS[1], "rules": {"DISTANCE_HALF_KM_FEE": 50}}]
+    before = Experiment("exp", "s1", ARMS).arms[1].rules.RULES_VERSION
+    after = Experiment("exp", "s1", edited).arms[1].rules.RULES_VERSION
+    assert before != after
+    assert Experiment("exp", "s1", ARMS).arms[1].rules.RULES_VERSION == before
+
+
+@pytest.mark.parametrize(
+    "arms",
+    [
+        [],
+        [{"name": "a", "weight": 0}],
+        [{"name": "a", "weight": 1.5}],
+        [{"name": "a", "rules": {"NOT_A_RULE": 1}}],
+    ],
+)
+def test_invalid_experiments(arms: list[dict]):
+    with pytest.raises(ValueError):
+        Experiment("exp", "s1", arms)
+
+
+def test_hot_reload(tmp_path):
+    path = tmp_path / "experiment.json"
+    write_experiment(path, ARMS)
+    experiment = ReloadingFile(str(path), load_experiment, interval=0)
+    assert len(experiment.get().arms) == 2
+
+    write_experiment(path, ARMS[:1])
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert len(experiment.get().arms) == 1
+
+    with open(path, "w") as experiment_file:
+        experiment_file.write("{broken")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert len(experiment.get().arms) == 1
@@ -0,0 +1,77 @@
+import pytest
+from app.constants import OrderConstants
+from app.delivery_fee import items_surcharge, order_fee
+from app.insights import fee_curve, fee_insights, next_distance_step
+from app.models import Order
+
+
+def fee_from_curve(segments, value: int) -> int:
+    for segment in segments:
+        if segment.start <= value and (segment.end is None or value <= segment.end):
+            return segment.delivery_fee
+    raise AssertionError(f"{value} is not covered by the curve")
+
+
+@pytest.mark.parametrize("rush_hour", [False, True])
+@pytest.mark.parametrize(
+    "vary, fixed, values",
+    [
+        ("cart_value", {"distance": 1499, "items": 5}, range(0, 20100, 7)),
+        ("delivery_distance", {"cart_value": 790, "items": 4}, range(0, 9000, 13)),
+        ("number_of_items", {"cart_value": 1000, "distance": 2235}, range(1, 40)),
+    ],
+)
+def test_curve_matches_brute_force(vary: str, fixed: dict, values, rush_hour: bool):
+    arguments = {"cart_value": 0, "distance": 0, "items": 0, **fixed}
+    segments = fee_curve(
+        vary,
+        arguments["cart_value"],
+        arguments["distance"],
+        arguments["items"],
+        rush_hour,
+    )
+    key = {"cart_value": "cart_value", "delivery_distance": "distance"}.get(
+        vary, "items"
+    )
+    for value in values:
+        arguments[key] = value
+        expected = order_fee(
+            arguments["cart_value"], arguments["distance"], arguments["items"], rush_hour
+        )
+        assert fee_from_curve(segments, value) == expected
+
+
+def test_curve_segments_are_maximal():
+    segments = fee_curve("delivery_distance", 1000, 0, 4, False)
+    fees = [segment.delivery_fee for segment in segments]
+    assert all(a != b for a, b in zip(fees, fees[1:]))
+    assert segments[0].start == 0
+    assert segments[-1].end is None
+    assert segments[-1].delivery_fee == OrderConstants.MAX_DELIVERY_FEE
+
+
+@pytest.mark.parametrize(
+    "distance, expected",
+    [(0, 1001), (1000, 1001), (1001, 1501), (1499, 1501), (1500, 1501), (1501, 2001)],
+)
+def test_next_distance_step(distance: int, expected: int):
+    assert next_distance_step(distance) == expected
+    assert order_fee(1000, expected, 1, False) > order_fee(1000, distance, 1, False)
+
+
+@pytest.mark.parametrize("items", [1, 4, 11, 12, 13, 30])
+def test_items_until_bulk_fee(items: int):
+    order = Order(
+        cart_value=1000,
+        delivery_distance=1000,
+        number_of_items=items,
+        time="2024-01-15T13:00:00Z",
+    )
+    insights = fee_insights(order, [])
+    bulk_fee = OrderConstants.ITEMS_BULK_FEE
+    added = items + insights.items_until_bulk_fee
+    if items <= OrderConstants.MAX_ITEMS_NO_BULK_FEE:
+        assert items_surcharge(added) - items_surcharge(added - 1) < bulk_fee
+        assert items_surcharge(added + 1) - items_surcharge(added) > bulk_fee
+    else:
+        assert insights.items_until_bulk_fee == 0
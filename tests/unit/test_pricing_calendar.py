@@ -0,0 +1,264 @@
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.delivery_fee import calculate_delivery_fee, calculate_delivery_fees
+from app.models import Order
+from app.pricing_calendar import PricingCalendar, load_calendar
+from app.reloader import ReloadingFile
+
+
+def utc(text: str) -> datetime:
+    return datetime.fromisoformat(text).astimezone(timezone.utc)
+
+
+def event(name: str, start: str, end: str, multiplier: float, **extra) -> dict:
+    return {"name": name, "start": start, "end": end, "multiplier": multiplier, **extra}
+
+
+def test_event_bounds_are_half_open():
+    calendar = PricingCalendar(
+        [event("eve", "2024-12-24T12:00:00+02:00", "2024-12-25T00:00:00+02:00", 1.5)],
+        [],
+    )
+    assert calendar.multiplier(utc("2024-12-24T09:59:59Z")) is None
+    assert calendar.multiplier(utc("2024-12-24T10:00:00Z")) == 1.5
+    assert calendar.multiplier(utc("2024-12-24T21:59:59Z")) == 1.5
+    assert calendar.multiplier(utc("2024-12-24T22:00:00Z")) is None
+    assert calendar.multiplier(None) is None
+
+
+def test_overlaps_resolve_by_priority_multiplier_then_file_order():
+    calendar = PricingCalendar(
+        [
+            event("long", "2024-05-01T00:00:00Z", "2024-05-10T00:00:00Z", 1.1),
+            event("high", "2024-05-03T00:00:00Z", "2024-05-04T00:00:00Z", 1.3),
+            event(
+                "urgent",
+                "2024-05-03T12:00:00Z",
+                "2024-05-03T13:00:00Z",
+                1.05,
+                priority=1,
+            ),
+            event("first", "2024-05-06T00:00:00Z", "2024-05-07T00:00:00Z", 1.2),
+            event("second", "2024-05-06T00:00:00Z", "2024-05-07T00:00:00Z", 1.2),
+        ],
+        [],
+    )
+    names = [
+        calendar.lookup(utc(moment)).name
+        for moment in (
+            "2024-05-02T00:00:00Z",
+            "2024-05-03T06:00:00Z",
+            "2024-05-03T12:30:00Z",
+            "2024-05-03T18:00:00Z",
+            "2024-05-05T00:00:00Z",
+            "2024-05-06T12:00:00Z",
+        )
+    ]
+    assert names == ["long", "high", "urgent", "high", "long", "first"]
+
+
+def test_overlapping_events_compile_into_disjoint_intervals():
+    calendar = PricingCalendar(
+        [
+            event("a", "2024-05-01T00:00:00Z", "2024-05-03T00:00:00Z", 1.1),
+            event("b", "2024-05-02T00:00:00Z", "2024-05-04T00:00:00Z", 1.1),
+            event("c", "2024-05-10T00:00:00Z", "2024-05-11T00:00:00Z", 1.2),
+        ],
+        [],
+    )
+    index = calendar._events[None]
+    assert len(index) == 3
+    assert all(end <= start for end, start in zip(index.ends, index.starts[1:]))
+
+
+def test_many_events_match_a_linear_scan():
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    events = [
+        event(
+            f"e{i}",
+            (start + timedelta(hours=7 * i)).isoformat(),
+            (start + timedelta(hours=7 * i + 1 + i % 13)).isoformat(),
+            1.0 + (i % 5) / 10,
+            priority=i % 3,
+        )
+        for i in range(3000)
+    ]
+    calendar = PricingCalendar(events, [])
+
+    def scan(moment: datetime) -> str | None:
+        covering = [
+            (position, config)
+            for position, config in enumerate(events)
+            if datetime.fromisoformat(config["start"])
+            <= moment
+            < datetime.fromisoformat(config["end"])
+        ]
+        if not covering:
+            return None
+        position, config = min(
+            covering,
+            key=lambda item: (-item[1]["priority"], -item[1]["multiplier"], item[0]),
+        )
+        return config["name"]
+
+    for minutes in range(0, 3000 * 7 * 60, 997):
+        moment = start + timedelta(minutes=minutes)
+        entry = calendar.lookup(moment)
+        assert (entry.name if entry else None) == scan(moment)
+
+
+def test_weekly_windows_fill_the_hour_of_week_table():
+    calendar = PricingCalendar(
+        [event("holiday", "2024-01-13T00:00:00Z", "2024-01-14T00:00:00Z", 1.6)],
+        [
+            {
+                "name": "lunch",
+                "day": 5,
+                "start_hour": 11,
+                "end_hour": 14,
+                "multiplier": 1.1,
+            },
+            {
+                "name": "noon",
+                "day": 5,
+                "start_hour": 12,
+                "end_hour": 13,
+                "multiplier": 1.3,
+            },
+        ],
+    )
+    assert calendar.lookup(utc("2024-01-20T11:30:00Z")).name == "lunch"
+    assert calendar.lookup(utc("2024-01-20T12:30:00Z")).name == "noon"
+    assert calendar.lookup(utc("2024-01-20T14:00:00Z")) is None
+    assert calendar.lookup(utc("2024-01-19T12:00:00Z")) is None
+    assert calendar.lookup(utc("2024-01-13T12:30:00Z")).name == "holiday"
+
+
+def test_regional_entries():
+    calendar = PricingCalendar(
+        [
+            event("national", "2024-12-06T00:00:00Z", "2024-12-07T00:00:00Z", 1.2),
+            event(
+                "derby",
+                "2024-12-06T16:00:00Z",
+                "2024-12-06T20:00:00Z",
+                1.1,
+                regions=["helsinki"],
+                priority=1,
+            ),
+        ],
+        [],
+    )
+    moment = utc("2024-12-06T17:00:00Z")
+    assert calendar.multiplier(moment, "helsinki") == 1.1
+    assert calendar.multiplier(moment, "tampere") == 1.2
+    assert calendar.multiplier(moment) == 1.2
+
+
+@pytest.mark.parametrize(
+    "events, weekly",
+    [
+        (
+            [
+                {
+                    "start": "2024-01-01T00:00:00Z",
+                    "end": "2024-01-02T00:00:00Z",
+                    "multiplier": 1.2,
+                }
+            ],
+            [],
+        ),
+        ([event("naive", "2024-01-01T00:00:00", "2024-01-02T00:00:00", 1.2)], []),
+        ([event("backwards", "2024-01-02T00:00:00Z", "2024-01-01T00:00:00Z", 1.2)], []),
+        ([event("free", "2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z", 0)], []),
+        (
+            [
+                event(
+                    "where",
+                    "2024-01-01T00:00:00Z",
+                    "2024-01-02T00:00:00Z",
+                    1.2,
+                    regions="hel",
+                )
+            ],
+            [],
+        ),
+        (
+            [],
+            [
+                {
+                    "name": "w",
+                    "day": 7,
+                    "start_hour": 1,
+                    "end_hour": 2,
+                    "multiplier": 1.2,
+                }
+            ],
+        ),
+        (
+            [],
+            [
+                {
+                    "name": "w",
+                    "day": 1,
+                    "start_hour": 22,
+                    "end_hour": 2,
+                    "multiplier": 1.2,
+                }
+            ],
+        ),
+    ],
+)
+def test_invalid_entries_are_rejected(events, weekly):
+    with pytest.raises(ValueError):
+        PricingCalendar(events, weekly)
+
+
+def test_calendar_replaces_rush_hour_multiplier():
+    order = Order(
+        cart_value=1000,
+        delivery_distance=2235,
+        number_of_items=4,
+        time="2024-01-19T16:00:00Z",
+    )
+    assert calculate_delivery_fee(order) == 600
+    assert calculate_delivery_fee(order, calendar_multiplier=1.5) == 750
+    assert calculate_delivery_fee(order, calendar_multiplier=1.0) == 500
+    assert (
+        calculate_delivery_fee(
+            order, surge_replaces_rush_hour=True, calendar_multiplier=1.5
+        )
+        == 500
+    )
+    assert calculate_delivery_fees(
+        [order, order], calendar_multipliers=[None, 1.5]
+    ) == [600, 750]
+
+
+def test_reload_picks_up_edited_calendar(tmp_path):
+    path = tmp_path / "calendar.json"
+
+    def write(multiplier: float) -> None:
+        path.write_text(
+            json.dumps(
+                {
+                    "events": [
+                        event(
+                            "sale",
+                            "2024-03-01T00:00:00Z",
+                            "2024-03-02T00:00:00Z",
+                            multiplier,
+                        )
+                    ]
+                }
+            )
+        )
+
+    write(1.2)
+    calendar = ReloadingFile(str(path), load_calendar, interval=0)
+    moment = utc("2024-03-01T12:00:00Z")
+    assert calendar.get().multiplier(moment) == 1.2
+    write(1.4)
+    calendar._mtime = 0
+    assert calendar.get().multiplier(moment) == 1.4
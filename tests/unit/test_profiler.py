@@ -0,0 +1,36 @@
+import threading
+import time
+from app.profiler import Profiler, sample_stacks
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_samples_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        stacks = sample_stacks(0.1, 0.005)
+    finally:
+        stop.set()
+        worker.join()
+    busy = [stack for stack in stacks if stack.startswith("busy;")]
+    assert busy
+    assert all("test_profiler:busy_loop" in stack for stack in busy)
+    assert sum(stacks[stack] for stack in busy) >= 5
+    assert not any("sample_stacks" in stack for stack in stacks)
+
+
+def test_one_profile_at_a_time():
+    profiler = Profiler()
+    results: list[str | None] = []
+    first = threading.Thread(target=lambda: results.append(profiler.profile(0.2, 0.01)))
+    first.start()
+    time.sleep(0.05)
+    assert profiler.profile(0.01, 0.01) is None
+    first.join()
+    assert results[0] is not None
+    assert profiler.profile(0.01, 0.01) is not None
@@ -0,0 +1,39 @@
+import random
+import pytest
+from app.constants import OrderConstants
+from app.delivery_fee import order_fee, is_rush_hour
+from app.ranking import haversine_distance, rank_by_fee
+
+
+def brute_force(
+    cart_value: int, items: int, time: str, distances: list[int], limit: int
+) -> list[tuple[int, int]]:
+    """Price every venue one by one and sort them all."""
+    rush_hour: bool = is_rush_hour(time)
+    fees = [order_fee(cart_value, d, items, rush_hour) for d in distances]
+    return sorted(enumerate(fees), key=lambda venue: venue[1])[:limit]
+
+
+@pytest.mark.parametrize("cart_value", [0, 500, 990, 5000, 19999, 20000])
+@pytest.mark.parametrize("items", [1, 8, 20])
+@pytest.mark.parametrize("time", ["2024-01-15T13:00:00Z", "2024-01-26T16:00:00Z"])
+def test_matches_brute_force(cart_value: int, items: int, time: str):
+    distances = [random.randint(0, 12000) for _ in range(300)]
+    for limit in (1, 10, 300):
+        assert rank_by_fee(cart_value, items, time, distances, limit) == brute_force(
+            cart_value, items, time, distances, limit
+        )
+
+
+def test_all_venues_capped():
+    """The fixed terms alone reach the cap, so every venue costs the maximum."""
+    max_fee: int = OrderConstants.MAX_DELIVERY_FEE
+    ranked = rank_by_fee(0, 100, "2024-01-15T13:00:00Z", [5000, 100, 0], 2)
+    assert ranked == [(0, max_fee), (1, max_fee)]
+
+
+def test_haversine_distance():
+    # Helsinki railway station to Helsinki cathedral, about 600 meters.
+    distance = haversine_distance(60.1710, 24.9414, 60.1703, 24.9522)
+    assert 580 < distance < 620
+    assert haversine_distance(60.0, 25.0, 60.0, 25.0) == 0
@@ -0,0 +1,63 @@
+import pytest
+from app.rate_limit import RateLimiter, client_key
+
+
+def test_burst_then_rate():
+    limiter = RateLimiter(rate=2.0, burst=3)
+    assert [limiter.acquire("a", now=10.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a", now=10.0) == pytest.approx(0.5)
+    assert limiter.acquire("a", now=10.25) == pytest.approx(0.25)
+    assert limiter.acquire("a", now=10.5) == 0.0
+    assert limiter.acquire("a", now=10.5) > 0
+
+
+def test_buckets_are_per_client():
+    limiter = RateLimiter(rate=1.0, burst=1)
+    assert limiter.acquire("a", now=1.0) == 0.0
+    assert limiter.acquire("a", now=1.0) > 0
+    assert limiter.acquire("b", now=1.0) == 0.0
+
+
+def test_refill_is_capped_at_burst():
+    limiter = RateLimiter(rate=100.0, burst=2)
+    limiter.acquire("a", now=1.0)
+    allowed = [limiter.acquire("a", now=100.0) == 0.0 for _ in range(5)]
+    assert allowed == [True, True, False, False, False]
+
+
+def test_idle_clients_are_evicted_and_counted():
+    limiter = RateLimiter(rate=1.0, burst=2, max_clients=2, idle_timeout=10.0)
+    limiter.acquire("a", now=1.0)
+    limiter.acquire("b", now=1.0)
+    limiter.acquire("b", now=1.0)
+    limiter.acquire("b", now=1.0)
+
+    limiter.acquire("b", now=30.0)
+    stats = limiter.snapshot()
+    assert set(stats["clients"]) == {"b"}
+    assert stats["clients"]["b"]["allowed"] == 1
+    assert stats["evicted"] == {"clients": 2, "allowed": 3, "rejected": 1}
+
+
+def test_new_clients_share_overflow_bucket_when_full():
+    limiter = RateLimiter(rate=1.0, burst=1, max_clients=1, idle_timeout=60.0)
+    assert limiter.acquire("a", now=1.0) == 0.0
+    assert limiter.acquire("b", now=2.0) == 0.0
+    assert limiter.acquire("c", now=2.0) > 0
+    stats = limiter.snapshot()
+    assert stats["tracked"] == 1
+    assert stats["overflow"]["allowed"] == 1
+    assert stats["overflow"]["rejected"] == 1
+
+
+def test_eviction_never_refunds_an_active_client():
+    limiter = RateLimiter(rate=0.01, burst=1, max_clients=1, idle_timeout=1.0)
+    assert limiter.idle_timeout == 100.0
+    limiter.acquire("a", now=1.0)
+    assert limiter.acquire("a", now=50.0) > 0
+
+
+def test_client_key_from_headers():
+    assert client_key({"headers": [(b"x-api-key", b"team-a")]}) == "team-a"
+    assert client_key({"headers": []}) == ""
+    assert len(client_key({"headers": [(b"x-api-key", b"k" * 1000)]})) == 128
@@ -0,0 +1,56 @@
+import time
+from app.replay import latency_summary, replay
+
+
+def records(count: int, interval: float = 0.0) -> list[dict]:
+    return [
+        {
+            "ts": 1000.0 + i * interval,
+            "body": {"cart_value": i},
+            "status": 200,
+            "response": {"delivery_fee": i},
+            "latency_ms": float(i),
+        }
+        for i in range(count)
+    ]
+
+
+def echo(body: dict) -> tuple[int, dict]:
+    return 200, {"delivery_fee": body["cart_value"]}
+
+
+def test_latency_summary():
+    summary = latency_summary([float(i) for i in range(1, 101)])
+    assert summary == {"mean": 50.5, "p50": 50, "p90": 90, "p99": 99, "max": 100}
+    assert latency_summary([]) == {}
+
+
+def test_matching_responses():
+    report = replay(records(50), echo, speed=0)
+    assert (report["requests"], report["mismatches"], report["errors"]) == (50, 0, 0)
+    assert report["recorded_latency_ms"]["max"] == 49
+
+
+def test_changed_fee_is_a_mismatch():
+    def cheaper(body: dict) -> tuple[int, dict]:
+        return 200, {"delivery_fee": body["cart_value"] - (body["cart_value"] == 7)}
+
+    report = replay(records(20), cheaper, speed=0)
+    assert report["mismatches"] == 1
+    assert report["first_mismatches"][0]["actual"] == [200, {"delivery_fee": 6}]
+
+
+def test_failed_requests_are_counted():
+    def failing(body: dict) -> tuple[int, dict]:
+        raise ConnectionError("refused")
+
+    report = replay(records(3), failing, speed=0)
+    assert report["errors"] == 3
+    assert report["latency_ms"] == {}
+
+
+def test_recorded_pace_is_scaled():
+    """Ten requests recorded 20 ms apart take about 90 ms at speed 2."""
+    started = time.perf_counter()
+    replay(records(10, interval=0.02), echo, speed=2)
+    assert 0.08 < time.perf_counter() - started < 0.5
@@ -0,0 +1,149 @@
+import itertools
+import pytest
+from app.constants import OrderConstants
+from app.delivery_fee import (
+    ROUNDING_MODES,
+    calculate_delivery_fee,
+    calculate_delivery_fees,
+    fee_finalizer,
+    finalize_fee,
+    multiplier_ratio,
+    round_amount,
+)
+from app.models import Order
+from app.ranking import rank_by_fee
+from app.rules import rules_from_overrides
+
+
+"""
+Conformance matrix: every rounding mode and cash-rounding step, applied through
+the scalar path (calculate_delivery_fee, finalize_fee) and the batch paths
+(calculate_delivery_fees, fee_finalizer, rank_by_fee), must give identical fees.
+"""
+
+
+PROFILES: list[OrderConstants] = [
+    rules_from_overrides({"ROUNDING_MODE": mode, "ROUNDING_STEP": step, **amounts})
+    for mode, step, amounts in itertools.product(
+        ROUNDING_MODES,
+        [1, 5, 10, 100],
+        [
+            {},
+            {
+                "CURRENCY": "SEK",
+                "MAX_DELIVERY_FEE": 15000,
+                "FREE_DELIVERY_CART_VALUE": 200000,
+                "MIN_CART_VALUE_NO_SURCHARGE": 10000,
+                "DISTANCE_STARTING_FEE": 2000,
+                "DISTANCE_HALF_KM_FEE": 1000,
+                "ADDITIONAL_FEE_PER_ITEM": 500,
+                "ITEMS_BULK_FEE": 1200,
+            },
+        ],
+    )
+    if (amounts.get("MAX_DELIVERY_FEE", 1500)) % step == 0
+]
+MULTIPLIERS: list[float] = [1.0, 1.1, 1.2, 1.25, 1.2 * 1.3, 1.5, 4 / 3, 0.85]
+ORDERS: list[Order] = [
+    Order(
+        cart_value=cart_value,
+        delivery_distance=distance,
+        number_of_items=items,
+        time=time,
+    )
+    for cart_value, distance, items, time in itertools.product(
+        [0, 333, 795, 999, 5000, 19999],
+        [0, 1001, 1499, 2235, 7321],
+        [1, 5, 13],
+        ["2024-01-15T13:00:00Z", "2024-01-19T16:00:00Z"],
+    )
+]
+
+
+@pytest.mark.parametrize(
+    "amount, divisor, step, expected",
+    [
+        (25, 10, 1, {"half_even": 2, "half_up": 3, "up": 3, "down": 2}),
+        (35, 10, 1, {"half_even": 4, "half_up": 4, "up": 4, "down": 3}),
+        (31, 10, 1, {"half_even": 3, "half_up": 3, "up": 4, "down": 3}),
+        (30, 10, 1, {"half_even": 3, "half_up": 3, "up": 3, "down": 3}),
+        (1225, 1, 50, {"half_even": 1200, "half_up": 1250, "up": 1250, "down": 1200}),
+        (1275, 1, 50, {"half_even": 1300, "half_up": 1300, "up": 1300, "down": 1250}),
+        (1203, 1, 5, {"half_even": 1205, "half_up": 1205, "up": 1205, "down": 1200}),
+    ],
+)
+def test_round_amount(amount: int, divisor: int, step: int, expected: dict[str, int]):
+    for mode, rounded in expected.items():
+        assert round_amount(amount, divisor, step, mode) == rounded
+
+
+def test_multiplier_ratio_recovers_decimals():
+    assert multiplier_ratio(1.2) == (6, 5)
+    assert multiplier_ratio(1.2 * 1.3) == (39, 25)
+    assert multiplier_ratio(1.0) == (1, 1)
+
+
+def test_ties_are_exact():
+    """15 * 1.1 is 16.500000000000004 in floating point, but a tie in the rules."""
+    rules = OrderConstants(ROUNDING_MODE="half_even")
+    assert finalize_fee(15, 1.1, rules) == 16
+    assert finalize_fee(15, 1.1, OrderConstants(ROUNDING_MODE="half_up")) == 17
+
+
+@pytest.mark.parametrize(
+    "rules", PROFILES, ids=lambda r: f"{r.CURRENCY}-{r.ROUNDING_MODE}-{r.ROUNDING_STEP}"
+)
+def test_finalizer_matches_finalize_fee(rules: OrderConstants):
+    for multiplier in MULTIPLIERS:
+        finalize = fee_finalizer(multiplier, rules)
+        for fee in range(0, 2 * rules.MAX_DELIVERY_FEE, 7):
+            expected = finalize_fee(fee, multiplier, rules)
+            assert finalize(fee) == expected
+            assert expected <= rules.MAX_DELIVERY_FEE
+            assert expected % rules.ROUNDING_STEP == 0 or expected == 0
+
+
+@pytest.mark.parametrize(
+    "rules", PROFILES, ids=lambda r: f"{r.CURRENCY}-{r.ROUNDING_MODE}-{r.ROUNDING_STEP}"
+)
+def test_batch_matches_scalar(rules: OrderConstants):
+    surges = [MULTIPLIERS[i % len(MULTIPLIERS)] for i in range(len(ORDERS))]
+    calendar = [None if i % 3 else 1.5 for i in range(len(ORDERS))]
+    batch = calculate_delivery_fees(
+        ORDERS, rules, surges=surges, calendar_multipliers=calendar
+    )
+    scalar = [
+        calculate_delivery_fee(order, rules, surge, calendar_multiplier=multiplier)
+        for order, surge, multiplier in zip(ORDERS, surges, calendar)
+    ]
+    assert batch == scalar
+
+
+@pytest.mark.parametrize(
+    "rules", PROFILES, ids=lambda r: f"{r.CURRENCY}-{r.ROUNDING_MODE}-{r.ROUNDING_STEP}"
+)
+def test_ranking_matches_scalar(rules: OrderConstants):
+    distances = list(range(0, 40000, 373))
+    for time in ["2024-01-15T13:00:00Z", "2024-01-19T16:00:00Z"]:
+        ranked = rank_by_fee(795, 5, time, distances, len(distances), rules)
+        for index, fee in ranked:
+            order = Order(
+                cart_value=795,
+                delivery_distance=distances[index],
+                number_of_items=5,
+                time=time,
+            )
+            assert fee == calculate_delivery_fee(order, rules)
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"ROUNDING_MODE": "bankers"},
+        {"ROUNDING_STEP": 0},
+        {"ROUNDING_STEP": 7},
+    ],
+)
+def test_invalid_rounding_rules(overrides: dict):
+    with pytest.raises(ValueError):
+        rules_from_overrides(overrides)
@@ -0,0 +1,64 @@
+import pytest
+from app.constants import OrderConstants
+from app.delivery_fee import calculate_delivery_fee, calculate_delivery_fees
+from app.models import Order
+from app.rules import rules_from_overrides
+from app.shadow import ShadowPricer
+
+
+def make_order(cart_value: int, time: str = "2024-01-15T13:00:00Z") -> Order:
+    return Order(
+        cart_value=cart_value,
+        delivery_distance=2235,
+        number_of_items=4,
+        time=time,
+    )
+
+
+ORDERS: list[Order] = [
+    make_order(790),
+    make_order(790, "2024-01-26T17:00:00Z"),
+    make_order(19999),
+    make_order(22000),
+]
+
+
+def test_batch_matches_scalar():
+    rules = rules_from_overrides({"RUSH_HOUR_MULTIPLIER": 1.5})
+    expected = [calculate_delivery_fee(order_data, rules) for order_data in ORDERS]
+    assert calculate_delivery_fees(ORDERS, rules) == expected
+
+
+def test_unknown_or_mistyped_rules_are_rejected():
+    with pytest.raises(ValueError):
+        rules_from_overrides({"FREE_DELIVERY": 1})
+    with pytest.raises(ValueError):
+        rules_from_overrides({"MAX_DELIVERY_FEE": "1500"})
+
+
+def test_shadow_statistics():
+    candidates = {
+        "higher_free_delivery": rules_from_overrides(
+            {"FREE_DELIVERY_CART_VALUE": 25000}
+        ),
+        "production": OrderConstants(),
+    }
+    pricer = ShadowPricer(candidates)
+    pricer.start()
+    for order_data in ORDERS:
+        pricer.submit(order_data, calculate_delivery_fee(order_data))
+    pricer.stop()
+
+    stats = pricer.snapshot()["candidates"]
+    assert stats["production"]["quotes"] == len(ORDERS)
+    assert stats["production"]["changed"] == 0
+    # Only the 22000 cent order loses its free delivery.
+    assert stats["higher_free_delivery"]["increased"] == 1
+    assert stats["higher_free_delivery"]["delta_total"] == 500
+
+
+def test_full_queue_drops_instead_of_blocking():
+    pricer = ShadowPricer({"production": OrderConstants()}, queue_size=2)
+    for order_data in ORDERS:
+        pricer.submit(order_data, 0)
+    assert pricer.dropped == len(ORDERS) - 2
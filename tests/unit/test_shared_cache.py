@@ -0,0 +1,111 @@
+import dataclasses
+import socket
+import threading
+import time
+import pytest
+from app.constants import OrderConstants
+from app.models import Order
+from app.quote_cache import quote_key
+from app.resp_server import RespServer
+from app.shared_cache import ConnectionPool, SharedQuoteCache, cache_key
+
+
+KEY: tuple = ("2024.1", 1.0, 790, 2235, 4, "2024-01-15T13:00:00Z")
+
+
+@pytest.fixture(params=["tcp", "unix"])
+def server(request, tmp_path):
+    unix_path = str(tmp_path / "cache.sock") if request.param == "unix" else None
+    server = RespServer(unix_path=unix_path)
+    server.start()
+    yield server
+    server.stop()
+
+
+def shared_cache(url: str, timeout: float = 0.5) -> SharedQuoteCache:
+    return SharedQuoteCache(ConnectionPool(url, 2, timeout), retry_interval=60)
+
+
+def test_write_then_get(server):
+    cache = shared_cache(server.url)
+    cache.write([(KEY, 710), (KEY[:-1] + ("other",), 0)])
+    assert server.store.size() == 2
+    assert cache.get(KEY) == 710
+    assert cache.get(("missing",)) is None
+    assert cache.get(KEY[:-1] + ("other",)) == 0
+    stats = cache.snapshot()
+    assert (stats["hits"], stats["misses"], stats["written"]) == (2, 1, 2)
+
+
+def test_corrupt_value_is_a_failure(server):
+    cache = shared_cache(server.url)
+    server.store.set(cache_key(KEY).encode(), b"not a fee", None)
+    assert cache.get(KEY) is None
+    assert cache.snapshot()["errors"] == 1
+
+
+def test_writer_thread_drains_on_stop(server):
+    cache = shared_cache(server.url)
+    cache.start()
+    for fee in range(100):
+        cache.put(KEY[:-1] + (str(fee),), fee)
+    cache.stop()
+    assert server.store.size() == 100
+    assert server.store.get(cache_key(KEY[:-1] + ("42",)).encode()) == b"42"
+
+
+def test_connections_are_reused(server):
+    cache = shared_cache(server.url)
+    for _ in range(10):
+        cache.get(KEY)
+    assert cache.pool._idle.qsize() == 1
+
+
+def test_unreachable_server_is_skipped():
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]
+    cache = shared_cache(f"redis://127.0.0.1:{port}")
+    assert cache.get(KEY) is None
+    assert cache.get(KEY) is None
+    stats = cache.snapshot()
+    assert (stats["errors"], stats["skipped"], stats["available"]) == (1, 1, False)
+
+
+def test_slow_server_is_bounded_by_timeout():
+    """The server accepts connections and answers one byte at a time, each just
+    within the timeout of a single receive."""
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+
+        def trickle():
+            connection, _ = listener.accept()
+            with connection:
+                for byte in b"$3\r\n710\r\n":
+                    time.sleep(0.03)
+                    try:
+                        connection.sendall(bytes([byte]))
+                    except OSError:
+                        return
+
+        thread = threading.Thread(target=trickle)
+        thread.start()
+        cache = shared_cache(f"redis://127.0.0.1:{listener.getsockname()[1]}", 0.1)
+        started = time.perf_counter()
+        assert cache.get(KEY) is None
+        assert time.perf_counter() - started < 0.15
+        thread.join()
+    assert cache.snapshot()["errors"] == 1
+
+
+def test_key_changes_with_rules_of_same_version():
+    order = Order(
+        cart_value=790,
+        delivery_distance=2235,
+        number_of_items=4,
+        time="2024-01-15T13:00:00Z",
+    )
+    changed = dataclasses.replace(OrderConstants(), DISTANCE_HALF_KM_FEE=50)
+    assert quote_key(order, OrderConstants()) == quote_key(order, OrderConstants())
+    assert quote_key(order, OrderConstants()) != quote_key(order, changed)
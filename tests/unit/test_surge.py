@@ -0,0 +1,95 @@
+import time
+from app.delivery_fee import calculate_delivery_fee
+from app.models import Order
+from app.surge import DEFAULT_REGION, SlidingWindowCounter, SurgePricing
+
+
+CURVE: list[tuple[float, float]] = [(60, 1.1), (120, 1.5)]
+
+
+def test_sliding_window_forgets_old_events():
+    counter = SlidingWindowCounter(window_seconds=10)
+    for second in range(20):
+        counter.increment(1000 + second)
+    assert counter.total(1019) == 10
+    assert counter.total(1025) == 4
+    assert counter.total(1040) == 0
+
+
+def test_curve_is_a_step_function():
+    surge = SurgePricing(CURVE)
+    assert surge.curve_multiplier(0) == 1.0
+    assert surge.curve_multiplier(59.9) == 1.0
+    assert surge.curve_multiplier(60) == 1.1
+    assert surge.curve_multiplier(1000) == 1.5
+
+
+def test_multiplier_per_region():
+    surge = SurgePricing(CURVE, window_seconds=60)
+    for _ in range(130):
+        surge.record("helsinki")
+    surge.record(None)
+    assert surge.multiplier("helsinki") == 1.0
+    surge.aggregate()
+    assert surge.multiplier("helsinki") == 1.5
+    assert surge.multiplier(None) == 1.0
+    assert surge.multiplier("espoo") == 1.0
+
+
+def test_unknown_regions_count_as_default():
+    surge = SurgePricing(CURVE, regions={"helsinki"})
+    for i in range(130):
+        surge.record(f"random-{i}")
+    surge.aggregate()
+    assert set(surge.snapshot()["local_window_counts"]) == {DEFAULT_REGION}
+    assert surge.multiplier(None) == 1.5
+    assert surge.multiplier("random-999") == 1.5
+    assert surge.multiplier("helsinki") == 1.0
+
+
+def test_tracked_regions_are_bounded(monkeypatch):
+    surge = SurgePricing(CURVE, window_seconds=60, max_regions=10)
+    for i in range(1000):
+        surge.record(f"random-{i}")
+    assert len(surge.snapshot()["local_window_counts"]) == 10
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    surge.aggregate()
+    assert surge.snapshot()["local_window_counts"] == {}
+    surge.record("helsinki")
+    assert surge.snapshot()["local_window_counts"] == {"helsinki": 1}
+
+
+def test_workers_share_demand(tmp_path):
+    """Two workers below the threshold on their own surge together."""
+    first = SurgePricing(CURVE, share_dir=str(tmp_path))
+    second = SurgePricing(CURVE, share_dir=str(tmp_path))
+    for _ in range(40):
+        first.record("helsinki")
+    first.aggregate()
+    assert first.multiplier("helsinki") == 1.0
+
+    # The second worker publishes under its own file name.
+    second._share_path = lambda pid: str(tmp_path / "surge-other.json")
+    for _ in range(40):
+        second.record("helsinki")
+    second.aggregate()
+    assert second.multiplier("helsinki") == 1.1
+
+
+def test_surge_stacks_or_replaces_rush_hour():
+    rush_hour_order = Order(
+        cart_value=1000,
+        delivery_distance=500,
+        number_of_items=4,
+        time="2024-01-26T16:00:00Z",
+    )
+    assert calculate_delivery_fee(rush_hour_order) == 240
+    assert calculate_delivery_fee(rush_hour_order, surge=1.5) == 360
+    assert (
+        calculate_delivery_fee(
+            rush_hour_order, surge=1.5, surge_replaces_rush_hour=True
+        )
+        == 300
+    )
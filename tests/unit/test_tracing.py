@@ -0,0 +1,32 @@
+from app import tracing
+from app.tracing import server_timing, traced
+
+
+def double(value: int) -> int:
+    return value * 2
+
+
+def test_disabled_tracing_returns_the_function(monkeypatch):
+    monkeypatch.setattr(tracing.settings, "tracing", False)
+    assert traced("double")(double) is double
+
+
+def test_spans_only_in_traced_context(monkeypatch):
+    monkeypatch.setattr(tracing.settings, "tracing", True)
+    wrapped = traced("double")(double)
+    assert wrapped(2) == 4
+
+    spans: list = []
+    token = tracing._spans.set(spans)
+    try:
+        assert wrapped(3) == 6
+        assert wrapped(4) == 8
+    finally:
+        tracing._spans.reset(token)
+    assert [name for name, _ in spans] == ["double", "double"]
+    assert all(duration > 0 for _, duration in spans)
+
+
+def test_server_timing_sums_spans():
+    header = server_timing([("a", 1_000_000), ("b", 500_000), ("a", 2_000_000)])
+    assert header == "a;dur=3.000, b;dur=0.500"